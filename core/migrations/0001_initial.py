@@ -0,0 +1,28 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        # The table was created by the transactions app.
+        ('transactions', '0006_dataversion'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='DataVersion',
+                    fields=[
+                        ('key', models.CharField(max_length=255, primary_key=True, serialize=False)),
+                        ('version', models.PositiveBigIntegerField(default=0)),
+                    ],
+                    options={
+                        'db_table': 'transactions_dataversion',
+                    },
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,17 @@
+from django.db import models
+
+
+class DataVersion(models.Model):
+    """
+    Monotonic change counter for a named piece of data, bumped on every
+    write so per-process caches can tell when their copy is stale.
+    """
+    key = models.CharField(max_length=255, primary_key=True)
+    version = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        # Created by the transactions app before it moved here.
+        db_table = 'transactions_dataversion'
+
+    def __str__(self):
+        return f'{self.key} v{self.version}'
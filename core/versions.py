@@ -0,0 +1,60 @@
+"""
+Change counters kept in DataVersion rows.
+
+A version only ever goes up, and it is bumped in the same database
+transaction as the write it records, so any process can compare a cached
+copy against it with a single primary-key lookup.
+"""
+from django.db import IntegrityError, transaction as db_transaction
+from django.db.models import F
+
+from .models import DataVersion
+
+
+def get_version(key):
+    return DataVersion.objects.filter(key=key).values_list(
+        'version', flat=True).first() or 0
+
+
+def get_versions(keys):
+    """Return the versions of `keys`, in order, with one query"""
+    found = dict(DataVersion.objects.filter(key__in=keys).values_list(
+        'key', 'version'))
+    return [found.get(key, 0) for key in keys]
+
+
+def collection_key(collection, user_id):
+    return f'collection:{collection}:{user_id}'
+
+
+def bump(key):
+    rows = DataVersion.objects.filter(key=key)
+    if rows.update(version=F('version') + 1):
+        return
+
+    try:
+        with db_transaction.atomic():
+            DataVersion.objects.create(key=key, version=1)
+    except IntegrityError:
+        rows.update(version=F('version') + 1)
+
+
+def bump_many(keys):
+    """Bump every key in `keys`, with one UPDATE once they all exist"""
+    keys = sorted(set(keys))
+    if not keys:
+        return
+
+    rows = DataVersion.objects.filter(key__in=keys)
+    if rows.update(version=F('version') + 1) < len(keys):
+        # Some keys have no row yet. A version only has to go up, so
+        # bumping the others a second time is harmless.
+        for key in keys:
+            bump(key)
+
+
+def bump_user_collections(user_ids, collections):
+    """Bump each of `collections` for every user in `user_ids`"""
+    bump_many(collection_key(collection, user_id)
+              for user_id in set(user_ids) - {None}
+              for collection in collections)
@@ -0,0 +1,142 @@
+"""
+Routing of read-only API requests to replica databases.
+
+ReplicaRouter sends every write to `default`. Reads go to `default` too,
+unless the request is a list or retrieve served by a ReplicaReadMixin
+view. Those requests read from one of REPLICA_DATABASES, chosen at
+random per request.
+
+Replicas lag the primary. A user who wrote is therefore pinned to the
+primary for REPLICA_PIN_SECONDS, so they read their own writes. The pin
+travels with the client as a signed cookie naming the user, set on the
+response to the write and valid for REPLICA_PIN_SECONDS, so it holds on
+any worker without a shared store or an extra query. Clients that drop
+cookies may read a replica that has not caught up with their write.
+"""
+import contextvars
+import random
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from django.conf import settings
+
+_current = contextvars.ContextVar('replica_routing', default=None)
+
+PIN_COOKIE = 'replica_pin'
+PIN_SALT = 'dimewise.replicas.pin'
+
+
+class RequestRouting:
+
+    def __init__(self, pinned_user_id=None):
+        self.replica = None
+        self.wrote = False
+        self.pinned_user_id = pinned_user_id
+
+
+def pinned_user_id(request):
+    """Return the id of the user the request's pin cookie names, if valid"""
+    value = request.get_signed_cookie(
+        PIN_COOKIE, default=None, salt=PIN_SALT,
+        max_age=settings.REPLICA_PIN_SECONDS)
+    return int(value) if value is not None and value.isdigit() else None
+
+
+def pin(response, user):
+    response.set_signed_cookie(
+        PIN_COOKIE, str(user.pk), salt=PIN_SALT,
+        max_age=settings.REPLICA_PIN_SECONDS, httponly=True, samesite='Lax')
+
+
+def read_from_replica(user):
+    """
+    Send the rest of the current request's reads to a replica, unless
+    there are none or `user` wrote recently. Returns the alias chosen.
+    """
+    routing = _current.get()
+    replicas = settings.REPLICA_DATABASES
+    if (routing is None or not replicas or routing.wrote
+            or routing.pinned_user_id == user.pk):
+        return None
+
+    routing.replica = random.choice(replicas)
+    return routing.replica
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        routing = _current.get()
+        return routing.replica if routing is not None else None
+
+    def db_for_write(self, model, **hints):
+        routing = _current.get()
+        if routing is not None:
+            # Reads after a write in the same request must see it.
+            routing.wrote = True
+            routing.replica = None
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        if db in settings.REPLICA_DATABASES:
+            return False
+        return None
+
+
+class ReplicaMiddleware:
+    """
+    Track each request's routing and pin users who wrote to the primary.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        routing = RequestRouting(pinned_user_id(request))
+        token = _current.set(routing)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.pin_writer(request, response, routing)
+        return response
+
+    async def __acall__(self, request):
+        routing = RequestRouting(pinned_user_id(request))
+        token = _current.set(routing)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.pin_writer(request, response, routing)
+        return response
+
+    def pin_writer(self, request, response, routing):
+        # DRF stores the user it authenticated on the Django request.
+        user = getattr(request, 'user', None)
+        if routing.wrote and user is not None and user.is_authenticated:
+            pin(response, user)
+
+
+class ReplicaReadMixin:
+    """
+    Serve `replica_actions` of a view set from a replica once the request
+    is authenticated.
+    """
+    replica_actions = ('list', 'retrieve')
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if self.action in self.replica_actions:
+            read_from_replica(request.user)
@@ -0,0 +1,11 @@
+"""
+Responses for the project's plain Django async views.
+"""
+from django.http import JsonResponse
+
+from rest_framework.utils.encoders import JSONEncoder
+
+
+def json_response(data, status=200):
+    """Render `data` as JSON with DRF's encoder, as its renderer would"""
+    return JsonResponse(data, status=status, safe=False, encoder=JSONEncoder)
@@ -0,0 +1,87 @@
+"""
+OpenAPI schema view that is generated once instead of on every request.
+"""
+import hashlib
+import json
+import threading
+
+import yaml
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils import translation
+from django.utils.http import parse_etags, quote_etag
+
+from drf_spectacular.views import SpectacularAPIView
+
+
+class CachedSpectacularAPIView(SpectacularAPIView):
+    """
+    Serve the schema from memory with an ETag.
+
+    The schema is read from OPENAPI_SCHEMA_FILE when that is set, as written
+    at deploy time by `manage.py spectacular --file`, and generated on the
+    first request otherwise. Each rendering is kept for the life of the
+    process, so the cache is only invalidated by a deploy or restart.
+    """
+    _schemas = {}
+    _responses = {}
+    _lock = threading.Lock()
+
+    def _get_schema_response(self, request):
+        version = (self.api_version or request.version
+                   or self._get_version_parameter(request))
+        key = (version, translation.get_language(),
+               request.accepted_media_type)
+
+        cached = self._responses.get(key)
+        if cached is None:
+            with self._lock:
+                cached = self._responses.get(key)
+                if cached is None:
+                    cached = self._render(request, version)
+                    self._responses[key] = cached
+        body, content_type, etag = cached
+
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(body, content_type=content_type)
+            response['Content-Disposition'] = (
+                f'inline; filename="{self._get_filename(request, version)}"')
+        response['ETag'] = etag
+        return response
+
+    def _render(self, request, version):
+        schema_key = (version, translation.get_language())
+        schema = self._schemas.get(schema_key)
+        if schema is None:
+            schema = self._load_schema(request, version)
+            self._schemas[schema_key] = schema
+
+        renderer = request.accepted_renderer
+        body = renderer.render(schema, request.accepted_media_type,
+                               self.get_renderer_context())
+        content_type = request.accepted_media_type
+        if renderer.charset:
+            content_type = f'{content_type}; charset={renderer.charset}'
+        etag = quote_etag(hashlib.sha256(body).hexdigest()[:32])
+        return body, content_type, etag
+
+    def _load_schema(self, request, version):
+        schema_file = getattr(settings, 'OPENAPI_SCHEMA_FILE', None)
+        if schema_file:
+            with open(schema_file, 'rb') as stream:
+                if str(schema_file).endswith('.json'):
+                    return json.load(stream)
+                return yaml.safe_load(stream)
+
+        generator = self.generator_class(
+            urlconf=self.urlconf, api_version=version, patterns=self.patterns)
+        return generator.get_schema(request=request, public=self.serve_public)
+
+    @classmethod
+    def clear_cache(cls):
+        with cls._lock:
+            cls._schemas.clear()
+            cls._responses.clear()
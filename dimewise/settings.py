@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -38,6 +39,8 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'rest_framework',
+    'django_filters',
+    'core',
     'transactions',
     'users',
     'drf_spectacular',
@@ -45,6 +48,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'dimewise.timing.ServerTimingMiddleware',
+    'dimewise.replicas.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -78,13 +83,60 @@ WSGI_APPLICATION = 'dimewise.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
 
-DATABASES = {
+SQLITE_PATH = os.environ.get('SQLITE_PATH', BASE_DIR / 'db.sqlite3')
+
+# Select with DATABASE_PROFILE. `production` keeps each worker's connection
+# open across requests and runs SQLite in WAL mode, where readers do not
+# block on a writer and commits only sync the log at checkpoints.
+# Transactions begin IMMEDIATE so a writer waits for the write lock up to
+# busy_timeout when it starts, instead of failing with "database is locked"
+# when a read transaction tries to upgrade.
+DATABASE_PROFILES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+        'NAME': SQLITE_PATH,
+    },
+    'production': {
+        'ENGINE': 'dimewise.sqlite',
+        'NAME': SQLITE_PATH,
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'transaction_mode': 'IMMEDIATE',
+            'pragmas': {
+                'busy_timeout': 5000,
+                'journal_mode': 'WAL',
+                'synchronous': 'NORMAL',
+                'cache_size': -64000,  # KiB
+                'mmap_size': 268435456,
+                'temp_store': 'MEMORY',
+            },
+        },
+    },
+}
+
+DATABASES = {
+    'default': DATABASE_PROFILES[os.environ.get('DATABASE_PROFILE',
+                                                'default')],
 }
 
+# Read replicas of the default database, given as comma separated SQLite
+# paths kept in sync with it externally. List and retrieve requests read
+# from them through dimewise.replicas.ReplicaRouter; a user who wrote
+# reads from the primary for REPLICA_PIN_SECONDS. In tests the replicas
+# mirror `default`.
+REPLICA_DATABASES = []
+for number, path in enumerate(
+        filter(None, os.environ.get('SQLITE_REPLICA_PATHS', '').split(',')),
+        start=1):
+    alias = f'replica{number}'
+    DATABASES[alias] = {**DATABASES['default'], 'NAME': path,
+                        'TEST': {'MIRROR': 'default'}}
+    REPLICA_DATABASES.append(alias)
+
+DATABASE_ROUTERS = ['dimewise.replicas.ReplicaRouter']
+REPLICA_PIN_SECONDS = 5
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
@@ -105,6 +157,32 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Password hashers, chosen by PASSWORD_HASHER_PROFILE. The first hasher of
+# a profile hashes new passwords; the others only check existing hashes.
+# After a switch of profile, or a Django upgrade that raises the work
+# factor, each user's hash is upgraded when they next log in, through
+# either token view.
+PASSWORD_HASHER_PROFILES = {
+    'pbkdf2': [
+        'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+        'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+        'django.contrib.auth.hashers.ScryptPasswordHasher',
+    ],
+    'scrypt': [
+        'django.contrib.auth.hashers.ScryptPasswordHasher',
+        'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+        'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    ],
+}
+PASSWORD_HASHERS = PASSWORD_HASHER_PROFILES[
+    os.environ.get('PASSWORD_HASHER_PROFILE', 'pbkdf2')]
+
+# Threads the async user views hash passwords on, and how many more hashes
+# may wait for one before they answer 503.
+PASSWORD_HASHING_WORKERS = int(os.environ.get('PASSWORD_HASHING_WORKERS',
+                                              os.cpu_count() or 1))
+PASSWORD_HASHING_QUEUE = 32
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.0/topics/i18n/
 
@@ -132,6 +210,24 @@ AUTH_USER_MODEL = 'users.User'
 REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.CachedJWTAuthentication',
     ),
 }
+
+# Currency of new accounts and users' base currency for reports.
+DEFAULT_CURRENCY = 'USD'
+
+# Seconds a worker trusts its cached transaction types and categories
+# before checking their DataVersion counter again.
+REFERENCE_CACHE_CHECK_INTERVAL = 1.0
+
+# Lifetime in seconds and maximum size of each worker's cache of
+# authenticated users, and how often in seconds an entry is checked
+# against the user's row and version.
+USER_CACHE_TTL = 60
+USER_CACHE_SIZE = 10000
+USER_CACHE_CHECK_INTERVAL = 1.0
+
+# Pre-generated OpenAPI schema (`manage.py spectacular --file ...`) served by
+# /api/schema/. When unset the schema is generated once per process.
+OPENAPI_SCHEMA_FILE = os.environ.get('OPENAPI_SCHEMA_FILE')
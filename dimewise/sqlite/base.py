@@ -0,0 +1,43 @@
+"""
+SQLite backend that applies PRAGMAs to every new connection and can begin
+transactions IMMEDIATE or EXCLUSIVE.
+
+Configured through OPTIONS, next to the sqlite3.connect() arguments:
+
+    'pragmas': {'journal_mode': 'WAL', 'busy_timeout': 5000, ...}
+    'transaction_mode': 'DEFERRED', 'IMMEDIATE' or 'EXCLUSIVE'
+
+Pragmas are applied in the order given, so busy_timeout should come before
+pragmas such as journal_mode that need a lock.
+"""
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base
+
+TRANSACTION_MODES = ('DEFERRED', 'IMMEDIATE', 'EXCLUSIVE')
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        self.pragmas = params.pop('pragmas', {})
+        self.transaction_mode = params.pop('transaction_mode', None)
+        if self.transaction_mode is not None:
+            self.transaction_mode = self.transaction_mode.upper()
+            if self.transaction_mode not in TRANSACTION_MODES:
+                raise ImproperlyConfigured(
+                    f'transaction_mode must be one of '
+                    f'{", ".join(TRANSACTION_MODES)}.')
+        return params
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        if self.transaction_mode is None:
+            super()._start_transaction_under_autocommit()
+        else:
+            self.cursor().execute(f'BEGIN {self.transaction_mode}')
@@ -0,0 +1,155 @@
+"""
+Tests for routing reads to replica databases
+"""
+import datetime
+import os
+import sqlite3
+import tempfile
+
+from asgiref.sync import async_to_sync
+
+from django.contrib.auth import get_user_model
+from django.db import connections
+from django.test import AsyncClient, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from dimewise.replicas import PIN_COOKIE
+from transactions.models import Account, Category, Transaction, TransactionType
+from users.authentication import user_cache
+
+REPLICA = 'replica_test'
+CATEGORIES_URL = reverse('category-list')
+
+
+def category_url(pk):
+    return reverse('category-detail', args=[pk])
+
+
+def create_user(**params):
+    return get_user_model().objects.create_user(**params)
+
+
+@override_settings(REPLICA_DATABASES=[REPLICA])
+class ReplicaRoutingTests(TransactionTestCase):
+    """Test list and retrieve reads go to a replica file copy"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Registered after the test case set up its database guards, which
+        # only allow `databases`, and removed before it takes them down.
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.replica_path = os.path.join(cls.directory.name, 'replica.sqlite3')
+        connections.settings[REPLICA] = connections.configure_settings({
+            'default': connections.settings['default'],
+            REPLICA: {'ENGINE': 'django.db.backends.sqlite3',
+                      'NAME': cls.replica_path},
+        })[REPLICA]
+
+    @classmethod
+    def tearDownClass(cls):
+        connections[REPLICA].close()
+        del connections[REPLICA]
+        del connections.settings[REPLICA]
+        cls.directory.cleanup()
+        super().tearDownClass()
+
+    def setUp(self):
+        user_cache.clear()
+        self.user = create_user(email='test@example.com', password='pass1234')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.transaction_type = TransactionType.objects.create(name='Expense')
+        self.category = Category.objects.create(
+            name='Food', user=self.user,
+            transaction_type=self.transaction_type)
+        self.account = Account.objects.create(
+            name='Cash', account_type='CSH', balance=0, user=self.user)
+        self.copy_to_replica()
+
+        # The primary moves on; the replica has not caught up.
+        Category.objects.filter(pk=self.category.pk).update(name='Groceries')
+
+    def copy_to_replica(self):
+        connections['default'].ensure_connection()
+        replica = sqlite3.connect(self.replica_path)
+        connections['default'].connection.backup(replica)
+        replica.close()
+
+    def category_names(self):
+        res = self.client.get(CATEGORIES_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [category['name'] for category in res.data]
+
+    def test_list_and_retrieve_read_replica(self):
+        """Test list and retrieve return the replica's rows"""
+        self.assertEqual(self.category_names(), ['Food'])
+        res = self.client.get(category_url(self.category.pk))
+        self.assertEqual(res.data['name'], 'Food')
+
+    def test_async_list_reads_replica(self):
+        """Test the async views read from the replica"""
+        res = async_to_sync(AsyncClient().get)(
+            reverse('async-category-list'), headers={
+                'Authorization': f'Bearer {AccessToken.for_user(self.user)}'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([row['name'] for row in res.json()], ['Food'])
+
+    def test_writes_go_to_primary(self):
+        """Test a create is written to the primary only"""
+        res = self.client.post(reverse('transaction-list'), {
+            'transaction_type': self.transaction_type.pk,
+            'category': self.category.pk, 'account': self.account.pk,
+            'amount': '1.00', 'date': '2024-01-01'})
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(Transaction.objects.using('default').filter(
+            pk=res.data['id']).exists())
+        self.assertFalse(Transaction.objects.using(REPLICA).filter(
+            pk=res.data['id']).exists())
+
+    def test_writer_reads_own_writes(self):
+        """Test a user who wrote reads from the primary until the pin ends"""
+        res = self.client.patch(category_url(self.category.pk),
+                                {'name': 'Renamed'})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        self.assertEqual(self.category_names(), ['Renamed'])
+
+        other = create_user(email='other@example.com', password='pass1234')
+        Category.objects.create(name='Rent', user=other,
+                                transaction_type=self.transaction_type)
+        self.client.force_authenticate(other)
+        self.assertEqual(self.category_names(), [])
+
+        del self.client.cookies[PIN_COOKIE]  # The pin expires.
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.category_names(), ['Food'])
+
+    def test_forged_pin_ignored(self):
+        """Test an unsigned pin cookie does not keep reads on the primary"""
+        self.client.cookies[PIN_COOKIE] = str(self.user.pk)
+
+        self.assertEqual(self.category_names(), ['Food'])
+
+    def test_other_actions_read_primary(self):
+        """Test actions other than list and retrieve read from the primary"""
+        Transaction.objects.create(
+            user=self.user, transaction_type=self.transaction_type,
+            category=self.category, account=self.account, amount=1,
+            date=datetime.date(2024, 1, 1), description='Coffee')
+
+        res = self.client.get(reverse('transaction-search'), {'q': 'coffee'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data), 1)
+
+    @override_settings(REPLICA_DATABASES=[])
+    def test_without_replicas_reads_primary(self):
+        """Test reads stay on the primary when no replica is configured"""
+        self.assertEqual(self.category_names(), ['Groceries'])
@@ -0,0 +1,73 @@
+"""
+Tests for the cached OpenAPI schema view
+"""
+import json
+import tempfile
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from drf_spectacular.generators import SchemaGenerator
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from dimewise.schema import CachedSpectacularAPIView
+
+SCHEMA_URL = reverse('api-schema')
+JSON_MEDIA_TYPE = 'application/vnd.oai.openapi+json'
+
+
+class CachedSchemaTests(TestCase):
+    """Test serving the schema from memory"""
+
+    def setUp(self):
+        CachedSpectacularAPIView.clear_cache()
+        self.client = APIClient()
+
+    def test_schema_generated_once(self):
+        """Test repeat requests reuse the generated schema"""
+        with mock.patch.object(SchemaGenerator, 'get_schema',
+                               autospec=True,
+                               side_effect=SchemaGenerator.get_schema) as gen:
+            first = self.client.get(SCHEMA_URL)
+            second = self.client.get(SCHEMA_URL)
+
+        self.assertEqual(gen.call_count, 1)
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertEqual(first.content, second.content)
+        self.assertIn(b'/api/transactions/', first.content)
+
+    def test_etag_not_modified(self):
+        """Test a matching If-None-Match gets a 304 with no body"""
+        etag = self.client.get(SCHEMA_URL)['ETag']
+
+        res = self.client.get(SCHEMA_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res.content, b'')
+        self.assertEqual(res['ETag'], etag)
+
+    def test_formats_cached_separately(self):
+        """Test JSON and YAML renderings have their own body and ETag"""
+        yaml_res = self.client.get(SCHEMA_URL)
+        json_res = self.client.get(SCHEMA_URL, HTTP_ACCEPT=JSON_MEDIA_TYPE)
+
+        self.assertTrue(json_res['Content-Type'].startswith(JSON_MEDIA_TYPE))
+        self.assertIn('openapi', json.loads(json_res.content))
+        self.assertNotEqual(yaml_res['ETag'], json_res['ETag'])
+
+    def test_schema_served_from_file(self):
+        """Test a pre-generated schema file is served without generating"""
+        schema = {'openapi': '3.0.3', 'info': {'title': 'Prebuilt'},
+                  'paths': {}}
+        with tempfile.NamedTemporaryFile('w', suffix='.json') as schema_file:
+            json.dump(schema, schema_file)
+            schema_file.flush()
+
+            with override_settings(OPENAPI_SCHEMA_FILE=schema_file.name), \
+                    mock.patch.object(SchemaGenerator, 'get_schema') as gen:
+                res = self.client.get(SCHEMA_URL, HTTP_ACCEPT=JSON_MEDIA_TYPE)
+
+        gen.assert_not_called()
+        self.assertEqual(json.loads(res.content)['info']['title'], 'Prebuilt')
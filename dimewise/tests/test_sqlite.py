@@ -0,0 +1,70 @@
+"""
+Tests for the tuned SQLite backend used by the production profile
+"""
+import os
+import sqlite3
+import tempfile
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db.utils import ConnectionHandler
+from django.test import SimpleTestCase
+
+
+def open_connection(path, **overrides):
+    profile = {**settings.DATABASE_PROFILES['production'], 'NAME': path,
+               **overrides}
+    return ConnectionHandler({'default': profile})['default']
+
+
+class ProductionSQLiteTests(SimpleTestCase):
+    """Test the production database profile"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'db.sqlite3')
+        self.connection = open_connection(self.path)
+        self.addCleanup(self.connection.close)
+
+    def pragma(self, name):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_pragmas_applied(self):
+        """Test every new connection gets the configured pragmas"""
+        self.assertEqual(self.pragma('journal_mode'), 'wal')
+        self.assertEqual(self.pragma('synchronous'), 1)  # NORMAL
+        self.assertEqual(self.pragma('cache_size'), -64000)
+        self.assertEqual(self.pragma('mmap_size'), 268435456)
+        self.assertEqual(self.pragma('busy_timeout'), 5000)
+        self.assertEqual(self.pragma('foreign_keys'), 1)
+
+    def test_transactions_begin_immediate(self):
+        """Test an atomic block takes the write lock when it starts"""
+        self.connection.ensure_connection()
+        other = sqlite3.connect(self.path, timeout=0, isolation_level=None)
+        self.addCleanup(other.close)
+
+        # What transaction.atomic() does to open a transaction on SQLite.
+        self.connection.set_autocommit(
+            False, force_begin_transaction_with_broken_autocommit=True)
+        try:
+            with self.assertRaisesMessage(sqlite3.OperationalError,
+                                          'database is locked'):
+                other.execute('BEGIN IMMEDIATE')
+        finally:
+            self.connection.rollback()
+            self.connection.set_autocommit(True)
+
+        other.execute('BEGIN IMMEDIATE')
+        other.execute('ROLLBACK')
+
+    def test_invalid_transaction_mode(self):
+        """Test an unknown transaction mode is rejected"""
+        connection = open_connection(self.path, OPTIONS={
+            'transaction_mode': 'EAGER'})
+
+        with self.assertRaises(ImproperlyConfigured):
+            connection.ensure_connection()
@@ -0,0 +1,146 @@
+"""
+Tests for the Server-Timing middleware and the route timings endpoint
+"""
+import re
+
+from asgiref.sync import async_to_sync
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import AsyncClient, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import serializers, status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from dimewise.timing import RequestTimings, RouteHistograms, route_histograms
+from transactions.models import Category, TransactionType
+from users.authentication import user_cache
+
+TIMINGS_URL = reverse('route-timings')
+CATEGORIES_URL = reverse('category-list')
+METRIC = re.compile(r'(\w+);(?:desc="(\d+) queries";)?dur=([\d.]+)')
+
+
+def create_user(**params):
+    return get_user_model().objects.create_user(**params)
+
+
+def parse_server_timing(response):
+    return {name: (float(duration), int(queries) if queries else None)
+            for name, queries, duration
+            in METRIC.findall(response['Server-Timing'])}
+
+
+class ServerTimingTests(TestCase):
+    """Test per-request timings"""
+
+    def setUp(self):
+        user_cache.clear()
+        route_histograms.clear()
+        self.user = create_user(email='test@example.com', password='pass1234')
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+        Category.objects.create(
+            name='Food', user=self.user,
+            transaction_type=TransactionType.objects.create(name='Expense'))
+
+    def test_header_reports_request(self):
+        """Test the header has every metric and the real query count"""
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(CATEGORIES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        metrics = parse_server_timing(res)
+        self.assertEqual(set(metrics), {'db', 'serializer', 'auth', 'total'})
+        self.assertEqual(metrics['db'][1], len(queries))
+        self.assertGreater(metrics['auth'][0] + metrics['total'][0], 0)
+        self.assertLessEqual(metrics['db'][0], metrics['total'][0])
+
+    def test_serializer_time_without_patching(self):
+        """Test list rendering is timed while DRF's classes are untouched"""
+        food = Category.objects.get(user=self.user)
+        Category.objects.bulk_create(
+            Category(name=f'Category {i}', user=self.user,
+                     transaction_type_id=food.transaction_type_id)
+            for i in range(300))
+
+        res = self.client.get(CATEGORIES_URL)
+
+        self.assertGreater(parse_server_timing(res)['serializer'][0], 0)
+        self.assertEqual(serializers.BaseSerializer.data.fget.__module__,
+                         'rest_framework.serializers')
+
+    def test_async_view_reports_queries(self):
+        """Test queries run by async views in worker threads are counted"""
+        res = async_to_sync(AsyncClient().get)(
+            reverse('async-category-list'), headers={
+                'Authorization': f'Bearer {AccessToken.for_user(self.user)}'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertGreater(parse_server_timing(res)['db'][1], 0)
+
+    def test_requests_recorded_per_route(self):
+        """Test each request is added to its route's histogram"""
+        for _ in range(3):
+            self.client.get(CATEGORIES_URL)
+        self.client.get('/api/no-such-route/')
+
+        routes = route_histograms.snapshot()
+        self.assertEqual(routes['GET category-list']['count'], 3)
+        self.assertEqual(
+            sum(routes['GET category-list']['buckets'].values()), 3)
+        self.assertEqual(routes['GET <unresolved>']['count'], 1)
+
+
+class RouteHistogramsTests(TestCase):
+    """Test aggregating timings"""
+
+    def test_quantiles_from_buckets(self):
+        """Test p50 and p95 are the bounds of the buckets they fall in"""
+        histograms = RouteHistograms()
+        timings = RequestTimings()
+        for total in [0.0015] * 18 + [0.3] * 2:
+            histograms.record('GET route', timings, total)
+
+        stats = histograms.snapshot()['GET route']
+        self.assertEqual(stats['p50_ms'], 2)
+        self.assertEqual(stats['p95_ms'], 500)
+        self.assertEqual(stats['buckets']['le_2'], 18)
+        self.assertEqual(stats['buckets']['le_500'], 2)
+
+
+class RouteTimingsEndpointTests(TestCase):
+    """Test the admin-only timings endpoint"""
+
+    def setUp(self):
+        route_histograms.clear()
+        self.client = APIClient()
+
+    def test_requires_admin(self):
+        """Test regular users cannot read the timings"""
+        self.client.force_authenticate(
+            create_user(email='user@example.com', password='pass1234'))
+
+        res = self.client.get(TIMINGS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_admin_reads_and_resets(self):
+        """Test staff can read and clear the histograms"""
+        admin = create_user(email='admin@example.com', password='pass1234',
+                            is_staff=True)
+        self.client.force_authenticate(admin)
+        self.client.get(TIMINGS_URL)
+
+        res = self.client.get(TIMINGS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['routes']['GET route-timings']['count'], 1)
+
+        self.client.delete(TIMINGS_URL)
+        self.assertEqual(list(route_histograms.snapshot()),
+                         ['DELETE route-timings'])
@@ -0,0 +1,231 @@
+"""
+Per-request timings reported in a Server-Timing header and aggregated
+into per-route histograms.
+
+ServerTimingMiddleware opens a RequestTimings for each request in a
+context variable, which sync_to_async and async_to_sync carry across
+threads, so work done for the request anywhere adds to it:
+
+    db          SQL statements run and their time, through an execute
+                wrapper installed on every database connection
+    serializer  time serializers with TimedSerializerMixin spend rendering
+                objects, and `span('serializer')` blocks such as the
+                values_list() fast path
+    auth        `span('auth')` blocks in the authentication classes
+    total       time until the view returned its response
+
+The span times are inclusive, so serializer time contains the SQL that
+lazy querysets run while serializing. Streaming bodies are produced after
+the header is sent and are only in the histograms' total.
+"""
+import bisect
+import contextlib
+import contextvars
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+# Upper bounds in milliseconds of the total time histogram buckets; a
+# last bucket counts everything slower.
+BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+SPANS = ('db', 'serializer', 'auth')
+
+_current = contextvars.ContextVar('request_timings', default=None)
+
+
+class RequestTimings:
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.queries = 0
+        self.durations = dict.fromkeys(SPANS, 0.0)
+        self._depth = dict.fromkeys(SPANS, 0)
+
+    def total(self):
+        return time.perf_counter() - self.start
+
+    def header(self, total):
+        return ', '.join([
+            f'db;desc="{self.queries} queries";'
+            f'dur={self.durations["db"] * 1000:.1f}',
+            *(f'{name};dur={self.durations[name] * 1000:.1f}'
+              for name in SPANS[1:]),
+            f'total;dur={total * 1000:.1f}',
+        ])
+
+
+@contextlib.contextmanager
+def span(name):
+    """
+    Add the time spent in the block to the current request's `name` span.
+    Nested blocks of the same span are only counted once.
+    """
+    timings = _current.get()
+    if timings is None or timings._depth[name]:
+        yield
+        return
+
+    timings._depth[name] += 1
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.durations[name] += time.perf_counter() - start
+        timings._depth[name] -= 1
+
+
+def _count_queries(execute, sql, params, many, context):
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+
+    timings.queries += 1
+    with span('db'):
+        return execute(sql, params, many, context)
+
+
+def _install_query_counter(connection, **kwargs):
+    if _count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_count_queries)
+
+
+def install():
+    """Instrument database connections, once per process"""
+    connection_created.connect(_install_query_counter)
+    # Connections opened before this ran.
+    for connection in connections.all(initialized_only=True):
+        _install_query_counter(connection)
+
+
+class TimedSerializerMixin:
+    """
+    Add the time a serializer spends rendering objects to the current
+    request's `serializer` span. A `many=True` list renders each object
+    through its child, so lists are timed too.
+    """
+
+    def to_representation(self, instance):
+        timings = _current.get()
+        if timings is None or timings._depth['serializer']:
+            return super().to_representation(instance)
+        with span('serializer'):
+            return super().to_representation(instance)
+
+
+class RouteHistograms:
+    """
+    Thread-safe per-process histograms of request totals, and sums of the
+    other timings, keyed by method and URL name.
+    """
+
+    def __init__(self):
+        self._routes = {}
+        self._lock = threading.Lock()
+
+    def record(self, route, timings, total):
+        with self._lock:
+            stats = self._routes.get(route)
+            if stats is None:
+                stats = self._routes[route] = {
+                    'count': 0, 'total_ms': 0.0, 'queries': 0,
+                    **{f'{name}_ms': 0.0 for name in SPANS},
+                    'buckets': [0] * (len(BUCKETS) + 1),
+                }
+
+            stats['count'] += 1
+            stats['total_ms'] += total * 1000
+            stats['queries'] += timings.queries
+            for name in SPANS:
+                stats[f'{name}_ms'] += timings.durations[name] * 1000
+            stats['buckets'][bisect.bisect_left(BUCKETS, total * 1000)] += 1
+
+    def snapshot(self):
+        with self._lock:
+            routes = {route: {**stats, 'buckets': list(stats['buckets'])}
+                      for route, stats in self._routes.items()}
+
+        return {route: self._summary(stats)
+                for route, stats in sorted(routes.items())}
+
+    def _summary(self, stats):
+        count = stats['count']
+        return {
+            'count': count,
+            'mean_ms': {name: round(stats[f'{name}_ms'] / count, 3)
+                        for name in ('total', *SPANS)},
+            'mean_queries': round(stats['queries'] / count, 2),
+            'p50_ms': self._quantile(stats['buckets'], count, 0.5),
+            'p95_ms': self._quantile(stats['buckets'], count, 0.95),
+            'buckets': {
+                (f'le_{bound}' if index < len(BUCKETS) else 'inf'): hits
+                for index, (bound, hits) in enumerate(
+                    zip((*BUCKETS, None), stats['buckets']))
+            },
+        }
+
+    def _quantile(self, buckets, count, quantile):
+        """Upper bound of the bucket holding the quantile, None past the last"""
+        seen = 0
+        for bound, hits in zip(BUCKETS, buckets):
+            seen += hits
+            if seen >= quantile * count:
+                return bound
+        return None
+
+    def clear(self):
+        with self._lock:
+            self._routes.clear()
+
+
+route_histograms = RouteHistograms()
+
+
+class ServerTimingMiddleware:
+    """
+    Time each request, add a Server-Timing header to the response and
+    record the request in `route_histograms`. Listed first in MIDDLEWARE
+    so that the total covers the other middleware.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        install()
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        timings = RequestTimings()
+        token = _current.set(timings)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, timings)
+
+    async def __acall__(self, request):
+        timings = RequestTimings()
+        token = _current.set(timings)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, timings)
+
+    def finish(self, request, response, timings):
+        total = timings.total()
+        response['Server-Timing'] = timings.header(total)
+        route_histograms.record(self.route(request), timings, total)
+        return response
+
+    def route(self, request):
+        match = getattr(request, 'resolver_match', None)
+        return f'{request.method} {match.view_name if match else "<unresolved>"}'
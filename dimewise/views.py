@@ -0,0 +1,27 @@
+"""
+Project level API views.
+"""
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from dimewise.timing import BUCKETS, route_histograms
+
+
+class RouteTimingsView(APIView):
+    """
+    Per-route request timings of this process since it started or since
+    the last DELETE. Buckets count requests by total time in milliseconds,
+    and p50/p95 are the upper bounds of the buckets they fall in.
+    """
+    permission_classes = [IsAdminUser]
+    # Operational endpoint, left out of the OpenAPI schema.
+    schema = None
+
+    def get(self, request):
+        return Response({'buckets_ms': BUCKETS,
+                         'routes': route_histograms.snapshot()})
+
+    def delete(self, request):
+        route_histograms.clear()
+        return Response(status=204)
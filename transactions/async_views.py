@@ -0,0 +1,97 @@
+"""
+Async read-only views for the transactions app.
+
+DRF views are synchronous, so these are plain Django async views that
+authenticate with CachedJWTAuthentication, query with the async ORM and
+reuse the DRF serializers on fully loaded rows. Under the ASGI application
+a slow query suspends only its own request instead of holding a worker
+thread.
+"""
+import functools
+
+from rest_framework import exceptions
+from rest_framework.request import Request
+
+from dimewise.replicas import read_from_replica
+from dimewise.responses import json_response
+from users.authentication import CachedJWTAuthentication
+
+from .models import Category, Transaction
+from .pagination import TransactionCursorPagination
+from .recurring import amaterialize_due
+from .serializers import (
+    CategorySerializer,
+    TransactionDetailSerializer,
+    TransactionListSerializer,
+)
+
+
+def async_api_view(view=None, *, materialize=False):
+    """
+    Authenticate the request, allow only GET, read from a replica and
+    render API errors the way DRF does. With `materialize` the user's due
+    recurring transactions are written first, as the sync views do.
+    """
+    if view is None:
+        return functools.partial(async_api_view, materialize=materialize)
+
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        try:
+            if request.method != 'GET':
+                raise exceptions.MethodNotAllowed(request.method)
+
+            authenticated = await CachedJWTAuthentication().aauthenticate(
+                request)
+            if authenticated is None:
+                raise exceptions.NotAuthenticated()
+            request.user = authenticated[0]
+            if materialize:
+                await amaterialize_due(request.user)
+            read_from_replica(request.user)
+
+            return await view(request, *args, **kwargs)
+        except exceptions.APIException as exc:
+            response = json_response({'detail': exc.detail},
+                                     status=exc.status_code)
+            if isinstance(exc, exceptions.NotAuthenticated):
+                response['WWW-Authenticate'] = 'Bearer realm="api"'
+            return response
+
+    return wrapper
+
+
+@async_api_view
+async def category_list(request):
+    categories = Category.objects.filter(user=request.user).order_by('id')
+    data = CategorySerializer(
+        [category async for category in categories], many=True).data
+    return json_response(data)
+
+
+@async_api_view
+async def category_detail(request, pk):
+    try:
+        category = await Category.objects.aget(user=request.user, pk=pk)
+    except Category.DoesNotExist:
+        raise exceptions.NotFound()
+    return json_response(CategorySerializer(category).data)
+
+
+@async_api_view(materialize=True)
+async def transaction_list(request):
+    paginator = TransactionCursorPagination()
+    queryset = Transaction.objects.for_user(request.user).with_related()
+    page = await paginator.apaginate_queryset(queryset, Request(request))
+    data = TransactionListSerializer(page, many=True).data
+    return json_response(paginator.get_paginated_response(data).data)
+
+
+@async_api_view
+async def transaction_detail(request, pk):
+    queryset = Transaction.objects.for_user(request.user).with_related()
+    try:
+        transaction = await queryset.aget(pk=pk)
+    except Transaction.DoesNotExist:
+        raise exceptions.NotFound()
+    return json_response(TransactionDetailSerializer(transaction).data)
@@ -0,0 +1,128 @@
+"""
+Running spend counters of budgets and their threshold alerts.
+
+Budget.spent is adjusted on every transaction write, in the same database
+transaction, so whether a user is over budget is a single-row read rather
+than a sum over the period's transactions.
+
+Each adjusted budget is read back after its UPDATE. The UPDATE holds the
+row's write lock until the transaction ends, so the value read is the one
+our delta produced and the value before it is that minus our delta.
+Concurrent writers take turns on the row, and only the one whose delta
+takes spent from below a threshold to or past it sees the crossing. It
+records a BudgetAlert in the same transaction and sends
+budget_threshold_crossed once that transaction commits, so a rolled back
+write alerts no one. Spending that drops back below a threshold arms it
+for the next crossing.
+
+A budget is in one currency and only spending from accounts in that
+currency counts towards it, so amounts in different currencies are never
+added together.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction as db_transaction
+from django.db.models import F
+from django.dispatch import Signal
+
+from .cache import get_transaction_types
+from .ledger import account_currencies, signed_amount
+from .models import Budget, BudgetAlert
+
+# Sent with `budget` and `alert` after the write that crossed commits.
+budget_threshold_crossed = Signal()
+
+
+def spend_deltas(added=(), removed=(), currencies=None):
+    """
+    Return {(category_id, currency, date): delta} for the transactions
+    being added and removed, each given as a dict of tracked values. Expenses add to
+    spending and income, such as a refund, takes from it: the opposite of
+    their effect on an account's balance. `currencies` maps their account
+    ids to currencies, looked up if None.
+    """
+    postings = ([(values, 1) for values in added if values]
+                + [(values, -1) for values in removed if values])
+    types = get_transaction_types(require={
+        values['transaction_type_id'] for values, _ in postings})
+    if currencies is None:
+        currencies = account_currencies(
+            values['account_id'] for values, _ in postings)
+
+    deltas = defaultdict(Decimal)
+    for values, direction in postings:
+        transaction_type = types.get(values['transaction_type_id'])
+        key = (values['category_id'], currencies.get(values['account_id']),
+               values['date'])
+        deltas[key] -= (
+            direction * signed_amount(
+                Decimal(str(values['amount'])),
+                transaction_type is not None and transaction_type.is_expense))
+    return {key: delta for key, delta in deltas.items() if delta}
+
+
+def budget_deltas(deltas):
+    """Return {budget_id: delta} for the budgets covering `deltas`"""
+    if not deltas:
+        return {}
+
+    dates = [date for _, _, date in deltas]
+    budgets = Budget.objects.filter(
+        category_id__in={category_id for category_id, _, _ in deltas},
+        currency__in={currency for _, currency, _ in deltas},
+        start__lte=max(dates), end__gte=min(dates),
+    ).values_list('pk', 'category_id', 'currency', 'start', 'end')
+
+    totals = defaultdict(Decimal)
+    for pk, category_id, currency, start, end in budgets:
+        for (delta_category, delta_currency, date), delta in deltas.items():
+            if (delta_category == category_id and delta_currency == currency
+                    and start <= date <= end):
+                totals[pk] += delta
+    return {pk: delta for pk, delta in totals.items() if delta}
+
+
+def crossed(thresholds, amount, before, after):
+    """Return the thresholds, in percent of `amount`, passed going up"""
+    return [percent for percent in thresholds
+            if before < amount * percent / 100 <= after]
+
+
+def apply_budget_deltas(deltas):
+    for pk, delta in sorted(deltas.items()):
+        Budget.objects.filter(pk=pk).update(spent=F('spent') + delta)
+
+    alerts = []
+    for budget in Budget.objects.filter(pk__in=deltas):
+        before = budget.spent - deltas[budget.pk]
+        alerts.extend(
+            BudgetAlert(budget=budget, percent=percent, spent=budget.spent)
+            for percent in crossed(budget.thresholds, budget.amount, before,
+                                   budget.spent))
+    if not alerts:
+        return alerts
+
+    BudgetAlert.objects.bulk_create(alerts)
+
+    def announce():
+        for alert in alerts:
+            budget_threshold_crossed.send(sender=Budget, budget=alert.budget,
+                                          alert=alert)
+
+    db_transaction.on_commit(announce)
+    return alerts
+
+
+def post(added=(), removed=(), currencies=None):
+    return apply_budget_deltas(
+        budget_deltas(spend_deltas(added, removed, currencies)))
+
+
+def verify(user=None):
+    """Return the ids of budgets whose spent differs from the raw data"""
+    budgets = Budget.objects.all()
+    if user is not None:
+        budgets = budgets.filter(user=user)
+    return [budget.pk for budget in budgets.order_by('pk')
+            if budget.spent != budget.computed_spent()]
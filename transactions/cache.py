@@ -0,0 +1,109 @@
+"""
+Per-process caches of transaction reference data.
+
+TransactionType rows and each user's Category rows change rarely but are
+read on every transaction validation and ledger posting. Each worker keeps
+its own copy and checks the copy against a DataVersion counter, bumped by
+the signal handlers on every save and delete, at most once per
+REFERENCE_CACHE_CHECK_INTERVAL seconds. Workers therefore stay coherent
+without a shared cache service.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.db import transaction as db_transaction
+
+from core import versions
+
+from .models import Category, TransactionType
+
+
+class VersionedCache:
+    """Cache of one kind of data, loaded per scope by `loader(scope)`"""
+
+    def __init__(self, name, loader):
+        self.name = name
+        self.loader = loader
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def version_key(self, scope=None):
+        return self.name if scope is None else f'{self.name}:{scope}'
+
+    def get(self, scope=None, require=()):
+        """
+        Return the data for `scope`. Keys listed in `require` that are
+        missing from our copy force a version check, so rows created by
+        another process are found without waiting out the interval.
+        """
+        interval = getattr(settings, 'REFERENCE_CACHE_CHECK_INTERVAL', 1.0)
+        now = time.monotonic()
+        entry = self._entries.get(scope)
+        fresh = entry is not None and all(key in entry[2] for key in require)
+
+        if fresh and now - entry[1] < interval:
+            return self._hit(entry[2])
+
+        version = versions.get_version(self.version_key(scope))
+        if fresh and entry[0] == version:
+            self._entries[scope] = (version, now, entry[2])
+            return self._hit(entry[2])
+
+        data = self.loader(scope)
+        with self._lock:
+            self.misses += 1
+            self._entries[scope] = (version, now, data)
+        return data
+
+    def invalidate(self, scope=None):
+        """Record a change to `scope` for every process and drop our copy"""
+        versions.bump(self.version_key(scope))
+        self._entries.pop(scope, None)
+        # A reload before commit would pick up the uncommitted version.
+        db_transaction.on_commit(lambda: self._entries.pop(scope, None))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses,
+                'entries': len(self._entries)}
+
+    def _hit(self, data):
+        with self._lock:
+            self.hits += 1
+        return data
+
+
+def _load_transaction_types(scope):
+    return {transaction_type.pk: transaction_type
+            for transaction_type in TransactionType.objects.all()}
+
+
+def _load_categories(user_id):
+    return {category.pk: category
+            for category in Category.objects.filter(user_id=user_id)}
+
+
+transaction_types = VersionedCache('transaction_types', _load_transaction_types)
+categories = VersionedCache('categories', _load_categories)
+
+
+def get_transaction_types(require=()):
+    """Return {id: TransactionType} for every transaction type"""
+    return transaction_types.get(require=require)
+
+
+def get_categories(user_id, require=()):
+    """Return {id: Category} for the user's categories"""
+    return categories.get(user_id, require=require)
+
+
+def stats():
+    return {cache.name: cache.stats()
+            for cache in (transaction_types, categories)}
@@ -0,0 +1,46 @@
+"""
+Categories every new user starts with.
+
+The transaction types they belong to are created once, by migration 0014,
+so a signup only looks them up.
+"""
+from .cache import get_transaction_types
+from .serializers import CategorySerializer
+
+# Transaction type name: category names.
+DEFAULT_CATEGORIES = {
+    'Income': (
+        'Salary', 'Bonus', 'Freelance', 'Business Income', 'Interest',
+        'Dividends', 'Rental Income', 'Refunds', 'Gifts Received',
+        'Other Income',
+    ),
+    'Expense': (
+        'Groceries', 'Dining Out', 'Coffee', 'Rent', 'Mortgage',
+        'Electricity', 'Water', 'Internet', 'Mobile Phone', 'Fuel',
+        'Public Transport', 'Taxi & Rideshare', 'Car Maintenance',
+        'Insurance', 'Health & Medical', 'Pharmacy', 'Fitness', 'Clothing',
+        'Personal Care', 'Household Supplies', 'Entertainment',
+        'Subscriptions', 'Travel', 'Education', 'Childcare', 'Pets',
+        'Gifts & Donations', 'Taxes', 'Bank Fees', 'Other Expenses',
+    ),
+}
+
+
+def seed_default_categories(user):
+    """
+    Create DEFAULT_CATEGORIES for `user` through the bulk category path.
+    Categories of a transaction type that no longer exists are skipped.
+    """
+    types = {}
+    for transaction_type in sorted(get_transaction_types().values(),
+                                   key=lambda type_: type_.pk, reverse=True):
+        types[transaction_type.name] = transaction_type.pk
+
+    serializer = CategorySerializer(data=[
+        {'name': category, 'transaction_type': types[type_name]}
+        for type_name, categories in DEFAULT_CATEGORIES.items()
+        if type_name in types
+        for category in categories
+    ], many=True)
+    serializer.is_valid(raise_exception=True)
+    return serializer.save(user=user)
@@ -0,0 +1,91 @@
+"""
+Sparse fieldsets: `?fields=id,amount,date` narrows both the serialized
+payload and the columns the queryset loads.
+"""
+from rest_framework.exceptions import ValidationError
+
+
+class SparseFieldsSerializerMixin:
+    """
+    Serializer that keeps only the fields named in a `fields` argument.
+    """
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+def model_paths(fields):
+    """
+    Return the (relations, columns) lookups that `fields` read, for use
+    with select_related() and only().
+    """
+    relations, columns = set(), set()
+    for field in fields:
+        if field.source == '*':
+            continue
+
+        path = '__'.join(field.source_attrs)
+        if hasattr(field, 'fields'):
+            relations.add(path)
+            nested_relations, nested_columns = model_paths(
+                field.fields.values())
+            relations.update(f'{path}__{name}' for name in nested_relations)
+            columns.update(f'{path}__{name}' for name in nested_columns)
+        else:
+            columns.add(path)
+            if len(field.source_attrs) > 1:
+                relations.add('__'.join(field.source_attrs[:-1]))
+
+    return relations, columns
+
+
+class SparseFieldsViewMixin:
+    """
+    Apply a `fields` query parameter to the serializer and the queryset of
+    the `sparse_actions`. Columns in `sparse_columns` are always loaded,
+    e.g. those pagination reads.
+    """
+    sparse_actions = ('list', 'retrieve')
+    sparse_columns = ()
+
+    def get_requested_fields(self):
+        if self.action not in self.sparse_actions:
+            return None
+
+        param = self.request.query_params.get('fields')
+        if not param:
+            return None
+
+        requested = [name.strip() for name in param.split(',')
+                     if name.strip()]
+        available = self.get_serializer_class()(
+            context=self.get_serializer_context()).fields
+        unknown = [name for name in requested if name not in available]
+        if unknown:
+            raise ValidationError({'fields': [
+                f'Unknown fields: {", ".join(unknown)}.']})
+        return requested
+
+    def get_serializer(self, *args, **kwargs):
+        fields = self.get_requested_fields()
+        if fields is not None:
+            kwargs.setdefault('fields', fields)
+        return super().get_serializer(*args, **kwargs)
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.action not in self.sparse_actions:
+            return queryset
+
+        serializer = self.get_serializer_class()(
+            context=self.get_serializer_context(),
+            fields=self.get_requested_fields())
+        relations, columns = model_paths(serializer.fields.values())
+
+        queryset = queryset.select_related(None)
+        if relations:
+            queryset = queryset.select_related(*relations)
+        return queryset.only(*columns, *self.sparse_columns)
@@ -0,0 +1,37 @@
+"""
+Filters for the transaction list.
+
+Every filter is combined with the user and the (date DESC, id DESC)
+ordering of keyset pagination, and each combination is served by one of
+the Transaction indexes:
+
+    no filter, date range              transaction_user_date_id_idx
+    amount range and date range        transaction_user_date_id_idx
+    category, with or without dates    transaction_user_cat_date_idx
+    account, with or without dates     transaction_user_acct_date_idx
+    transaction_type, w/ or w/o dates  transaction_user_type_date_idx
+    amount range, without dates        transaction_user_amount_idx
+
+The (user, <relation>, date, id) indexes return rows already in page
+order, so a page stops after page_size + 1 rows. An amount range without
+dates is a range scan of the amount index followed by a sort of the
+matches. When several of these are given SQLite uses one index and
+checks the other conditions against each row it reads.
+tests/test_filters.py asserts these plans.
+"""
+import django_filters
+
+from .models import Transaction
+
+
+class TransactionFilter(django_filters.FilterSet):
+    date = django_filters.DateFromToRangeFilter()
+    amount = django_filters.RangeFilter()
+    category = django_filters.NumberFilter(field_name='category_id')
+    account = django_filters.NumberFilter(field_name='account_id')
+    transaction_type = django_filters.NumberFilter(
+        field_name='transaction_type_id')
+
+    class Meta:
+        model = Transaction
+        fields = ['date', 'amount', 'category', 'account', 'transaction_type']
@@ -0,0 +1,154 @@
+"""
+Currency conversion of whole result sets for reports.
+
+A transaction's amount is in its account's currency. Reports convert each
+amount into the user's base currency at the ExchangeRate in effect on the
+transaction's date, the pair's latest rate on or before it. One converted
+amount is (amount * rate).quantize(Decimal('0.01')), rounding half to
+even as Decimal does by default, and a total is the sum of converted
+amounts.
+
+Conversion runs on NumPy arrays rather than row by row in Python. Rates
+are found for all rows with one searchsorted() per currency. The
+arithmetic is done in integers, amounts in cents and rates in units of
+1e-8, so it gives exactly the Decimal results. Products stay below 2**63
+by multiplying the whole part of a rate separately from its fraction, and
+the fraction by the amount's high and low eight digits in turn.
+"""
+from decimal import Decimal
+
+import numpy as np
+
+from django.db.models import BigIntegerField, F, OuterRef, Q, Subquery
+from django.db.models.functions import Cast, Round
+
+from .models import ExchangeRate
+
+RATE_SCALE = 10 ** 8  # ExchangeRate.rate has 8 decimal places.
+INT64_MAX = np.iinfo(np.int64).max
+
+
+class MissingRate(Exception):
+
+    def __init__(self, currency, quote, date):
+        self.currency = currency
+        self.quote = quote
+        self.date = date
+        super().__init__(f'No {currency}/{quote} exchange rate on or before '
+                         f'{date}.')
+
+
+def load_rates(currencies, quote, start, end):
+    """
+    Return {currency: (dates, rates)} with the rates of each currency into
+    `quote` in effect from `start` to `end`, sorted by date, as
+    datetime64[D] and integer 1e-8 unit arrays. Loaded with one query.
+    """
+    in_effect_at_start = ExchangeRate.objects.filter(
+        currency=OuterRef('currency'), quote=quote, date__lte=start,
+    ).order_by('-date').values('date')[:1]
+    rows = ExchangeRate.objects.filter(
+        Q(date__gt=start) | Q(date=Subquery(in_effect_at_start)),
+        currency__in=set(currencies) - {quote}, quote=quote, date__lte=end,
+    ).order_by('currency', 'date').values_list('currency', 'date', 'rate')
+
+    found = {}
+    for currency, date, rate in rows:
+        dates, units = found.setdefault(currency, ([], []))
+        dates.append(date)
+        units.append(int(rate * RATE_SCALE))
+    return {currency: (np.array(dates, dtype='datetime64[D]'),
+                       np.array(units, dtype=np.int64))
+            for currency, (dates, units) in found.items()}
+
+
+def rate_units(currencies, dates, quote, rates):
+    """
+    Return the rate into `quote` in effect for each row, in 1e-8 units,
+    given rows' currencies and datetime64[D] dates and load_rates()
+    output.
+    """
+    units = np.full(len(currencies), RATE_SCALE, dtype=np.int64)
+    for currency in np.unique(currencies):
+        if currency == quote:
+            continue
+        rows = currencies == currency
+        rate_dates, rate_values = rates.get(
+            currency, (np.array([], dtype='datetime64[D]'), None))
+        index = np.searchsorted(rate_dates, dates[rows], side='right') - 1
+        if (index < 0).any():
+            raise MissingRate(currency, quote,
+                              dates[rows][index < 0].min().item())
+        units[rows] = rate_values[index]
+    return units
+
+
+def multiply_rates(cents, units):
+    """
+    Return cents * units / RATE_SCALE per row, rounded half to even, with
+    exact int64 arithmetic.
+    """
+    sign = np.sign(cents)
+    magnitude = np.abs(cents)
+    whole, fraction = np.divmod(units, RATE_SCALE)
+
+    high, low = np.divmod(magnitude, RATE_SCALE)
+    carried, remainder = np.divmod(low * fraction, RATE_SCALE)
+    converted = magnitude * whole + high * fraction + carried
+    twice = remainder * 2
+    converted += (twice > RATE_SCALE) | (
+        (twice == RATE_SCALE) & (converted % 2 == 1))
+    return sign * converted
+
+
+def group_sums(groups, values, size):
+    """Return the sum of `values` per group index, without overflowing"""
+    bound = int(np.abs(values).max(initial=0)) * len(values)
+    dtype = np.int64 if bound <= INT64_MAX else object
+    sums = np.zeros(size, dtype=dtype)
+    np.add.at(sums, groups, values.astype(dtype))
+    return sums
+
+
+def cents_to_decimal(cents):
+    return Decimal(cents).scaleb(-2)
+
+
+def converted_totals(queryset, quote, group_by):
+    """
+    Return [(key, transaction_type_id, total, count)] for the transactions
+    in `queryset`, with totals converted into cents of `quote`, grouped by
+    the `group_by` field's value or, for 'month', by the first day of the
+    month. Each group is split by transaction type, so income and expenses
+    are never added together.
+    """
+    rows = list(queryset.annotate(
+        cents=Cast(Round(F('amount') * 100), BigIntegerField()),
+    ).values_list(
+        'date' if group_by == 'month' else group_by, 'transaction_type_id',
+        'cents', 'date', 'account__currency',
+    ).order_by())
+    if not rows:
+        return []
+
+    keys, type_ids, cents, dates, currencies = zip(*rows)
+    dates = np.array(dates, dtype='datetime64[D]')
+    currencies = np.array(currencies)
+    rates = load_rates(np.unique(currencies).tolist(), quote,
+                       dates.min().item(), dates.max().item())
+    converted = multiply_rates(np.array(cents, dtype=np.int64),
+                               rate_units(currencies, dates, quote, rates))
+
+    if group_by == 'month':
+        keys = dates.astype('datetime64[M]').astype('datetime64[D]')
+    unique_keys, key_groups = np.unique(np.array(keys), return_inverse=True)
+    unique_types, type_groups = np.unique(np.array(type_ids),
+                                          return_inverse=True)
+    pairs, groups = np.unique(key_groups * len(unique_types) + type_groups,
+                              return_inverse=True)
+    totals = group_sums(groups, converted, len(pairs))
+    counts = np.bincount(groups, minlength=len(pairs))
+    return [(unique_keys[pair // len(unique_types)].item(),
+             unique_types[pair % len(unique_types)].item(),
+             int(total), int(count))
+            for pair, total, count in zip(pairs, totals, counts)]
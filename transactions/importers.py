@@ -0,0 +1,218 @@
+"""
+Streaming import of bank exports into transactions.
+
+Files are read row by row and written in chunks with bulk_create, each
+chunk in its own atomic block, so memory use and lock time stay bounded by
+the batch size however large the upload is. Category, transaction type and
+account names are resolved against maps built once per import.
+"""
+import codecs
+import csv
+import datetime
+import re
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction as db_transaction
+
+from .cache import get_categories, get_transaction_types
+from .models import Account, Transaction
+from .signals import post_transactions
+
+FORMATS = ('csv', 'ofx')
+MAX_AMOUNT = Decimal('1e8')
+MAX_REPORTED_ERRORS = 100
+
+OFX_TAG = re.compile(r'<(/?)([A-Z0-9.]+)>([^<\r\n]*)')
+
+
+class ImportFormatError(ValueError):
+    pass
+
+
+def detect_format(filename):
+    extension = filename.rsplit('.', 1)[-1].lower()
+    if extension == 'qfx':
+        return 'ofx'
+    if extension in FORMATS:
+        return extension
+    raise ImportFormatError(f'Unsupported file type "{filename}".')
+
+
+def _text_lines(stream):
+    """Decode a binary stream lazily, one line at a time"""
+    decoder = codecs.getincrementaldecoder('utf-8-sig')(errors='replace')
+    for line in stream:
+        text = decoder.decode(line)
+        if text:
+            yield text
+    tail = decoder.decode(b'', final=True)
+    if tail:
+        yield tail
+
+
+def iter_csv_rows(stream):
+    """
+    Yield (line number, row) from a CSV export with a header of date,
+    amount, description, category, transaction_type and account.
+    """
+    reader = csv.DictReader(_text_lines(stream))
+    for row in reader:
+        yield reader.line_num, {key.strip().lower(): (value or '').strip()
+                                for key, value in row.items() if key}
+
+
+def iter_ofx_rows(stream):
+    """Yield (line number, row) for each STMTTRN in an OFX or QFX statement"""
+    current = None
+    for line_num, line in enumerate(_text_lines(stream), start=1):
+        for closing, tag, value in OFX_TAG.findall(line):
+            if tag == 'STMTTRN' and not closing:
+                current = {'line': line_num}
+            elif tag == 'STMTTRN' and current is not None:
+                yield current.pop('line'), _ofx_row(current)
+                current = None
+            elif current is not None and not closing:
+                current[tag] = value.strip()
+
+
+def _ofx_row(tags):
+    """Map the tags of one OFX transaction onto importer row keys"""
+    posted = tags.get('DTPOSTED', '')[:8]
+    return {
+        'date': f'{posted[:4]}-{posted[4:6]}-{posted[6:8]}',
+        'amount': tags.get('TRNAMT', ''),
+        'description': ' '.join(
+            tags[tag] for tag in ('NAME', 'MEMO') if tags.get(tag)),
+    }
+
+
+class TransactionImporter:
+    """
+    Validate and insert rows for one user in batches of `batch_size`.
+
+    `defaults` supplies category, transaction_type or account names for
+    rows that leave them out, as OFX statements always do.
+    """
+
+    def __init__(self, user, batch_size=500, defaults=None):
+        self.user = user
+        self.batch_size = batch_size
+        self.defaults = {key: value for key, value in (defaults or {}).items()
+                         if value}
+        self.created = 0
+        self.error_count = 0
+        self.errors = []
+        self._build_lookups()
+
+    def _build_lookups(self):
+        self.categories = {
+            category.name.lower(): (category.pk, category.transaction_type_id)
+            for category in get_categories(self.user.id).values()
+        }
+        self.types = {}
+        self.expense_type_id = None
+        for transaction_type in sorted(get_transaction_types().values(),
+                                       key=lambda type_: type_.pk):
+            self.types[transaction_type.name.lower()] = transaction_type.pk
+            if transaction_type.is_expense and self.expense_type_id is None:
+                self.expense_type_id = transaction_type.pk
+        self.accounts = {}
+        self.currencies = {}
+        for pk, name, currency in Account.objects.filter(
+                user=self.user).values_list('id', 'name', 'currency'):
+            self.accounts[name.lower()] = pk
+            self.currencies[pk] = currency
+
+    def run(self, rows):
+        batch = []
+        for line_num, row in rows:
+            transaction = self.validate(line_num, row)
+            if transaction is not None:
+                batch.append(transaction)
+            if len(batch) >= self.batch_size:
+                self.write(batch)
+                batch = []
+        if batch:
+            self.write(batch)
+        return self
+
+    def validate(self, line_num, row):
+        """Return an unsaved Transaction for `row` or record its errors"""
+        row = {**self.defaults, **{k: v for k, v in row.items() if v}}
+        errors = {}
+
+        try:
+            date = datetime.date.fromisoformat(row.get('date', ''))
+        except ValueError:
+            errors['date'] = ['Enter a valid date in YYYY-MM-DD format.']
+
+        try:
+            amount = Decimal(row.get('amount', '').replace(',', ''))
+            if not amount.is_finite() or abs(amount) >= MAX_AMOUNT:
+                raise InvalidOperation
+            amount = amount.quantize(Decimal('0.01'))
+        except InvalidOperation:
+            errors['amount'] = ['A valid number is required.']
+            amount = None
+
+        category = self.categories.get(row.get('category', '').lower())
+        if category is None:
+            errors['category'] = [
+                f'Unknown category "{row.get("category", "")}".']
+
+        account_id = self.accounts.get(row.get('account', '').lower())
+        if account_id is None:
+            errors['account'] = [
+                f'Unknown account "{row.get("account", "")}".']
+
+        # Without an explicit type, negative amounts are expenses and
+        # anything else takes the category's type.
+        if 'transaction_type' in row:
+            transaction_type_id = self.types.get(
+                row['transaction_type'].lower())
+        elif amount is not None and amount < 0:
+            transaction_type_id = self.expense_type_id
+        else:
+            transaction_type_id = category and category[1]
+        if transaction_type_id is None and category is not None:
+            errors['transaction_type'] = [
+                f'Unknown transaction type "{row.get("transaction_type", "")}".']
+
+        if errors:
+            self.error_count += 1
+            if len(self.errors) < MAX_REPORTED_ERRORS:
+                self.errors.append({'line': line_num, 'errors': errors})
+            return None
+
+        return Transaction(
+            user=self.user, date=date, amount=abs(amount),
+            description=row.get('description') or None,
+            category_id=category[0], account_id=account_id,
+            transaction_type_id=transaction_type_id)
+
+    def write(self, batch):
+        with db_transaction.atomic():
+            Transaction.objects.bulk_create(batch)
+            post_transactions(
+                added=[transaction.tracked_values() for transaction in batch],
+                currencies=self.currencies)
+        self.created += len(batch)
+
+    def summary(self):
+        return {
+            'created': self.created,
+            'error_count': self.error_count,
+            'errors': self.errors,
+        }
+
+
+def import_transactions(user, stream, file_format, batch_size=500,
+                        defaults=None):
+    """Import every row of `stream` for `user` and return the importer"""
+    if file_format not in FORMATS:
+        raise ImportFormatError(f'Unsupported format "{file_format}".')
+
+    rows = iter_csv_rows(stream) if file_format == 'csv' else iter_ofx_rows(
+        stream)
+    importer = TransactionImporter(user, batch_size, defaults)
+    return importer.run(rows)
@@ -0,0 +1,59 @@
+"""
+Keeps Account.balance in step with the transactions posted to it.
+
+Balances are adjusted with database-side arithmetic (F() expressions), so
+concurrent writers never read-modify-write a balance in Python and a
+balance read stays a single-row lookup however long the history grows.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db.models import F
+
+from .cache import get_transaction_types
+from .models import Account
+
+
+def signed_amount(amount, is_expense):
+    return -amount if is_expense else amount
+
+
+def account_currencies(account_ids):
+    """Return {account_id: currency} for the accounts that still exist"""
+    account_ids = set(account_ids)
+    if not account_ids:
+        return {}
+    return dict(Account.objects.filter(pk__in=account_ids).values_list(
+        'pk', 'currency'))
+
+
+def balance_deltas(added=(), removed=()):
+    """
+    Return {account_id: delta} for the transactions being added to and
+    removed from the books, each given as a dict of tracked values.
+    """
+    postings = ([(values, 1) for values in added if values]
+                + [(values, -1) for values in removed if values])
+    types = get_transaction_types(require={
+        values['transaction_type_id'] for values, _ in postings})
+
+    deltas = defaultdict(Decimal)
+    for values, direction in postings:
+        transaction_type = types.get(values['transaction_type_id'])
+        amount = signed_amount(
+            Decimal(str(values['amount'])),
+            transaction_type is not None and transaction_type.is_expense)
+        deltas[values['account_id']] += direction * amount
+
+    return {account_id: delta for account_id, delta in deltas.items() if delta}
+
+
+def apply_balance_deltas(deltas):
+    """Adjust each account's balance by its delta, one UPDATE per account"""
+    for account_id, delta in sorted(deltas.items()):
+        Account.objects.filter(pk=account_id).update(
+            balance=F('balance') + delta)
+
+
+def post(added=(), removed=()):
+    apply_balance_deltas(balance_deltas(added, removed))
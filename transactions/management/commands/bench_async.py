@@ -0,0 +1,180 @@
+"""
+Benchmark the sync WSGI and async ASGI transaction list under many slow
+concurrent clients.
+"""
+import asyncio
+import datetime
+import io
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.urls import reverse
+
+from rest_framework_simplejwt.tokens import AccessToken
+
+from transactions.models import Account, Category, Transaction, TransactionType
+
+EMAIL = 'bench-async@example.com'
+
+
+class Command(BaseCommand):
+    help = ('Drive the transaction list through the WSGI handler on a fixed '
+            'thread pool and the async list through the ASGI handler on one '
+            'event loop. Each client spends --client-delay seconds sending '
+            'its request, which holds a WSGI worker thread but only suspends '
+            'an ASGI request. The rows are committed and deleted afterwards.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=200)
+        parser.add_argument('--requests', type=int, default=256)
+        parser.add_argument('--clients', type=int, default=64)
+        parser.add_argument('--workers', type=int, default=8)
+        parser.add_argument('--client-delay', type=float, default=0.5)
+
+    def handle(self, *args, **options):
+        user = self.populate(options['rows'])
+        try:
+            headers = {'authorization': f'Bearer {AccessToken.for_user(user)}'}
+            runs = (
+                ('WSGI', reverse('transaction-list'), self.run_wsgi),
+                ('ASGI', reverse('async-transaction-list'), self.run_asgi),
+            )
+
+            self.stdout.write(f'{"server":<6} {"req/s":>8} {"p50 ms":>8} '
+                              f'{"p95 ms":>8}')
+            for name, path, run in runs:
+                start = time.perf_counter()
+                latencies = run(path, headers, options)
+                elapsed = time.perf_counter() - start
+
+                p50, p95 = (statistics.quantiles(latencies, n=20)[i] * 1000
+                            for i in (9, 18))
+                self.stdout.write(f'{name:<6} {len(latencies) / elapsed:>8.0f} '
+                                  f'{p50:>8.1f} {p95:>8.1f}')
+        finally:
+            self.cleanup()
+
+    def populate(self, rows):
+        self.cleanup()
+        user = get_user_model().objects.create_user(EMAIL, 'benchpass123')
+        transaction_type = TransactionType.objects.create(name='Bench Expense')
+        category = Category.objects.create(
+            name='Bench', user=user, transaction_type=transaction_type)
+        account = Account.objects.create(
+            name='Bench', account_type='CSH', balance=0, user=user)
+        start = datetime.date(2000, 1, 1)
+
+        Transaction.objects.bulk_create(
+            Transaction(user=user, transaction_type=transaction_type,
+                        category=category, account=account, amount=1,
+                        date=start + datetime.timedelta(days=i))
+            for i in range(rows)
+        )
+        return user
+
+    def cleanup(self):
+        get_user_model().objects.filter(email=EMAIL).delete()
+        TransactionType.objects.filter(name='Bench Expense').delete()
+
+    def run_wsgi(self, path, headers, options):
+        handler = WSGIHandler()
+        delay = options['client_delay']
+        environ = {
+            'REQUEST_METHOD': 'GET',
+            'SCRIPT_NAME': '',
+            'PATH_INFO': path,
+            'QUERY_STRING': '',
+            'SERVER_NAME': 'localhost',
+            'SERVER_PORT': '80',
+            'SERVER_PROTOCOL': 'HTTP/1.1',
+            'HTTP_HOST': 'localhost',
+            'wsgi.url_scheme': 'http',
+            'wsgi.errors': sys.stderr,
+            **{f'HTTP_{key.upper()}': value for key, value in headers.items()},
+        }
+
+        workers = threading.BoundedSemaphore(options['workers'])
+
+        def request():
+            issued = time.perf_counter()
+            statuses = []
+            with workers:
+                # A sync worker is busy for as long as the client takes to
+                # send its request.
+                time.sleep(delay)
+                response = handler(
+                    {**environ, 'wsgi.input': io.BytesIO()},
+                    lambda status, headers: statuses.append(status))
+                b''.join(response)
+                response.close()
+            self.check_status(int(statuses[0].split()[0]))
+            return time.perf_counter() - issued
+
+        with ThreadPoolExecutor(options['clients']) as clients:
+            futures = [clients.submit(request)
+                       for _ in range(options['requests'])]
+            return [future.result() for future in futures]
+
+    def run_asgi(self, path, headers, options):
+        handler = ASGIHandler()
+        delay = options['client_delay']
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'GET',
+            'scheme': 'http',
+            'path': path,
+            'query_string': b'',
+            'server': ('localhost', 80),
+            'headers': [(b'host', b'localhost')] + [
+                (key.encode(), value.encode())
+                for key, value in headers.items()],
+        }
+
+        async def request():
+            issued = time.perf_counter()
+            done = asyncio.Event()
+            messages = []
+
+            async def receive():
+                if messages:
+                    await done.wait()
+                    return {'type': 'http.disconnect'}
+                # The client trickles its request in while the loop serves
+                # everyone else.
+                await asyncio.sleep(delay)
+                messages.append('request')
+                return {'type': 'http.request', 'body': b''}
+
+            async def send(message):
+                if message['type'] == 'http.response.start':
+                    self.check_status(message['status'])
+                elif not message.get('more_body'):
+                    done.set()
+
+            await handler(dict(scope), receive, send)
+            return time.perf_counter() - issued
+
+        async def run():
+            clients = asyncio.Semaphore(options['clients'])
+
+            async def client():
+                async with clients:
+                    return await request()
+
+            return await asyncio.gather(
+                *(client() for _ in range(options['requests'])))
+
+        return asyncio.run(run())
+
+    def check_status(self, status):
+        if status != 200:
+            raise RuntimeError(f'Benchmark request returned {status}')
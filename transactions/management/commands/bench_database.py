@@ -0,0 +1,199 @@
+"""
+Load test mixed reads and writes against each database profile.
+"""
+import io
+import json
+import os
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from django.urls import reverse
+
+from rest_framework_simplejwt.tokens import AccessToken
+
+from transactions.models import Account, Category
+
+READS = ('transaction-list', 'account-list', 'monthlysummary-list')
+
+
+class Command(BaseCommand):
+    help = ('Copy the database once per DATABASE_PROFILES entry and run '
+            '--workers processes against each copy for --duration seconds, '
+            'every process sending requests through the WSGI handler as the '
+            'synthetic users (see generate_data). --write-ratio of the '
+            'requests create a transaction, the rest read a list.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profiles', default=','.join(
+            settings.DATABASE_PROFILES))
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument('--duration', type=float, default=10)
+        parser.add_argument('--write-ratio', type=float, default=0.2)
+        parser.add_argument('--users', type=int, default=20,
+                            help='Most active users to send requests as.')
+        parser.add_argument('--worker', action='store_true',
+                            help='Run as one worker and print its results.')
+        parser.add_argument('--start-at', type=float, default=0)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        if options['worker']:
+            self.stdout.write(json.dumps(self.work(options)))
+            return
+
+        source = settings.DATABASES['default']['NAME']
+        profiles = options['profiles'].split(',')
+        unknown = set(profiles) - set(settings.DATABASE_PROFILES)
+        if unknown:
+            raise CommandError(f'Unknown profiles {", ".join(unknown)}.')
+
+        self.stdout.write(f'{"profile":<11} {"req/s":>7} {"reads/s":>8} '
+                          f'{"writes/s":>8} {"errors":>6} {"read p95":>9} '
+                          f'{"write p95":>9}')
+        with tempfile.TemporaryDirectory() as directory:
+            for profile in profiles:
+                path = os.path.join(directory, f'{profile}.sqlite3')
+                self.copy_database(source, path)
+                self.report(profile, self.run_workers(profile, path, options),
+                            options['duration'])
+
+    def copy_database(self, source, path):
+        # The backup API includes commits still in a source's WAL file.
+        with sqlite3.connect(source) as src, sqlite3.connect(path) as dst:
+            src.backup(dst)
+        src.close()
+        dst.close()
+
+    def run_workers(self, profile, path, options):
+        env = {**os.environ, 'DATABASE_PROFILE': profile, 'SQLITE_PATH': path}
+        # Every worker starts sending at the same moment, after Django
+        # has been set up in all of them.
+        start_at = time.time() + 3
+        workers = [
+            subprocess.Popen(
+                [sys.executable, str(settings.BASE_DIR / 'manage.py'),
+                 'bench_database', '--worker',
+                 '--duration', str(options['duration']),
+                 '--write-ratio', str(options['write_ratio']),
+                 '--users', str(options['users']),
+                 '--start-at', str(start_at),
+                 '--seed', str(options['seed'] + number)],
+                env=env, stdout=subprocess.PIPE, text=True)
+            for number in range(options['workers'])
+        ]
+
+        results = []
+        for worker in workers:
+            output, _ = worker.communicate()
+            if worker.returncode:
+                raise CommandError(f'A {profile} worker failed.')
+            results.append(json.loads(output))
+        return results
+
+    def report(self, profile, results, duration):
+        latencies = {kind: [latency for result in results
+                            for latency in result[kind]]
+                     for kind in ('read', 'write')}
+        errors = sum(result['errors'] for result in results)
+        reads, writes = (len(latencies[kind]) for kind in ('read', 'write'))
+
+        def p95(values):
+            if len(values) < 2:
+                return float('nan')
+            return statistics.quantiles(values, n=20)[18] * 1000
+
+        self.stdout.write(
+            f'{profile:<11} {(reads + writes) / duration:>7.0f} '
+            f'{reads / duration:>8.0f} {writes / duration:>8.0f} '
+            f'{errors:>6} {p95(latencies["read"]):>8.1f}ms '
+            f'{p95(latencies["write"]):>8.1f}ms')
+
+    def work(self, options):
+        rng = random.Random(options['seed'])
+        handler = WSGIHandler()
+        users = self.users(options['users'])
+        latencies = {'read': [], 'write': []}
+        errors = 0
+
+        time.sleep(max(0, options['start_at'] - time.time()))
+        deadline = time.time() + options['duration']
+        while time.time() < deadline:
+            user = rng.choice(users)
+            if rng.random() < options['write_ratio']:
+                kind = 'write'
+                status, elapsed = self.request(
+                    handler, 'POST', reverse('transaction-list'), user,
+                    json.dumps({
+                        'transaction_type': user['transaction_type'],
+                        'category': user['category'],
+                        'account': user['account'],
+                        'amount': f'{rng.uniform(1, 100):.2f}',
+                        'date': '2024-01-01', 'description': 'Load test',
+                    }).encode())
+            else:
+                kind = 'read'
+                status, elapsed = self.request(
+                    handler, 'GET', reverse(rng.choice(READS)), user)
+
+            if 200 <= status < 300:
+                latencies[kind].append(elapsed)
+            else:
+                errors += 1
+
+        return {**latencies, 'errors': errors}
+
+    def users(self, count):
+        users = get_user_model().objects.annotate(
+            count=Count('transactions')).filter(count__gt=0).order_by(
+            '-count')[:count]
+        result = []
+        for user in users:
+            category = Category.objects.filter(user=user).first()
+            result.append({
+                'token': str(AccessToken.for_user(user)),
+                'account': Account.objects.filter(user=user).first().id,
+                'category': category.id,
+                'transaction_type': category.transaction_type_id,
+            })
+        if not result:
+            raise CommandError('No users with transactions; run '
+                               'generate_data first.')
+        return result
+
+    def request(self, handler, method, path, user, body=b''):
+        environ = {
+            'REQUEST_METHOD': method,
+            'SCRIPT_NAME': '',
+            'PATH_INFO': path,
+            'QUERY_STRING': '',
+            'SERVER_NAME': 'localhost',
+            'SERVER_PORT': '80',
+            'SERVER_PROTOCOL': 'HTTP/1.1',
+            'HTTP_HOST': 'localhost',
+            'HTTP_AUTHORIZATION': f'Bearer {user["token"]}',
+            'CONTENT_TYPE': 'application/json',
+            'CONTENT_LENGTH': str(len(body)),
+            'wsgi.url_scheme': 'http',
+            'wsgi.input': io.BytesIO(body),
+            'wsgi.errors': sys.stderr,
+        }
+        statuses = []
+
+        start = time.perf_counter()
+        response = handler(environ, lambda status, headers: statuses.append(
+            status))
+        b''.join(response)
+        # Closing the response fires request_finished, which closes the
+        # connection unless CONN_MAX_AGE keeps it.
+        response.close()
+        return int(statuses[0].split()[0]), time.perf_counter() - start
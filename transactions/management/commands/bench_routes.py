@@ -0,0 +1,295 @@
+"""
+Benchmark latency and SQL query counts of every API route.
+"""
+import datetime
+import io
+import json
+import platform
+import statistics
+import time
+
+import django
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test import Client
+from django.urls import URLResolver, reverse
+
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from transactions import urls as transaction_urls
+from users import urls as user_urls
+
+# (label, url name, method, request options). Paths and payloads are
+# templates filled in by fill() from the benchmarked user's data.
+SCENARIOS = (
+    ('create user', 'users:create', 'post', {'data': {
+        'email': 'bench-routes-new@example.com', 'password': 'benchpass123',
+        'first_name': 'Bench', 'last_name': 'Routes'}}),
+    ('me', 'users:me', 'get', {}),
+    ('update me', 'users:me', 'patch', {'data': {'first_name': 'Renamed'}}),
+    ('obtain token', 'users:token_obtain_pair', 'post', {'data': {
+        'email': '{email}', 'password': '{password}'}}),
+    ('refresh token', 'users:token_refresh', 'post', {'data': {
+        'refresh': '{refresh}'}}),
+    ('async create user', 'users:async-create', 'post', {'data': {
+        'email': 'bench-routes-async@example.com',
+        'password': 'benchpass123', 'first_name': 'Bench',
+        'last_name': 'Routes'}}),
+    ('async obtain token', 'users:async-token', 'post', {'data': {
+        'email': '{email}', 'password': '{password}'}}),
+    ('api root', 'api-root', 'get', {}),
+    ('list accounts', 'account-list', 'get', {}),
+    ('create account', 'account-list', 'post', {'data': {
+        'name': 'Bench', 'account_type': 'CSH', 'balance': '0.00'}}),
+    ('get account', 'account-detail', 'get', {'pk': '{account}'}),
+    ('update account', 'account-detail', 'patch', {
+        'pk': '{account}', 'data': {'name': 'Renamed'}}),
+    ('delete account', 'account-detail', 'delete', {'pk': '{account}'}),
+    ('list categories', 'category-list', 'get', {}),
+    ('get category', 'category-detail', 'get', {'pk': '{category}'}),
+    ('update category', 'category-detail', 'patch', {
+        'pk': '{category}', 'data': {'name': 'Renamed'}}),
+    ('delete category', 'category-detail', 'delete', {'pk': '{category}'}),
+    ('bulk create categories', 'category-bulk', 'post', {'data': [
+        {'name': f'Bench {number}', 'transaction_type': '{transaction_type}'}
+        for number in range(40)]}),
+    ('list transactions', 'transaction-list', 'get', {}),
+    ('list transactions, sparse', 'transaction-list', 'get', {
+        'query': {'fields': 'id,amount,date'}}),
+    ('list transactions, by category', 'transaction-list', 'get', {
+        'query': {'category': '{category}'}}),
+    ('list transactions, by date', 'transaction-list', 'get', {
+        'query': {'date_after': '{month_start}'}}),
+    ('create transaction', 'transaction-list', 'post', {'data': {
+        'transaction_type': '{transaction_type}', 'category': '{category}',
+        'account': '{account}', 'amount': '12.34', 'date': '{today}',
+        'description': 'Bench'}}),
+    ('get transaction', 'transaction-detail', 'get', {'pk': '{transaction}'}),
+    ('update transaction', 'transaction-detail', 'patch', {
+        'pk': '{transaction}', 'data': {'amount': '43.21'}}),
+    ('delete transaction', 'transaction-detail', 'delete', {
+        'pk': '{transaction}'}),
+    ('search transactions', 'transaction-search', 'get', {
+        'query': {'q': '{search}'}}),
+    ('export transactions', 'transaction-export', 'get', {}),
+    ('transaction totals, by month', 'transaction-totals', 'get', {
+        'query': {'group': 'month'}}),
+    ('transaction totals', 'transaction-totals', 'get', {}),
+    ('import transactions', 'transaction-import-file', 'post', {
+        'file': ('bench.csv', 'date,amount,description,category,'
+                 'transaction_type,account\n'
+                 '{today},12.34,Bench,{category_name},'
+                 '{transaction_type_name},{account_name}\n')}),
+    ('list summaries', 'monthlysummary-list', 'get', {}),
+    ('list recurring', 'recurringtransaction-list', 'get', {}),
+    ('create recurring', 'recurringtransaction-list', 'post', {'data': {
+        'transaction_type': '{transaction_type}', 'category': '{category}',
+        'account': '{account}', 'amount': '12.34', 'frequency': 'W',
+        'start_date': '{today}', 'description': 'Bench'}}),
+    ('get recurring', 'recurringtransaction-detail', 'get', {
+        'pk': '{recurring}'}),
+    ('update recurring', 'recurringtransaction-detail', 'patch', {
+        'pk': '{recurring}', 'data': {'amount': '43.21'}}),
+    ('delete recurring', 'recurringtransaction-detail', 'delete', {
+        'pk': '{recurring}'}),
+    ('recurring occurrences', 'recurringtransaction-occurrences', 'get', {
+        'query': {'start': '{today}', 'end': '{year_ahead}'}}),
+    ('list budgets', 'budget-list', 'get', {}),
+    ('budgets covering today', 'budget-list', 'get', {
+        'query': {'date': '{today}'}}),
+    ('create budget', 'budget-list', 'post', {'data': {
+        'category': '{category}', 'period': 'W', 'start': '{year_ahead}',
+        'amount': '100.00'}}),
+    ('get budget', 'budget-detail', 'get', {'pk': '{budget}'}),
+    ('update budget', 'budget-detail', 'patch', {
+        'pk': '{budget}', 'data': {'amount': '999.00'}}),
+    ('delete budget', 'budget-detail', 'delete', {'pk': '{budget}'}),
+    ('budget alerts', 'budget-alerts', 'get', {'pk': '{budget}'}),
+    ('async list categories', 'async-category-list', 'get', {}),
+    ('async get category', 'async-category-detail', 'get', {
+        'pk': '{category}'}),
+    ('async list transactions', 'async-transaction-list', 'get', {}),
+    ('async get transaction', 'async-transaction-detail', 'get', {
+        'pk': '{transaction}'}),
+)
+
+
+def route_names():
+    """Return the URL names of users/urls.py and transactions/urls.py"""
+    def walk(patterns, namespace):
+        for pattern in patterns:
+            if isinstance(pattern, URLResolver):
+                yield from walk(pattern.url_patterns, namespace)
+            elif pattern.name:
+                yield namespace + pattern.name
+
+    return (set(walk(user_urls.urlpatterns, f'{user_urls.app_name}:'))
+            | set(walk(transaction_urls.urlpatterns, '')))
+
+
+def fill(template, context):
+    if isinstance(template, str):
+        return template.format(**context)
+    if isinstance(template, dict):
+        return {key: fill(value, context) for key, value in template.items()}
+    if isinstance(template, (list, tuple)):
+        return type(template)(fill(value, context) for value in template)
+    return template
+
+
+class Command(BaseCommand):
+    help = ('Request every route of the users and transactions APIs as one '
+            'user, by default the synthetic user with most transactions, '
+            'and write p50/p95 latency and SQL query counts per scenario '
+            'as JSON. Every request is rolled back.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--email',
+                            help='User to benchmark as; defaults to the '
+                                 'user with most transactions.')
+        parser.add_argument('--password', default='synthetic-pass',
+                            help='Password of that user, for the token '
+                                 'route.')
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--warmup', type=int, default=2)
+        parser.add_argument('--only', default='',
+                            help='Comma separated URL names to run.')
+        parser.add_argument('--output', default='-',
+                            help='JSON file to write, - for stdout.')
+
+    def handle(self, *args, **options):
+        user = self.get_user(options['email'])
+        context = self.context(user, options['password'])
+        only = {name for name in options['only'].split(',') if name}
+        scenarios = [scenario for scenario in SCENARIOS
+                     if not only or scenario[1] in only]
+
+        client = Client(HTTP_HOST='localhost', raise_request_exception=False,
+                        HTTP_AUTHORIZATION=f'Bearer {context["access"]}')
+        results = []
+        for label, name, method, spec in scenarios:
+            self.stderr.write(f'{label}...')
+            results.append(self.measure(
+                client, label, name, method, fill(spec, context), options))
+
+        covered = {name for _, name, _, _ in SCENARIOS}
+        report = {
+            'meta': {
+                'timestamp': datetime.datetime.now(
+                    datetime.timezone.utc).isoformat(),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+                'user': user.email,
+                'transactions': context['transaction_count'],
+                'repeat': options['repeat'],
+                'warmup': options['warmup'],
+                'uncovered_routes': sorted(route_names() - covered),
+            },
+            'results': results,
+        }
+
+        output = json.dumps(report, indent=2)
+        if options['output'] == '-':
+            self.stdout.write(output)
+        else:
+            with open(options['output'], 'w') as file:
+                file.write(output + '\n')
+            self.stderr.write(f'Wrote {options["output"]}')
+
+    def get_user(self, email):
+        users = get_user_model().objects.all()
+        if email:
+            user = users.filter(email=email).first()
+        else:
+            user = users.annotate(count=Count('transactions')).order_by(
+                '-count', 'id').first()
+        if user is None or not user.transactions.exists():
+            raise CommandError('No user with transactions; run generate_data '
+                               'first or pass --email.')
+        return user
+
+    def context(self, user, password):
+        account = user.account_set.order_by('id').first()
+        category = user.categories.select_related(
+            'transaction_type').order_by('id').first()
+        latest = user.transactions.order_by('-date', '-id').first()
+        recurring = user.recurring_transactions.order_by('id').first()
+        budget = user.budgets.order_by('id').first()
+        refresh = RefreshToken.for_user(user)
+        today = datetime.date.today()
+
+        return {
+            'email': user.email, 'password': password,
+            'refresh': str(refresh), 'access': str(refresh.access_token),
+            'account': account.id, 'account_name': account.name,
+            'category': category.id, 'category_name': category.name,
+            'transaction_type': category.transaction_type_id,
+            'transaction_type_name': category.transaction_type.name,
+            'transaction': latest.id,
+            'recurring': recurring.id if recurring else 0,
+            'budget': budget.id if budget else 0,
+            'search': (latest.description or 'a').split()[0][:4],
+            'today': today.isoformat(),
+            'month_start': today.replace(day=1).isoformat(),
+            'year_ahead': (today + datetime.timedelta(days=365)).isoformat(),
+            'transaction_count': user.transactions.count(),
+        }
+
+    def measure(self, client, label, name, method, spec, options):
+        path = reverse(name, kwargs={'pk': spec['pk']} if 'pk' in spec
+                       else None)
+        timings, queries, statuses = [], [], set()
+
+        for run in range(options['warmup'] + options['repeat']):
+            elapsed, count, status = self.request(client, method, path, spec)
+            if run >= options['warmup']:
+                timings.append(elapsed * 1000)
+                queries.append(count)
+                statuses.add(status)
+
+        quantiles = (statistics.quantiles(timings, n=20, method='inclusive')
+                     if len(timings) > 1 else timings * 19)
+        return {
+            'label': label, 'route': name, 'method': method.upper(),
+            'path': path, 'status': sorted(statuses),
+            'p50_ms': round(statistics.median(timings), 3),
+            'p95_ms': round(quantiles[18], 3),
+            'mean_ms': round(statistics.fmean(timings), 3),
+            'queries': max(queries),
+        }
+
+    def request(self, client, method, path, spec):
+        kwargs = {}
+        if 'file' in spec:
+            filename, content = spec['file']
+            upload = io.BytesIO(content.encode())
+            upload.name = filename
+            kwargs['data'] = {'file': upload}
+        elif 'data' in spec:
+            kwargs = {'data': json.dumps(spec['data']),
+                      'content_type': 'application/json'}
+        elif 'query' in spec:
+            kwargs['data'] = spec['query']
+
+        queries = []
+
+        def count(execute, sql, params, many, context):
+            queries.append(sql)
+            return execute(sql, params, many, context)
+
+        # Counted with a wrapper rather than CaptureQueriesContext, whose
+        # bounded query log stops growing on requests such as cascading
+        # deletes.
+        with transaction.atomic(), connection.execute_wrapper(count):
+            start = time.perf_counter()
+            response = getattr(client, method)(path, **kwargs)
+            # Streamed bodies are produced while they are read.
+            if response.streaming:
+                b''.join(response.streaming_content)
+            elapsed = time.perf_counter() - start
+            transaction.set_rollback(True)
+
+        return elapsed, len(queries), response.status_code
@@ -0,0 +1,85 @@
+"""
+Benchmark description search against a large transaction history.
+"""
+import datetime
+import random
+import statistics
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from transactions import search
+from transactions.models import Account, Category, Transaction, TransactionType
+
+WORDS = ('coffee', 'corner', 'market', 'grocery', 'fuel', 'station', 'pizza',
+         'pharmacy', 'books', 'cinema', 'rent', 'salary', 'transfer', 'bakery',
+         'hardware', 'airline', 'hotel', 'taxi', 'parking', 'insurance')
+
+
+class Command(BaseCommand):
+    help = ('Time FTS5 and LIKE searches of one user\'s transactions in a '
+            'table of --rows rows spread over --users users. All rows are '
+            'rolled back.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000000)
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--queries', default='coff,fuel station,pizza,zzz')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            user = self.populate(options['rows'], options['users'])
+
+            self.stdout.write(f'{"query":<16} {"hits":>6} {"fts ms":>9} '
+                              f'{"like ms":>9}')
+            for query in options['queries'].split(','):
+                hits = len(search.search_transactions(user, query))
+                fts = self.time(options['repeat'], user, query)
+                with mock.patch.object(search, 'has_index',
+                                       return_value=False):
+                    like = self.time(options['repeat'], user, query)
+                self.stdout.write(f'{query:<16} {hits:>6} {fts:>9.2f} '
+                                  f'{like:>9.2f}')
+
+            transaction.set_rollback(True)
+
+    def populate(self, rows, users):
+        users = [get_user_model().objects.create_user(
+            f'bench-search-{i}@example.com', None)
+            for i in range(users)]
+        transaction_type = TransactionType.objects.create(name='Expense')
+        accounts = {}
+        categories = {}
+        for user in users:
+            categories[user.id] = Category.objects.create(
+                name='Bench', user=user, transaction_type=transaction_type)
+            accounts[user.id] = Account.objects.create(
+                name='Bench', account_type='CSH', balance=0, user=user)
+
+        rng = random.Random(0)
+        start = datetime.date(2000, 1, 1)
+
+        def build(i):
+            user = users[i % len(users)]
+            return Transaction(
+                user=user, transaction_type=transaction_type,
+                category=categories[user.id], account=accounts[user.id],
+                amount=1, date=start + datetime.timedelta(days=i % 9000),
+                description=' '.join(rng.sample(WORDS, 3)))
+
+        Transaction.objects.bulk_create(
+            (build(i) for i in range(rows)), batch_size=5000)
+        return users[0]
+
+    def time(self, repeat, user, query):
+        """Return the median search time in milliseconds"""
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            search.search_transactions(user, query)
+            timings.append(time.perf_counter() - start)
+        return statistics.median(timings) * 1000
@@ -0,0 +1,82 @@
+"""
+Benchmark the model serializer against the values_list() fast path.
+"""
+import datetime
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from transactions.models import Account, Category, Transaction, TransactionType
+from transactions.serializers import TransactionListSerializer
+from transactions.values_serializers import ValuesSerializer
+
+
+class Command(BaseCommand):
+    help = ('Time rendering pages of TransactionListSerializer output from '
+            'model instances and from values_list() rows, queries included. '
+            'All rows are rolled back.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', default='1000,10000')
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options['rows'].split(',')]
+
+        with transaction.atomic():
+            user = self.populate(max(sizes))
+            queryset = Transaction.objects.for_user(user).order_by('-date', '-id')
+
+            self.stdout.write(f'{"rows":>7} {"model ms":>10} {"values ms":>10} '
+                              f'{"speedup":>8}')
+            for size in sizes:
+                model = self.time(options['repeat'], lambda: self.model_page(
+                    queryset, size))
+                values = self.time(options['repeat'], lambda: self.values_page(
+                    queryset, size))
+                self.stdout.write(f'{size:>7} {model:>10.1f} {values:>10.1f} '
+                                  f'{model / values:>7.1f}x')
+
+            transaction.set_rollback(True)
+
+    def populate(self, rows):
+        user = get_user_model().objects.create_user(
+            'bench-serializers@example.com', 'benchpass123')
+        types = [TransactionType.objects.create(name=name)
+                 for name in ('Income', 'Expense')]
+        categories = [
+            Category.objects.create(name=f'Category {i}', user=user,
+                                    transaction_type=types[i % 2])
+            for i in range(10)
+        ]
+        account = Account.objects.create(
+            name='Bench', account_type='CSH', balance=0, user=user)
+        start = datetime.date(2000, 1, 1)
+
+        Transaction.objects.bulk_create(
+            (Transaction(user=user, transaction_type=types[i % 2],
+                         category=categories[i % 10], account=account,
+                         amount=i, date=start + datetime.timedelta(days=i))
+             for i in range(rows)),
+            batch_size=5000,
+        )
+        return user
+
+    def model_page(self, queryset, size):
+        start = time.perf_counter()
+        TransactionListSerializer(
+            queryset.with_related()[:size], many=True).data
+        return time.perf_counter() - start
+
+    def values_page(self, queryset, size):
+        start = time.perf_counter()
+        serializer = ValuesSerializer(TransactionListSerializer())
+        serializer.serialize(serializer.rows(queryset[:size]))
+        return time.perf_counter() - start
+
+    def time(self, repeat, func):
+        """Return the median of `func`'s own timings in milliseconds"""
+        return statistics.median(func() for _ in range(repeat)) * 1000
@@ -0,0 +1,93 @@
+"""
+Benchmark keyset against offset pagination of the transaction list.
+"""
+import datetime
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from transactions.models import Account, Category, Transaction, TransactionType
+from transactions.pagination import Position, TransactionCursorPagination
+
+
+class Command(BaseCommand):
+    help = ('Time fetching deep pages of a large transaction history with '
+            'keyset and offset pagination. All rows are rolled back.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=60000)
+        parser.add_argument('--page-size', type=int, default=50)
+        parser.add_argument('--pages', default='1,10,100,1000')
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        page_size = options['page_size']
+        pages = [int(page) for page in options['pages'].split(',')]
+
+        with transaction.atomic():
+            user = self.populate(options['rows'])
+            queryset = Transaction.objects.filter(user=user)
+            ordered = queryset.order_by('-date', '-id')
+
+            self.stdout.write(f'{"page":>6} {"keyset ms":>10} {"offset ms":>10}')
+            for page in pages:
+                offset = (page - 1) * page_size
+                if offset >= options['rows']:
+                    continue
+
+                keyset = self.time(options['repeat'], lambda: self.keyset_page(
+                    queryset, ordered, offset, page_size))
+                by_offset = self.time(options['repeat'], lambda: self.offset_page(
+                    ordered, offset, page_size))
+                self.stdout.write(f'{page:>6} {keyset:>10.3f} {by_offset:>10.3f}')
+
+            transaction.set_rollback(True)
+
+    def populate(self, rows):
+        user = get_user_model().objects.create_user(
+            'bench-pages@example.com', 'benchpass123')
+        transaction_type = TransactionType.objects.create(name='Expense')
+        category = Category.objects.create(
+            name='Bench', user=user, transaction_type=transaction_type)
+        account = Account.objects.create(
+            name='Bench', account_type='CSH', balance=0, user=user)
+        start = datetime.date(2000, 1, 1)
+
+        Transaction.objects.bulk_create(
+            (Transaction(user=user, transaction_type=transaction_type,
+                         category=category, account=account, amount=1,
+                         date=start + datetime.timedelta(days=i // 10))
+             for i in range(rows)),
+            batch_size=5000,
+        )
+        return user
+
+    def keyset_page(self, queryset, ordered, offset, page_size):
+        paginator = TransactionCursorPagination()
+        paginator.base_url = 'http://localhost/api/transactions/'
+        url = f'{paginator.base_url}?page_size={page_size}'
+        if offset:
+            # Build the cursor a client would hold after walking to this page.
+            boundary = ordered[offset - 1]
+            url = paginator.encode_cursor(
+                Position(date=boundary.date, pk=boundary.pk, reverse=False))
+        request = Request(APIRequestFactory().get(url, HTTP_HOST='localhost'))
+
+        start = time.perf_counter()
+        paginator.paginate_queryset(queryset, request)
+        return time.perf_counter() - start
+
+    def offset_page(self, ordered, offset, page_size):
+        start = time.perf_counter()
+        list(ordered[offset:offset + page_size])
+        return time.perf_counter() - start
+
+    def time(self, repeat, func):
+        """Return the median of `func`'s own timings in milliseconds"""
+        return statistics.median(func() for _ in range(repeat)) * 1000
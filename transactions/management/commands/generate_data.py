@@ -0,0 +1,51 @@
+"""
+Generate synthetic users, accounts, categories and transactions.
+"""
+import datetime
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from transactions.synthetic import DEFAULT_END, Generator
+
+
+class Command(BaseCommand):
+    help = ('Create --users users with realistic accounts, categories and '
+            'on average --transactions transactions each. --skew sets how '
+            'unevenly transactions are spread between users (0 is even) and '
+            '--seed makes the data set reproducible. Every user has the '
+            'password --password.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--transactions', type=int, default=1000)
+        parser.add_argument('--skew', type=float, default=1.0)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--days', type=int, default=730)
+        parser.add_argument('--end', type=datetime.date.fromisoformat,
+                            default=DEFAULT_END,
+                            help='Last day of the histories, YYYY-MM-DD')
+        parser.add_argument('--password', default='synthetic-pass')
+        parser.add_argument('--prefix', default='synthetic',
+                            help='Emails are <prefix>-<n>@example.com')
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        if options['users'] < 1 or options['transactions'] < 0:
+            raise CommandError('--users must be positive and --transactions '
+                               'not negative.')
+        if get_user_model().objects.filter(
+                email__startswith=f'{options["prefix"]}-').exists():
+            raise CommandError(
+                f'Users prefixed "{options["prefix"]}" already exist; pick '
+                f'another --prefix.')
+
+        created = Generator(
+            options['users'], options['transactions'], skew=options['skew'],
+            seed=options['seed'], days=options['days'], end=options['end'],
+            password=options['password'], prefix=options['prefix'],
+            batch_size=options['batch_size'],
+        ).run()
+
+        self.stdout.write(self.style.SUCCESS(
+            ', '.join(f'{count} {name}' for name, count in created.items())))
@@ -0,0 +1,53 @@
+"""
+Import a CSV or OFX bank export for a user.
+"""
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from transactions.importers import (
+    ImportFormatError,
+    detect_format,
+    import_transactions,
+)
+
+
+class Command(BaseCommand):
+    help = 'Stream a CSV or OFX export into a user\'s transactions.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--user', required=True, help='Email of the owner')
+        parser.add_argument('--format', dest='file_format',
+                            help='csv or ofx; defaults to the file extension')
+        parser.add_argument('--category', help='Default category name')
+        parser.add_argument('--transaction-type',
+                            help='Default transaction type name')
+        parser.add_argument('--account', help='Default account name')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(email=options['user'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f'No user with email {options["user"]}')
+
+        defaults = {
+            'category': options['category'],
+            'transaction_type': options['transaction_type'],
+            'account': options['account'],
+        }
+        try:
+            file_format = (options['file_format']
+                           or detect_format(options['path']))
+            with open(options['path'], 'rb') as stream:
+                importer = import_transactions(
+                    user, stream, file_format, options['batch_size'],
+                    defaults)
+        except (ImportFormatError, OSError) as exc:
+            raise CommandError(str(exc))
+
+        for error in importer.errors:
+            self.stderr.write(f'Line {error["line"]}: {error["errors"]}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {importer.created} transactions, '
+            f'skipped {importer.error_count} invalid rows.'))
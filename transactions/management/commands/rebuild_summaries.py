@@ -0,0 +1,37 @@
+"""
+Rebuild the monthly summary rollups from the raw transactions.
+"""
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from transactions import rollups
+
+
+class Command(BaseCommand):
+    help = ('Recompute MonthlySummary rows from raw transactions and verify '
+            'them against the raw data.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help='Email of a single user to rebuild')
+        parser.add_argument('--verify-only', action='store_true',
+                            help='Report mismatches without rebuilding')
+
+    def handle(self, *args, **options):
+        user = None
+        if options['user']:
+            try:
+                user = get_user_model().objects.get(email=options['user'])
+            except get_user_model().DoesNotExist:
+                raise CommandError(f'No user with email {options["user"]}')
+
+        if not options['verify_only']:
+            count = rollups.rebuild(user)
+            self.stdout.write(f'Rebuilt {count} summary rows.')
+
+        mismatches = rollups.verify(user)
+        if mismatches:
+            for key in mismatches:
+                self.stderr.write(f'Mismatch for {key}')
+            raise CommandError(f'{len(mismatches)} summary rows do not match.')
+
+        self.stdout.write(self.style.SUCCESS('Summaries match transactions.'))
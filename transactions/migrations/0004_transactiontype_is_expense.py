@@ -0,0 +1,18 @@
+# Generated by Django 5.0.14 on 2026-10-18 11:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0003_transaction_account_fk'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transactiontype',
+            name='is_expense',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,71 @@
+from django.db import migrations
+
+FTS_TABLE = 'transactions_transaction_fts'
+
+FORWARD_SQL = [
+    f"""
+    CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+        description, user_id,
+        content='transactions_transaction', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3 4'
+    )
+    """,
+    f"""
+    CREATE TRIGGER {FTS_TABLE}_insert AFTER INSERT
+    ON transactions_transaction BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, description, user_id)
+        VALUES (new.id, new.description, new.user_id);
+    END
+    """,
+    f"""
+    CREATE TRIGGER {FTS_TABLE}_delete AFTER DELETE
+    ON transactions_transaction BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, description, user_id)
+        VALUES ('delete', old.id, old.description, old.user_id);
+    END
+    """,
+    f"""
+    CREATE TRIGGER {FTS_TABLE}_update AFTER UPDATE OF description, user_id
+    ON transactions_transaction BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, description, user_id)
+        VALUES ('delete', old.id, old.description, old.user_id);
+        INSERT INTO {FTS_TABLE}(rowid, description, user_id)
+        VALUES (new.id, new.description, new.user_id);
+    END
+    """,
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+REVERSE_SQL = [
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_{name}'
+    for name in ('insert', 'delete', 'update')
+] + [f'DROP TABLE IF EXISTS {FTS_TABLE}']
+
+
+def has_fts5(connection):
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        return bool(cursor.fetchone()[0])
+
+
+def run(statements):
+    def apply(apps, schema_editor):
+        # Without FTS5 transactions are searched with LIKE instead.
+        if not has_fts5(schema_editor.connection):
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return apply
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0006_dataversion'),
+    ]
+
+    operations = [
+        migrations.RunPython(run(FORWARD_SQL), run(REVERSE_SQL)),
+    ]
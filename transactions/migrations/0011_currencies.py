@@ -0,0 +1,33 @@
+# Generated by Django 5.0.14 on 2026-10-18 13:00
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0010_budget'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExchangeRate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('currency', models.CharField(max_length=3, validators=[django.core.validators.RegexValidator('^[A-Z]{3}\\Z', 'Expected an ISO 4217 currency code such as USD.')])),
+                ('quote', models.CharField(max_length=3, validators=[django.core.validators.RegexValidator('^[A-Z]{3}\\Z', 'Expected an ISO 4217 currency code such as USD.')])),
+                ('date', models.DateField()),
+                ('rate', models.DecimalField(decimal_places=8, max_digits=14)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='account',
+            name='currency',
+            field=models.CharField(default='USD', max_length=3, validators=[django.core.validators.RegexValidator('^[A-Z]{3}\\Z', 'Expected an ISO 4217 currency code such as USD.')]),
+        ),
+        migrations.AddConstraint(
+            model_name='exchangerate',
+            constraint=models.UniqueConstraint(fields=('currency', 'quote', 'date'), name='unique_exchange_rate'),
+        ),
+    ]
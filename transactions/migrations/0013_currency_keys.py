@@ -0,0 +1,73 @@
+# Generated by Django 5.0.14 on 2026-10-18 14:01
+
+import django.core.validators
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Case, Count, F, Sum, When
+from django.db.models.functions import TruncMonth
+
+
+def split_by_currency(apps, schema_editor):
+    """Recompute summaries and budgets counting one currency each"""
+    Budget = apps.get_model('transactions', 'Budget')
+    MonthlySummary = apps.get_model('transactions', 'MonthlySummary')
+    Transaction = apps.get_model('transactions', 'Transaction')
+
+    MonthlySummary.objects.all().delete()
+    rows = Transaction.objects.annotate(
+        month=TruncMonth('date'), currency=F('account__currency'),
+    ).values(
+        'user_id', 'month', 'category_id', 'transaction_type_id', 'currency',
+    ).annotate(total=Sum('amount'), count=Count('id')).order_by()
+    MonthlySummary.objects.bulk_create(
+        (MonthlySummary(**row) for row in rows), batch_size=1000)
+
+    for budget in Budget.objects.select_related('user'):
+        budget.currency = budget.user.base_currency
+        budget.spent = Transaction.objects.filter(
+            category_id=budget.category_id,
+            account__currency=budget.currency,
+            date__range=(budget.start, budget.end),
+        ).aggregate(total=Sum(Case(
+            When(transaction_type__is_expense=True, then=F('amount')),
+            default=-F('amount'))))['total'] or 0
+        budget.save(update_fields=['currency', 'spent'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0012_move_dataversion'),
+        ('users', '0003_user_base_currency'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='budget',
+            name='unique_budget_period',
+        ),
+        migrations.RemoveConstraint(
+            model_name='monthlysummary',
+            name='unique_monthly_summary',
+        ),
+        migrations.AddField(
+            model_name='budget',
+            name='currency',
+            field=models.CharField(default='USD', max_length=3, validators=[django.core.validators.RegexValidator('^[A-Z]{3}\\Z', 'Expected an ISO 4217 currency code such as USD.')]),
+        ),
+        migrations.AddField(
+            model_name='monthlysummary',
+            name='currency',
+            field=models.CharField(default='USD', max_length=3, validators=[django.core.validators.RegexValidator('^[A-Z]{3}\\Z', 'Expected an ISO 4217 currency code such as USD.')]),
+        ),
+        migrations.RunPython(split_by_currency, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='budget',
+            constraint=models.UniqueConstraint(fields=('user', 'category', 'period', 'start', 'currency'), name='unique_budget_period'),
+        ),
+        migrations.AddConstraint(
+            model_name='monthlysummary',
+            constraint=models.UniqueConstraint(fields=('user', 'month', 'category', 'transaction_type', 'currency'), name='unique_monthly_summary'),
+        ),
+    ]
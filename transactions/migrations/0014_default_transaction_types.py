@@ -0,0 +1,25 @@
+from django.db import migrations
+
+# Name: is_expense, for the types transactions.defaults seeds categories of.
+DEFAULT_TYPES = {'Income': False, 'Expense': True}
+
+
+def create_default_types(apps, schema_editor):
+    TransactionType = apps.get_model('transactions', 'TransactionType')
+    existing = set(TransactionType.objects.filter(
+        name__in=DEFAULT_TYPES).values_list('name', flat=True))
+    TransactionType.objects.bulk_create(
+        TransactionType(name=name, is_expense=is_expense)
+        for name, is_expense in DEFAULT_TYPES.items()
+        if name not in existing)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0013_currency_keys'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_default_types, migrations.RunPython.noop),
+    ]
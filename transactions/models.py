@@ -1,6 +1,14 @@
-from django.db import models
+import datetime
+
+from django.db import models, transaction as db_transaction
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.validators import MinValueValidator
+from django.db.models.functions import Coalesce
+
+from users.models import validate_currency_code
+
+from . import schedules
 
 
 class Account(models.Model):
@@ -8,6 +16,10 @@ class Account(models.Model):
     name = models.CharField(max_length=255)
     description = models.TextField(blank=True, null=True)
     balance = models.DecimalField(max_digits=10, decimal_places=2)
+    # Currency of the balance and of every transaction on the account.
+    currency = models.CharField(max_length=3,
+                                default=settings.DEFAULT_CURRENCY,
+                                validators=[validate_currency_code])
     user = models.ForeignKey(settings.AUTH_USER_MODEL,
                              on_delete=models.CASCADE)
 
@@ -15,8 +27,31 @@ class Account(models.Model):
         return self.name
 
 
+class ExchangeRate(models.Model):
+    """
+    Value of one unit of `currency` in `quote` from `date` until the
+    pair's next rate. See transactions.fx.
+    """
+    currency = models.CharField(max_length=3,
+                                validators=[validate_currency_code])
+    quote = models.CharField(max_length=3,
+                             validators=[validate_currency_code])
+    date = models.DateField()
+    rate = models.DecimalField(max_digits=14, decimal_places=8)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['currency', 'quote', 'date'],
+                                    name='unique_exchange_rate'),
+        ]
+
+    def __str__(self):
+        return f'{self.currency}/{self.quote} {self.rate} on {self.date}'
+
+
 class TransactionType(models.Model):
     name = models.CharField(max_length=255)
+    is_expense = models.BooleanField(default=False)
 
     def __str__(self):
         return self.name
@@ -33,6 +68,16 @@ class Category(models.Model):
         return self.name
 
 
+class TransactionQuerySet(models.QuerySet):
+
+    def for_user(self, user):
+        return self.filter(user=user)
+
+    def with_related(self):
+        """Join every relation the transaction serializers read"""
+        return self.select_related('transaction_type', 'category', 'account')
+
+
 class Transaction(models.Model):
     transaction_type = models.ForeignKey(
         TransactionType, on_delete=models.CASCADE)
@@ -44,9 +89,264 @@ class Transaction(models.Model):
                              related_name='transactions')
     category = models.ForeignKey(Category,
                                  on_delete=models.CASCADE)
-    account = models.ForeignKey('contenttypes.ContentType',
+    account = models.ForeignKey(Account,
                                 on_delete=models.CASCADE,
                                 related_name='transactions')
 
+    objects = TransactionQuerySet.as_manager()
+
+    # Fields whose stored values the write hooks in signals.py need to
+    # reverse a transaction's effect on derived data.
+    TRACKED_FIELDS = ('user_id', 'account_id', 'transaction_type_id',
+                      'category_id', 'amount', 'date')
+
+    class Meta:
+        indexes = [
+            # Backs keyset pagination over (date DESC, id DESC) per user.
+            models.Index(fields=['user', 'date', 'id'],
+                         name='transaction_user_date_id_idx'),
+            # Back the list filters; see transactions.filters.
+            models.Index(fields=['user', 'category', 'date', 'id'],
+                         name='transaction_user_cat_date_idx'),
+            models.Index(fields=['user', 'account', 'date', 'id'],
+                         name='transaction_user_acct_date_idx'),
+            models.Index(fields=['user', 'transaction_type', 'date', 'id'],
+                         name='transaction_user_type_date_idx'),
+            models.Index(fields=['user', 'amount'],
+                         name='transaction_user_amount_idx'),
+        ]
+
     def __str__(self):
         return f'{self.transaction_type.name} - {self.amount} on {self.date}'
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def save(self, *args, **kwargs):
+        # The row and the derived data updated by its signal handlers must
+        # commit together.
+        with db_transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+
+    def tracked_values(self):
+        return {name: getattr(self, name) for name in self.TRACKED_FIELDS}
+
+    def stored_values(self):
+        """Return the tracked values as last read from the database"""
+        loaded = getattr(self, '_loaded_values', {})
+        if all(name in loaded for name in self.TRACKED_FIELDS):
+            return {name: loaded[name] for name in self.TRACKED_FIELDS}
+
+        return type(self)._base_manager.filter(pk=self.pk).values(
+            *self.TRACKED_FIELDS).first()
+
+
+class RecurringTransaction(models.Model):
+    """
+    Rule for a transaction that repeats, such as rent or salary. Its
+    occurrences are computed by transactions.schedules and written as
+    Transaction rows only once they are due; see transactions.recurring.
+    """
+
+    class Frequency(models.TextChoices):
+        DAILY = schedules.DAILY, 'Daily'
+        WEEKLY = schedules.WEEKLY, 'Weekly'
+        MONTHLY = schedules.MONTHLY, 'Monthly'
+        YEARLY = schedules.YEARLY, 'Yearly'
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL,
+                             on_delete=models.CASCADE,
+                             related_name='recurring_transactions')
+    transaction_type = models.ForeignKey(
+        TransactionType, on_delete=models.CASCADE)
+    category = models.ForeignKey(Category, on_delete=models.CASCADE)
+    account = models.ForeignKey(Account, on_delete=models.CASCADE)
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    description = models.TextField(blank=True, null=True)
+    frequency = models.CharField(max_length=1, choices=Frequency.choices)
+    interval = models.PositiveSmallIntegerField(
+        default=1, validators=[MinValueValidator(1)])
+    start_date = models.DateField()
+    end_date = models.DateField(blank=True, null=True)
+    # Every occurrence up to materialized_through is a Transaction row.
+    # next_occurrence is the first one after it, None once the rule ends.
+    materialized_through = models.DateField(blank=True, null=True)
+    next_occurrence = models.DateField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'next_occurrence'],
+                         name='recurring_user_next_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.get_frequency_display()} {self.amount} {self.category}'
+
+    def save(self, *args, **kwargs):
+        # An edited schedule continues after what has been written.
+        self.next_occurrence = self.first_occurrence_after(
+            self.materialized_through)
+        super().save(*args, **kwargs)
+
+    def occurrences(self, start, end):
+        """Return the dates this rule falls on from `start` to `end`"""
+        return schedules.occurrences(self.start_date, self.frequency,
+                                     self.interval, start, end, self.end_date)
+
+    def first_occurrence_after(self, date):
+        """Return the first occurrence after `date`, or the first of all"""
+        start = self.start_date if date is None else (
+            date + datetime.timedelta(days=1))
+        return next(iter(self.occurrences(start, datetime.date.max)), None)
+
+    def transaction(self, date):
+        """Return an unsaved Transaction for the occurrence on `date`"""
+        return Transaction(
+            user_id=self.user_id, transaction_type_id=self.transaction_type_id,
+            category_id=self.category_id, account_id=self.account_id,
+            amount=self.amount, description=self.description, date=date)
+
+
+class MonthlySummary(models.Model):
+    """
+    Rollup of a user's transactions per month, category, type and account
+    currency, kept up to date on every transaction write by
+    transactions.rollups.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL,
+                             on_delete=models.CASCADE,
+                             related_name='monthly_summaries')
+    month = models.DateField()
+    category = models.ForeignKey(Category, on_delete=models.CASCADE)
+    transaction_type = models.ForeignKey(
+        TransactionType, on_delete=models.CASCADE)
+    currency = models.CharField(max_length=3,
+                                default=settings.DEFAULT_CURRENCY,
+                                validators=[validate_currency_code])
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'month', 'category', 'transaction_type',
+                        'currency'],
+                name='unique_monthly_summary'),
+        ]
+
+    def __str__(self):
+        return (f'{self.month:%Y-%m} {self.category} - {self.total} '
+                f'{self.currency}')
+
+
+class Budget(models.Model):
+    """
+    Spending limit for one of a user's categories over a week, month or
+    year, in one currency. `spent` is the category's expenses in the period
+    less its income, counting only accounts in that currency, kept up to
+    date on every transaction write by transactions.budgets.
+    """
+
+    class Period(models.TextChoices):
+        WEEKLY = schedules.WEEKLY, 'Weekly'
+        MONTHLY = schedules.MONTHLY, 'Monthly'
+        YEARLY = schedules.YEARLY, 'Yearly'
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL,
+                             on_delete=models.CASCADE,
+                             related_name='budgets')
+    category = models.ForeignKey(Category, on_delete=models.CASCADE,
+                                 related_name='budgets')
+    period = models.CharField(max_length=1, choices=Period.choices)
+    # First and last day of the period, start being a Monday, the 1st of
+    # a month or 1 January.
+    start = models.DateField()
+    end = models.DateField()
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    currency = models.CharField(max_length=3,
+                                default=settings.DEFAULT_CURRENCY,
+                                validators=[validate_currency_code])
+    spent = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    # Percentage of `amount` at which spending raises an alert, besides
+    # going over budget at 100.
+    alert_percent = models.PositiveSmallIntegerField(
+        default=80, validators=[MinValueValidator(1)])
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'category', 'period', 'start', 'currency'],
+                name='unique_budget_period'),
+        ]
+        indexes = [
+            models.Index(fields=['category', 'start', 'end'],
+                         name='budget_category_period_idx'),
+        ]
+
+    def __str__(self):
+        return (f'{self.category} {self.start} - {self.end}: {self.amount} '
+                f'{self.currency}')
+
+    def save(self, *args, **kwargs):
+        self.start, self.end = schedules.period_bounds(self.period,
+                                                       self.start)
+        with db_transaction.atomic(using=kwargs.get('using')):
+            adding = self._state.adding
+            super().save(*args, **kwargs)
+            if adding:
+                # Later writes adjust spent; count what is already there.
+                # The insert came first, so the count runs holding the
+                # write lock that transaction writes take before looking
+                # for budgets: each transaction is counted here or by
+                # transactions.budgets, never both or neither.
+                type(self)._base_manager.filter(pk=self.pk).update(
+                    spent=Coalesce(models.Subquery(
+                        self.period_transactions().values(
+                            'category_id').annotate(
+                            total=self.spent_sum()).values('total')),
+                        0, output_field=models.DecimalField()))
+                self.refresh_from_db(fields=['spent'])
+
+    def period_transactions(self):
+        return Transaction.objects.filter(
+            category_id=self.category_id, account__currency=self.currency,
+            date__range=(self.start, self.end),
+        ).order_by()
+
+    @staticmethod
+    def spent_sum():
+        """Return the sum of expenses less income, such as refunds"""
+        return models.Sum(models.Case(
+            models.When(transaction_type__is_expense=True,
+                        then=models.F('amount')),
+            default=-models.F('amount')))
+
+    def computed_spent(self):
+        """Return what the period's transactions add up to, from the rows"""
+        total = self.period_transactions().aggregate(
+            total=self.spent_sum())['total']
+        return total or 0
+
+    @property
+    def thresholds(self):
+        """Return the alert percentages, in increasing order"""
+        return sorted({self.alert_percent, 100})
+
+    @property
+    def is_over(self):
+        return self.spent > self.amount
+
+
+class BudgetAlert(models.Model):
+    """A budget's spending crossing one of its thresholds upwards"""
+    budget = models.ForeignKey(Budget, on_delete=models.CASCADE,
+                               related_name='alerts')
+    percent = models.PositiveSmallIntegerField()
+    spent = models.DecimalField(max_digits=14, decimal_places=2)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'{self.budget} reached {self.percent}%'
@@ -0,0 +1,120 @@
+"""
+Pagination classes for the transactions app.
+"""
+import datetime
+from base64 import b64decode, b64encode
+from collections import namedtuple
+from urllib import parse
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+from rest_framework.utils.urls import replace_query_param
+
+
+Position = namedtuple('Position', ['date', 'pk', 'reverse'])
+
+
+class TransactionCursorPagination(CursorPagination):
+    """
+    Keyset pagination over (date DESC, id DESC).
+
+    The opaque cursor holds the (date, id) of the row on the page boundary,
+    so every page is a single range scan of the (user, date, id) index and
+    page 1000 costs the same as page 1.
+    """
+    ordering = ('-date', '-id')
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self.get_page_queryset(queryset, request)
+        if queryset is None:
+            return None
+        return self.set_page(list(queryset))
+
+    async def apaginate_queryset(self, queryset, request):
+        """Async variant of paginate_queryset using the async ORM"""
+        queryset = self.get_page_queryset(queryset, request)
+        if queryset is None:
+            return None
+        return self.set_page([item async for item in queryset])
+
+    def get_page_queryset(self, queryset, request):
+        """Return the unevaluated queryset for the requested page"""
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            queryset = queryset.order_by('-date', '-id')
+        elif self.cursor.reverse:
+            queryset = queryset.filter(date__gte=self.cursor.date).exclude(
+                date=self.cursor.date, id__lte=self.cursor.pk
+            ).order_by('date', 'id')
+        else:
+            queryset = queryset.filter(date__lte=self.cursor.date).exclude(
+                date=self.cursor.date, id__gte=self.cursor.pk
+            ).order_by('-date', '-id')
+
+        # Fetch one extra row to find out whether there is a further page.
+        return queryset[:self.page_size + 1]
+
+    def set_page(self, results):
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+
+        if self.cursor is not None and self.cursor.reverse:
+            self.page.reverse()
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.cursor is not None
+
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        last = self._get_position(self.page[-1], reverse=False)
+        return self.encode_cursor(last)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        first = self._get_position(self.page[0], reverse=True)
+        return self.encode_cursor(first)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+
+        try:
+            querystring = b64decode(encoded.encode('ascii')).decode('ascii')
+            tokens = parse.parse_qs(querystring, keep_blank_values=True)
+            date = datetime.date.fromisoformat(tokens['d'][0])
+            pk = int(tokens['i'][0])
+            reverse = bool(int(tokens.get('r', ['0'])[0]))
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+        return Position(date=date, pk=pk, reverse=reverse)
+
+    def encode_cursor(self, cursor):
+        tokens = {'d': cursor.date.isoformat(), 'i': str(cursor.pk)}
+        if cursor.reverse:
+            tokens['r'] = '1'
+
+        querystring = parse.urlencode(tokens, doseq=True)
+        encoded = b64encode(querystring.encode('ascii')).decode('ascii')
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, encoded)
+
+    def _get_position(self, item, reverse):
+        # Items are Transactions or values_list() rows naming id and date.
+        return Position(date=item.date, pk=item.id, reverse=reverse)
@@ -0,0 +1,117 @@
+"""
+Lazy materialization of recurring transactions.
+
+A RecurringTransaction is written as Transaction rows one due occurrence
+at a time, never ahead of the date: future rent and salary payments do
+not grow the table and its indexes. Transaction lists, searches,
+totals and exports, summaries and budget reads call materialize_due()
+for the end of the window they ask for, capped at today. It writes the occurrences since each rule's materialized_through,
+so its cost follows the time since the rules were last read, not their
+age. Occurrences in the future are only generated, by occurrences().
+
+Each user's earliest next occurrence is kept on the user row, which every
+request has already loaded, so a read with nothing due runs no extra
+query. Rules are claimed with a conditional update of next_occurrence,
+so concurrent reads write each occurrence once.
+"""
+import collections
+
+from asgiref.sync import sync_to_async
+
+from django.contrib.auth import get_user_model
+from django.db import transaction as db_transaction
+from django.db.models import Min, Q
+from django.utils import timezone
+
+from users.authentication import user_cache
+
+from . import signals
+from .models import RecurringTransaction, Transaction
+
+Occurrence = collections.namedtuple('Occurrence', 'rule date materialized')
+
+
+def refresh_next_due(user_id):
+    """Store the earliest next occurrence of the user's rules on the user"""
+    due = RecurringTransaction.objects.filter(user_id=user_id).aggregate(
+        due=Min('next_occurrence'))['due']
+    get_user_model().objects.filter(pk=user_id).update(
+        next_recurring_date=due)
+    user_cache.invalidate(user_id)
+    return due
+
+
+def materialize_due(user, through=None):
+    """
+    Write the occurrences of `user`'s rules due by `through`, or by today
+    if it is later or not given, and return the new transactions.
+    """
+    today = timezone.localdate()
+    through = today if through is None else min(through, today)
+    due = user.next_recurring_date
+    if due is None or due > through:
+        return []
+
+    created = []
+    with db_transaction.atomic():
+        rules = RecurringTransaction.objects.filter(
+            user=user, next_occurrence__lte=through).order_by('id')
+        for rule in rules:
+            claimed = RecurringTransaction.objects.filter(
+                pk=rule.pk, next_occurrence=rule.next_occurrence).update(
+                materialized_through=through,
+                next_occurrence=rule.first_occurrence_after(through))
+            if claimed:
+                created.extend(rule.transaction(date) for date in
+                               rule.occurrences(rule.next_occurrence, through))
+
+        Transaction.objects.bulk_create(created)
+        signals.post_transactions(
+            added=[transaction.tracked_values() for transaction in created])
+        user.next_recurring_date = refresh_next_due(user.pk)
+    return created
+
+
+async def amaterialize_due(user, through=None):
+    """Async variant of materialize_due for Django async views"""
+    due = user.next_recurring_date
+    if due is None or due > timezone.localdate():
+        return []
+    return await sync_to_async(materialize_due)(user, through)
+
+
+def occurrences(user, start, end):
+    """
+    Return every occurrence of `user`'s rules from `start` to `end`, both
+    inclusive, ordered by date. `materialized` tells those already written
+    as transactions from those still to come.
+    """
+    rules = RecurringTransaction.objects.filter(
+        Q(end_date__isnull=True) | Q(end_date__gte=start),
+        user=user, start_date__lte=end,
+    ).select_related('transaction_type', 'category', 'account')
+
+    found = [
+        Occurrence(rule, date, rule.materialized_through is not None
+                   and date <= rule.materialized_through)
+        for rule in rules for date in rule.occurrences(start, end)
+    ]
+    return sorted(found, key=lambda occurrence: (occurrence.date,
+                                                 occurrence.rule.pk))
+
+
+class MaterializeDueMixin:
+    """
+    Write the user's due recurring transactions before `materialize_actions`
+    read, up to the date get_materialize_through() returns.
+    """
+    materialize_actions = ('list',)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if self.action in self.materialize_actions:
+            materialize_due(request.user, self.get_materialize_through())
+
+    def get_materialize_through(self):
+        """Return the last date the request reads, None for no limit"""
+        return None
@@ -0,0 +1,129 @@
+"""
+Monthly per-category, per-type and per-currency rollups of transactions.
+
+MonthlySummary rows are adjusted incrementally on every transaction write,
+so summary reads never aggregate the raw Transaction table. rebuild() and
+verify() recompute them from scratch for repair and auditing.
+
+Amounts in different currencies are never added together: a transaction
+counts towards the summary for its account's currency.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction as db_transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncMonth
+
+from .ledger import account_currencies
+from .models import MonthlySummary, Transaction
+
+KEY_FIELDS = ('user_id', 'month', 'category_id', 'transaction_type_id',
+              'currency')
+
+
+def month_of(date):
+    return date.replace(day=1)
+
+
+def summary_key(values, currencies):
+    return (values['user_id'], month_of(values['date']),
+            values['category_id'], values['transaction_type_id'],
+            currencies.get(values['account_id']))
+
+
+def summary_deltas(added=(), removed=(), currencies=None):
+    """
+    Return {summary key: (total delta, count delta)} for the transactions
+    being added and removed, each given as a dict of tracked values.
+    `currencies` maps their account ids to currencies, looked up if None.
+    """
+    postings = ([(v, 1) for v in added if v]
+                + [(v, -1) for v in removed if v])
+    if currencies is None:
+        currencies = account_currencies(
+            values['account_id'] for values, _ in postings)
+
+    deltas = defaultdict(lambda: [Decimal(0), 0])
+    for values, direction in postings:
+        delta = deltas[summary_key(values, currencies)]
+        delta[0] += direction * Decimal(str(values['amount']))
+        delta[1] += direction
+
+    return {key: tuple(delta) for key, delta in deltas.items()
+            if delta[0] or delta[1]}
+
+
+def apply_summary_deltas(deltas):
+    for key, (total, count) in sorted(deltas.items()):
+        lookup = dict(zip(KEY_FIELDS, key))
+        rows = MonthlySummary.objects.filter(**lookup)
+        updated = rows.update(total=F('total') + total,
+                              count=F('count') + count)
+        # A removal with no row to apply to comes from a cascade that has
+        # already deleted the summary, so there is nothing to recreate.
+        if not updated and count >= 0:
+            try:
+                with db_transaction.atomic():
+                    MonthlySummary.objects.create(
+                        total=total, count=count, **lookup)
+            except IntegrityError:
+                # Another writer created the row first; add to theirs.
+                rows.update(total=F('total') + total,
+                            count=F('count') + count)
+        elif updated and count < 0:
+            rows.filter(count=0).delete()
+
+
+def post(added=(), removed=(), currencies=None):
+    apply_summary_deltas(summary_deltas(added, removed, currencies))
+
+
+def computed_summaries(user=None):
+    """Return {summary key: (total, count)} aggregated from raw transactions"""
+    transactions = Transaction.objects.all()
+    if user is not None:
+        transactions = transactions.filter(user=user)
+
+    rows = transactions.annotate(
+        month=TruncMonth('date'), currency=F('account__currency'),
+    ).values(
+        'user_id', 'month', 'category_id', 'transaction_type_id', 'currency',
+    ).annotate(total=Sum('amount'), count=Count('id')).order_by()
+
+    return {tuple(row[field] for field in KEY_FIELDS):
+            (row['total'], row['count']) for row in rows}
+
+
+def stored_summaries(user=None):
+    summaries = MonthlySummary.objects.all()
+    if user is not None:
+        summaries = summaries.filter(user=user)
+
+    return {tuple(row[:5]): tuple(row[5:]) for row in summaries.values_list(
+        *KEY_FIELDS, 'total', 'count')}
+
+
+def rebuild(user=None):
+    """Replace the stored rollups with ones recomputed from transactions"""
+    computed = computed_summaries(user)
+    with db_transaction.atomic():
+        summaries = MonthlySummary.objects.all()
+        if user is not None:
+            summaries = summaries.filter(user=user)
+        summaries.delete()
+        MonthlySummary.objects.bulk_create(
+            (MonthlySummary(total=total, count=count,
+                            **dict(zip(KEY_FIELDS, key)))
+             for key, (total, count) in computed.items()),
+            batch_size=1000,
+        )
+    return len(computed)
+
+
+def verify(user=None):
+    """Return the keys whose stored rollup differs from the raw data"""
+    computed = computed_summaries(user)
+    stored = stored_summaries(user)
+    return sorted(key for key in computed.keys() | stored.keys()
+                  if computed.get(key) != stored.get(key))
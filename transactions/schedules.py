@@ -0,0 +1,91 @@
+"""
+Date arithmetic for recurrence rules and budget periods.
+
+The nth occurrence of a rule is computed directly from its start date, so
+finding the occurrences in a window costs a constant jump to the window's
+start plus one step per occurrence in it, however long the rule has run.
+Monthly and yearly rules keep the start date's day of the month, clamped
+to shorter months: a rule starting on 31 January falls on 29 February in
+a leap year and on 31 March again.
+"""
+import calendar
+import datetime
+
+DAILY, WEEKLY, MONTHLY, YEARLY = 'D', 'W', 'M', 'Y'
+
+# Length of one step of each frequency, in days or in months.
+STEP_DAYS = {DAILY: 1, WEEKLY: 7}
+STEP_MONTHS = {MONTHLY: 1, YEARLY: 12}
+
+
+def add_months(date, months, day):
+    """Return `date` moved `months` months on, on `day` or the month's end"""
+    month = date.month - 1 + months
+    year = date.year + month // 12
+    month = month % 12 + 1
+    return datetime.date(year, month,
+                         min(day, calendar.monthrange(year, month)[1]))
+
+
+def nth_occurrence(start, frequency, interval, n):
+    if frequency in STEP_DAYS:
+        return start + datetime.timedelta(
+            days=n * interval * STEP_DAYS[frequency])
+    return add_months(start, n * interval * STEP_MONTHS[frequency],
+                      start.day)
+
+
+def first_index(start, frequency, interval, date):
+    """Return the index of the first occurrence on or after `date`"""
+    if date <= start:
+        return 0
+    if frequency in STEP_DAYS:
+        step = interval * STEP_DAYS[frequency]
+        return -(-(date - start).days // step)
+
+    step = interval * STEP_MONTHS[frequency]
+    months = (date.year - start.year) * 12 + date.month - start.month
+    n = months // step
+    # Occurrence n falls in or before date's month; the next one is later.
+    if nth_occurrence(start, frequency, interval, n) < date:
+        n += 1
+    return n
+
+
+def occurrences(start, frequency, interval, window_start, window_end,
+                end=None):
+    """
+    Yield the dates of the rule's occurrences from `window_start` to
+    `window_end`, both inclusive. `end` is the rule's last possible date.
+    """
+    if end is not None:
+        window_end = min(window_end, end)
+
+    n = first_index(start, frequency, interval, window_start)
+    while True:
+        try:
+            date = nth_occurrence(start, frequency, interval, n)
+        except (OverflowError, ValueError):
+            return  # Past datetime.date.max.
+        if date > window_end:
+            return
+        yield date
+        n += 1
+
+
+def period_bounds(period, date):
+    """
+    Return the first and last day of the week, month or year that `date`
+    falls in. Weeks start on Monday.
+    """
+    if period == WEEKLY:
+        start = date - datetime.timedelta(days=date.weekday())
+        return start, start + datetime.timedelta(days=6)
+    if period == MONTHLY:
+        start = date.replace(day=1)
+    elif period == YEARLY:
+        start = date.replace(month=1, day=1)
+    else:
+        raise ValueError(f'Unknown period {period!r}')
+    return start, add_months(start, STEP_MONTHS[period], 1) - (
+        datetime.timedelta(days=1))
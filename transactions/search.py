@@ -0,0 +1,151 @@
+"""
+Full-text search over transaction descriptions.
+
+On SQLite with FTS5 matching runs against an external-content FTS5 index,
+kept in sync with transactions_transaction by triggers created in
+migration 0007 so bulk inserts and queryset updates are indexed too. The
+user id is indexed alongside the description, so restricting matches to
+one user is a posting-list intersection inside the index. Other backends
+match with LIKE.
+
+FTS5 ranks the matches itself: the query orders them by bm25() over the
+description, with the user id column weighted zero, and returns only the
+best `limit`, ties most recently recorded first. Every match is scored,
+so an old transaction that matches best still comes first. The LIKE
+fallback narrows matches to word prefixes in SQL and reads only the most
+recent LIKE_CANDIDATES times `limit` of them, which it scores with a BM25
+score computed in Python. An older match outside those is not found.
+"""
+import functools
+import re
+import unicodedata
+
+from django.db import connection
+
+from .models import Transaction
+
+FTS_TABLE = 'transactions_transaction_fts'
+# Words as FTS5's unicode61 tokenizer splits them: runs of letters and
+# digits, so underscores separate words too.
+WORD = re.compile(r'[^\W_]+')
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Matches the LIKE fallback ranks per result it returns.
+LIKE_CANDIDATES = 10
+
+
+def words(text):
+    """Return the case and accent folded words of `text`"""
+    if text is None or text.isascii():
+        return WORD.findall((text or '').lower())
+    decomposed = unicodedata.normalize('NFKD', text)
+    folded = ''.join(char for char in decomposed
+                     if not unicodedata.combining(char))
+    return WORD.findall(folded.casefold())
+
+
+def has_index():
+    """Return whether migration 0007 created the FTS5 index here"""
+    if connection.vendor != 'sqlite':
+        return False
+    return _has_index(connection.settings_dict['NAME'])
+
+
+@functools.cache
+def _has_index(name):
+    # The index is created at migrate time, so one look per database
+    # lasts the process.
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s",
+            [FTS_TABLE])
+        return cursor.fetchone() is not None
+
+
+def match_expression(user_id, terms):
+    """
+    Return an FTS5 query matching `user_id` and every term as a prefix.
+    """
+    prefixes = ' '.join(f'"{term}"*' for term in terms)
+    return f'user_id : "{int(user_id)}" AND description : ({prefixes})'
+
+
+def indexed_ids(user, terms, limit):
+    """Return the ids of `user`'s best `limit` matches ranked by FTS5"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            SELECT rowid FROM {FTS_TABLE}
+            WHERE {FTS_TABLE} MATCH %s AND rank MATCH 'bm25(1.0, 0.0)'
+            ORDER BY rank, rowid DESC LIMIT %s
+            """,
+            [match_expression(user.id, terms), limit])
+        return [pk for pk, in cursor.fetchall()]
+
+
+def like_ids(user, terms, limit):
+    """Return the ids of `user`'s best `limit` matches found with LIKE"""
+    queryset = Transaction.objects.for_user(user)
+    for term in terms:
+        # LIKE also matches inside words. The regex keeps the matches
+        # preceded by a non-alphanumeric ASCII character. That is a
+        # superset of word starts once accents are folded, so the exact
+        # check happens in Python below.
+        queryset = queryset.filter(
+            description__icontains=term,
+            description__iregex=rf'(^|[^a-z0-9]){re.escape(term)}')
+    rows = queryset.order_by('-id').values_list(
+        'id', 'description')[:limit * LIKE_CANDIDATES]
+    return rank([row for row in rows if matches(words(row[1]), terms)],
+                terms)[:limit]
+
+
+def matches(document, terms):
+    return all(any(word.startswith(term) for word in document)
+               for term in terms)
+
+
+def rank(rows, terms):
+    """
+    Return the ids of `rows`, (id, description) pairs, best match first:
+    by BM25 over the rows' descriptions, counting each word a term is a
+    prefix of as FTS5 does, then most recently recorded first.
+    """
+    documents = [words(description) for _, description in rows]
+    average = sum(map(len, documents)) / len(documents) if documents else 0
+
+    def score(document):
+        total = 0.0
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * len(document) / average)
+        for term in terms:
+            frequency = sum(word.startswith(term) for word in document)
+            total += frequency * (BM25_K1 + 1) / (frequency + norm)
+        return total
+
+    scored = sorted(
+        ((score(document), pk)
+         for (pk, _), document in zip(rows, documents)),
+        reverse=True)
+    return [pk for _, pk in scored]
+
+
+def search_ids(user, query, limit):
+    """Return the ids of `user`'s best matches for `query`, best first"""
+    terms = words(query)
+    if not terms:
+        return []
+    if has_index():
+        return indexed_ids(user, terms, limit)
+    return like_ids(user, terms, limit)
+
+
+def search_transactions(user, query, limit=50, queryset=None):
+    """
+    Return `user`'s transactions whose description has a word starting
+    with each word of `query`, best match first.
+    """
+    ids = search_ids(user, query, limit)
+    if queryset is None:
+        queryset = Transaction.objects.for_user(user)
+    found = queryset.in_bulk(ids)
+    return [found[pk] for pk in ids if pk in found]
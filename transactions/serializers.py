@@ -1,37 +1,188 @@
+import copy
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import IntegrityError, transaction as db_transaction
+
 from rest_framework import serializers
-from .models import TransactionType, Transaction, Category, Account
+
+from dimewise.timing import TimedSerializerMixin
+
+from .cache import get_categories, get_transaction_types
+from .fieldsets import SparseFieldsSerializerMixin
+from . import schedules
+from .models import (
+    TransactionType, Transaction, Category, Account, MonthlySummary,
+    RecurringTransaction, Budget, BudgetAlert)
+from .signals import post_categories
+
+
+class CachedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    Primary key field resolved from a transactions.cache lookup instead of
+    a query. `lookup(field, pk)` returns the cached {pk: instance} map.
+    Each value is a copy, so changes to it never reach the cache.
+    """
+
+    def __init__(self, lookup, **kwargs):
+        self.lookup = lookup
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            pk = int(data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+
+        instance = self.lookup(self, pk).get(pk)
+        if instance is None:
+            self.fail('does_not_exist', pk_value=data)
+        return copy.copy(instance)
+
+
+class CachedRelationsMixin:
+    """
+    Serializer with CachedPrimaryKeyRelatedFields. A row deleted by
+    another process can still be in our cache for up to
+    REFERENCE_CACHE_CHECK_INTERVAL, and saving a reference to it fails
+    the foreign key check when the write commits. That failure is
+    reported as the field's does_not_exist error, not a server error.
+    """
+
+    def save(self, **kwargs):
+        try:
+            with db_transaction.atomic():
+                return super().save(**kwargs)
+        except IntegrityError:
+            errors = self.stale_relation_errors()
+            if not errors:
+                raise
+            raise serializers.ValidationError(errors)
+
+    def stale_relation_errors(self):
+        errors = {}
+        for name, field in self.fields.items():
+            related = self.validated_data.get(name)
+            if (isinstance(field, CachedPrimaryKeyRelatedField)
+                    and related is not None
+                    and not type(related)._base_manager.filter(
+                        pk=related.pk).exists()):
+                errors[name] = [field.error_messages['does_not_exist'].format(
+                    pk_value=related.pk)]
+        return errors
+
+
+def _cached_transaction_types(field, pk):
+    return get_transaction_types(require=[pk])
 
 
-class AccountSerializer(serializers.ModelSerializer):
+def _cached_user_categories(field, pk):
+    request = field.context.get('request')
+    if request is None:
+        return Category.objects.in_bulk([pk])
+    return get_categories(request.user.id, require=[pk])
+
+
+class OpeningBalanceMixin:
+    """
+    Accept an account's balance only as its opening balance. Afterwards the
+    ledger keeps it in step with the account's transactions.
+    """
+
+    def get_extra_kwargs(self):
+        extra_kwargs = super().get_extra_kwargs()
+        if self.instance is not None:
+            extra_kwargs['balance'] = {
+                **extra_kwargs.get('balance', {}), 'read_only': True}
+        return extra_kwargs
+
+
+class AccountSerializer(TimedSerializerMixin, OpeningBalanceMixin,
+                        SparseFieldsSerializerMixin,
+                        serializers.ModelSerializer):
 
     class Meta:
         model = Account
-        fields = ['id', 'name', 'account_type', 'balance']
+        fields = ['id', 'name', 'account_type', 'balance', 'currency']
         read_only_fields = ['id']
 
 
-class AccountDetailSerializer(serializers.ModelSerializer):
+class AccountDetailSerializer(TimedSerializerMixin, OpeningBalanceMixin,
+                              SparseFieldsSerializerMixin,
+                              serializers.ModelSerializer):
 
     class Meta:
         model = Account
         fields = '__all__'
-        read_only_fields = ['id']
+        read_only_fields = ['id', 'user']
+
+    def validate_currency(self, value):
+        if (self.instance is not None and value != self.instance.currency
+                and self.instance.transactions.exists()):
+            raise serializers.ValidationError(
+                'Cannot change the currency of an account with transactions.')
+        return value
 
 
-class TransactionTypeSerializer(serializers.ModelSerializer):
+class TransactionTypeSerializer(TimedSerializerMixin,
+                                serializers.ModelSerializer):
     class Meta:
         model = TransactionType
         fields = '__all__'
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategoryListSerializer(serializers.ListSerializer):
+    """
+    Create or update many categories with one bulk query each. Updates
+    pair `instance`, a list, with the payload items by position.
+    """
+
+    def create(self, validated_data):
+        categories = Category.objects.bulk_create(
+            Category(**attrs) for attrs in validated_data)
+        post_categories(category.user_id for category in categories)
+        return categories
+
+    def update(self, instance, validated_data):
+        fields = set()
+        for category, attrs in zip(instance, validated_data):
+            for field, value in attrs.items():
+                setattr(category, field, value)
+            fields.update(attrs)
+
+        if fields:
+            Category.objects.bulk_update(instance, sorted(fields))
+            post_categories(category.user_id for category in instance)
+        return instance
+
+
+class CategorySerializer(TimedSerializerMixin, CachedRelationsMixin,
+                         serializers.ModelSerializer):
+    transaction_type = CachedPrimaryKeyRelatedField(
+        _cached_transaction_types, queryset=TransactionType.objects.all(),
+        write_only=True, required=False)
+
     class Meta:
         model = Category
-        fields = ['id', 'name']
+        fields = ['id', 'name', 'transaction_type']
         read_only_fields = ['id']
+        list_serializer_class = CategoryListSerializer
+
+    def validate(self, attrs):
+        # Optional on updates, so renaming does not need the type resent.
+        if (self.instance is None and not self.partial
+                and 'transaction_type' not in attrs):
+            raise serializers.ValidationError({
+                'transaction_type': [self.fields['transaction_type']
+                                     .error_messages['required']]})
+        return attrs
 
 
-class TransactionListSerializer(serializers.ModelSerializer):
+class TransactionListSerializer(TimedSerializerMixin,
+                                SparseFieldsSerializerMixin,
+                                serializers.ModelSerializer):
     category = serializers.ReadOnlyField(source='category.name')
     account = serializers.ReadOnlyField(source='account.name')
     transaction_type = TransactionTypeSerializer()
@@ -42,7 +193,9 @@ class TransactionListSerializer(serializers.ModelSerializer):
                   'amount', 'date', 'category', 'account']
 
 
-class TransactionDetailSerializer(serializers.ModelSerializer):
+class TransactionDetailSerializer(TimedSerializerMixin,
+                                  SparseFieldsSerializerMixin,
+                                  serializers.ModelSerializer):
     category = serializers.ReadOnlyField(source='category.name')
     account = serializers.ReadOnlyField(source='account.name')
     transaction_type = TransactionTypeSerializer()
@@ -52,7 +205,148 @@ class TransactionDetailSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
-class TransactionCreateSerializer(serializers.ModelSerializer):
+def validate_owned_relations(serializer, attrs):
+    """Reject an account or category of another user than the requester"""
+    request = serializer.context.get('request')
+    if request is None:
+        return attrs
+
+    for field in ('account', 'category'):
+        related = attrs.get(field)
+        if related is not None and related.user_id != request.user.id:
+            raise serializers.ValidationError(
+                {field: f'Invalid pk "{related.pk}" - object does not exist.'})
+
+    return attrs
+
+
+class TransactionCreateSerializer(TimedSerializerMixin,
+                                  CachedRelationsMixin,
+                                  serializers.ModelSerializer):
+    transaction_type = CachedPrimaryKeyRelatedField(
+        _cached_transaction_types, queryset=TransactionType.objects.all())
+    category = CachedPrimaryKeyRelatedField(
+        _cached_user_categories, queryset=Category.objects.all())
+
     class Meta:
         model = Transaction
         fields = '__all__'
+        read_only_fields = ['id', 'user']
+
+    def validate(self, attrs):
+        return validate_owned_relations(self, attrs)
+
+
+class RecurringTransactionSerializer(TimedSerializerMixin,
+                                     CachedRelationsMixin,
+                                     serializers.ModelSerializer):
+    transaction_type = CachedPrimaryKeyRelatedField(
+        _cached_transaction_types, queryset=TransactionType.objects.all())
+    category = CachedPrimaryKeyRelatedField(
+        _cached_user_categories, queryset=Category.objects.all())
+
+    class Meta:
+        model = RecurringTransaction
+        fields = ['id', 'transaction_type', 'category', 'account', 'amount',
+                  'description', 'frequency', 'interval', 'start_date',
+                  'end_date', 'next_occurrence']
+        read_only_fields = ['id', 'next_occurrence']
+
+    def validate(self, attrs):
+        start_date = attrs.get('start_date', getattr(
+            self.instance, 'start_date', None))
+        end_date = attrs.get('end_date', getattr(
+            self.instance, 'end_date', None))
+        if end_date is not None and end_date < start_date:
+            raise serializers.ValidationError(
+                {'end_date': 'Expected a date on or after start_date.'})
+        return validate_owned_relations(self, attrs)
+
+
+class OccurrenceSerializer(TimedSerializerMixin, serializers.Serializer):
+    """Serializer for transactions.recurring.Occurrence"""
+    recurring = serializers.IntegerField(source='rule.id')
+    date = serializers.DateField()
+    amount = serializers.DecimalField(
+        max_digits=10, decimal_places=2, source='rule.amount')
+    description = serializers.CharField(source='rule.description')
+    transaction_type = serializers.CharField(
+        source='rule.transaction_type.name')
+    category = serializers.CharField(source='rule.category.name')
+    account = serializers.CharField(source='rule.account.name')
+    materialized = serializers.BooleanField()
+
+
+class MonthlySummarySerializer(TimedSerializerMixin,
+                               serializers.ModelSerializer):
+    category = serializers.ReadOnlyField(source='category.name')
+    transaction_type = serializers.ReadOnlyField(
+        source='transaction_type.name')
+
+    class Meta:
+        model = MonthlySummary
+        fields = ['month', 'category', 'transaction_type', 'currency', 'total',
+                  'count']
+
+
+class BudgetSerializer(TimedSerializerMixin, CachedRelationsMixin,
+                       serializers.ModelSerializer):
+    """
+    Serializer for budgets. `start` may be any day of the period; it is
+    stored as the period's first day. `currency` defaults to the user's
+    base currency. The category, period and currency are fixed once the
+    budget exists.
+    """
+    category = CachedPrimaryKeyRelatedField(
+        _cached_user_categories, queryset=Category.objects.all())
+    amount = serializers.DecimalField(max_digits=10, decimal_places=2,
+                                      min_value=Decimal('0.01'))
+    is_over = serializers.BooleanField(read_only=True)
+
+    class Meta:
+        model = Budget
+        fields = ['id', 'category', 'period', 'start', 'end', 'amount',
+                  'currency', 'alert_percent', 'spent', 'is_over']
+        extra_kwargs = {'currency': {'required': False}}
+        read_only_fields = ['id', 'end', 'spent']
+
+    def validate(self, attrs):
+        request = self.context.get('request')
+        if self.instance is not None:
+            current = {'category': self.instance.category,
+                       'period': self.instance.period,
+                       'start': self.instance.start,
+                       'currency': self.instance.currency}
+            if 'start' in attrs:
+                attrs['start'], _ = schedules.period_bounds(
+                    self.instance.period, attrs['start'])
+            for field, value in current.items():
+                if attrs.get(field, value) != value:
+                    raise serializers.ValidationError(
+                        {field: 'Cannot be changed; create a new budget.'})
+            return attrs
+
+        category = attrs['category']
+        if request is not None and category.user_id != request.user.id:
+            raise serializers.ValidationError(
+                {'category': f'Invalid pk "{category.pk}" - object does not '
+                             f'exist.'})
+
+        if 'currency' not in attrs and request is not None:
+            attrs['currency'] = request.user.base_currency
+
+        start, _ = schedules.period_bounds(attrs['period'], attrs['start'])
+        if Budget.objects.filter(
+                category=category, period=attrs['period'], start=start,
+                currency=attrs.get('currency', settings.DEFAULT_CURRENCY),
+        ).exists():
+            raise serializers.ValidationError(
+                {'start': 'This category already has a budget for the '
+                          'period in this currency.'})
+        return attrs
+
+
+class BudgetAlertSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    class Meta:
+        model = BudgetAlert
+        fields = ['percent', 'spent', 'created_at']
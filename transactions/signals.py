@@ -0,0 +1,125 @@
+"""
+Signal handlers that keep data derived from transactions up to date.
+
+Transaction.save() runs inside an atomic block and deletes run inside the
+deletion collector's, so every adjustment made here commits or rolls back
+with the write that caused it. Bulk paths that bypass signals call
+post_transactions() directly.
+"""
+from django.db.models.signals import (
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import receiver
+
+from core import versions
+
+from . import budgets, cache, ledger, recurring, rollups
+from .models import (
+    Account,
+    Category,
+    RecurringTransaction,
+    Transaction,
+    TransactionType,
+)
+
+
+def post_transactions(added=(), removed=(), currencies=None):
+    """
+    Apply transactions being added to and removed from the books, each
+    given as a dict of Transaction.TRACKED_FIELDS, to all derived data.
+    `currencies` maps their account ids to currencies, looked up if None.
+    """
+    ledger.post(added, removed)
+    if currencies is None:
+        currencies = ledger.account_currencies(
+            values['account_id'] for values in (*added, *removed) if values)
+    rollups.post(added, removed, currencies)
+    budgets.post(added, removed, currencies)
+    versions.bump_user_collections(
+        (values['user_id'] for values in (*added, *removed) if values),
+        ('transactions', 'accounts'))
+
+
+def delete_transactions(transactions):
+    """
+    Delete the Transaction queryset `transactions` and reverse their
+    effect on derived data in one batch, rather than once per row as a
+    cascading delete would. Returns the number of transactions deleted.
+    """
+    removed = list(transactions.values(*Transaction.TRACKED_FIELDS))
+    if not removed:
+        return 0
+    # No model references a transaction, so the rows can be deleted with
+    # one statement, as the deletion collector's fast path does, without
+    # sending per-row signals.
+    transactions._raw_delete(transactions.db)
+    post_transactions(removed=removed)
+    return len(removed)
+
+
+@receiver(pre_save, sender=Transaction)
+def remember_stored_transaction(sender, instance, raw, **kwargs):
+    if raw or instance._state.adding:
+        instance._previous_values = None
+    else:
+        instance._previous_values = instance.stored_values()
+
+
+@receiver(post_save, sender=Transaction)
+def apply_saved_transaction(sender, instance, raw, **kwargs):
+    if raw:
+        return
+
+    current = instance.tracked_values()
+    post_transactions(added=[current], removed=[instance._previous_values])
+    instance._loaded_values = current
+
+
+@receiver(pre_delete, sender=Transaction)
+def remember_deleted_transaction(sender, instance, **kwargs):
+    instance._previous_values = instance.stored_values()
+
+
+@receiver(post_delete, sender=Transaction)
+def revert_deleted_transaction(sender, instance, **kwargs):
+    post_transactions(removed=[instance._previous_values])
+
+
+@receiver(post_save, sender=TransactionType)
+@receiver(post_delete, sender=TransactionType)
+def invalidate_transaction_types(sender, instance, **kwargs):
+    cache.transaction_types.invalidate()
+
+
+def post_categories(user_ids):
+    """
+    Record changes to the categories of `user_ids`, for writes such as
+    bulk_create() and bulk_update() that send no signals.
+    """
+    user_ids = set(user_ids)
+    for user_id in user_ids:
+        cache.categories.invalidate(user_id)
+    versions.bump_user_collections(user_ids, ('categories', 'transactions'))
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_categories(sender, instance, **kwargs):
+    post_categories([instance.user_id])
+
+
+@receiver(post_save, sender=Account)
+@receiver(post_delete, sender=Account)
+def bump_account_versions(sender, instance, **kwargs):
+    versions.bump_user_collections(
+        [instance.user_id], ('accounts', 'transactions'))
+
+
+@receiver(post_save, sender=RecurringTransaction)
+@receiver(post_delete, sender=RecurringTransaction)
+def schedule_recurring_transaction(sender, instance, raw=False, **kwargs):
+    if not raw:
+        recurring.refresh_next_due(instance.user_id)
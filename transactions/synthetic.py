@@ -0,0 +1,198 @@
+"""
+Synthetic users and transaction histories for local benchmarking.
+
+Volumes follow a Zipf-like skew: with `skew` s the i-th user gets a share
+of the transactions proportional to 1 / i ** s, so s = 0 spreads them
+evenly and s around 1 gives a few heavy users and a long tail, as in
+production. Every user is also paid a salary and pays rent monthly from
+the day after `end`, as recurring transactions, and has monthly budgets
+for a few categories in the month of `end`. Everything is drawn from
+one seeded random generator and `end` defaults to a fixed date, so a
+seed always produces the same data set.
+"""
+import datetime
+import random
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction as db_transaction
+
+from .models import (
+    Account,
+    Budget,
+    Category,
+    RecurringTransaction,
+    Transaction,
+    TransactionType,
+)
+from .signals import post_transactions
+
+ACCOUNTS = (
+    ('Checking', 'CHK'),
+    ('Credit Card', 'CRD'),
+    ('Cash', 'CSH'),
+    ('Savings', 'SAV'),
+)
+# name: (is expense, relative frequency, typical amount, merchants)
+CATEGORIES = {
+    'Dining': (True, 30, 25, ('Corner Coffee', 'Pizza Place', 'Noodle Bar',
+                              'Burger Joint')),
+    'Groceries': (True, 25, 60, ('FreshMart', 'Corner Market',
+                                 'Green Grocer')),
+    'Transport': (True, 15, 30, ('Fuel Station', 'Metro Card', 'Taxi')),
+    'Shopping': (True, 10, 70, ('Online Store', 'Bookshop',
+                                'Hardware Store')),
+    'Entertainment': (True, 6, 20, ('Cinema', 'Streaming Service',
+                                    'Concert Hall')),
+    'Utilities': (True, 4, 80, ('City Power', 'Water Utility',
+                                'Internet Co')),
+    'Health': (True, 4, 50, ('Pharmacy', 'Dental Clinic')),
+    'Salary': (False, 3, 2500, ('Payroll ACME Corp',)),
+    'Rent': (True, 2, 1200, ('Rent - Landlord',)),
+    'Interest': (False, 1, 5, ('Savings Interest',)),
+}
+# Categories paid monthly by every user, at their typical amount.
+RECURRING = ('Salary', 'Rent')
+# Categories with a monthly budget of ten times their typical amount.
+BUDGETED = ('Dining', 'Groceries', 'Shopping')
+FIRST_NAMES = ('Alex', 'Sam', 'Jordan', 'Taylor', 'Morgan', 'Casey', 'Riley',
+               'Jamie', 'Avery', 'Quinn')
+LAST_NAMES = ('Santos', 'Reyes', 'Cruz', 'Garcia', 'Lim', 'Tan', 'Lopez',
+              'Dela Cruz', 'Mendoza', 'Bautista')
+CENT = Decimal('0.01')
+# Last day of generated histories unless another is given.
+DEFAULT_END = datetime.date(2024, 12, 31)
+
+
+def user_volumes(users, transactions, skew):
+    """Split users * transactions rows between the users by Zipf weight"""
+    weights = [1 / (rank ** skew) for rank in range(1, users + 1)]
+    total = users * transactions
+    scale = total / sum(weights)
+    return [round(weight * scale) for weight in weights]
+
+
+class Generator:
+    """
+    Create `users` users with accounts, categories and on average
+    `transactions` transactions each, dated within `days` days of `end`.
+    """
+
+    def __init__(self, users, transactions, skew=1.0, seed=0, days=730,
+                 end=DEFAULT_END, password='synthetic-pass', prefix='synthetic',
+                 batch_size=5000):
+        self.users = users
+        self.transactions = transactions
+        self.skew = skew
+        self.rng = random.Random(seed)
+        self.days = days
+        self.end = end
+        self.password = password
+        self.prefix = prefix
+        self.batch_size = batch_size
+        self.created = {'users': 0, 'accounts': 0, 'categories': 0,
+                        'transactions': 0, 'recurring transactions': 0,
+                        'budgets': 0}
+
+    def run(self):
+        types = self.transaction_types()
+        hashed = make_password(self.password)
+        volumes = user_volumes(self.users, self.transactions, self.skew)
+
+        for number, volume in enumerate(volumes):
+            with db_transaction.atomic():
+                user = self.create_user(number, hashed)
+                accounts = self.create_accounts(user)
+                categories = self.create_categories(user, types)
+                self.create_transactions(user, accounts, categories, types,
+                                         volume)
+                self.create_recurring(user, accounts[0], categories, types)
+                self.create_budgets(user, categories)
+        return self.created
+
+    def transaction_types(self):
+        return {
+            is_expense: TransactionType.objects.get_or_create(
+                name='Expense' if is_expense else 'Income',
+                is_expense=is_expense)[0]
+            for is_expense in (True, False)
+        }
+
+    def create_user(self, number, hashed):
+        self.created['users'] += 1
+        return get_user_model().objects.create(
+            email=f'{self.prefix}-{number}@example.com', password=hashed,
+            first_name=self.rng.choice(FIRST_NAMES),
+            last_name=self.rng.choice(LAST_NAMES))
+
+    def create_accounts(self, user):
+        count = self.rng.randint(1, len(ACCOUNTS))
+        accounts = Account.objects.bulk_create(
+            Account(user=user, name=name, account_type=account_type,
+                    balance=0)
+            for name, account_type in ACCOUNTS[:count])
+        self.created['accounts'] += len(accounts)
+        return accounts
+
+    def create_categories(self, user, types):
+        categories = Category.objects.bulk_create(
+            Category(user=user, name=name,
+                     transaction_type=types[is_expense])
+            for name, (is_expense, *_) in CATEGORIES.items())
+        self.created['categories'] += len(categories)
+        return categories
+
+    def create_transactions(self, user, accounts, categories, types, volume):
+        specs = list(CATEGORIES.values())
+        frequencies = [frequency for _, frequency, *_ in specs]
+        # Earlier accounts are used more, as with a main checking account.
+        account_weights = [1 / rank for rank in range(1, len(accounts) + 1)]
+        batch = []
+
+        for _ in range(volume):
+            index = self.rng.choices(range(len(specs)), frequencies)[0]
+            is_expense, _, typical, merchants = specs[index]
+            amount = Decimal(typical * self.rng.lognormvariate(0, 0.5))
+            batch.append(Transaction(
+                user=user, category=categories[index],
+                transaction_type=types[is_expense],
+                account=self.rng.choices(accounts, account_weights)[0],
+                amount=max(amount.quantize(CENT), CENT),
+                description=self.rng.choice(merchants),
+                date=self.end - datetime.timedelta(
+                    days=self.rng.randrange(self.days))))
+
+            if len(batch) >= self.batch_size:
+                self.write(batch)
+                batch = []
+        if batch:
+            self.write(batch)
+
+    def create_recurring(self, user, account, categories, types):
+        names = list(CATEGORIES)
+        for name in RECURRING:
+            is_expense, _, typical, merchants = CATEGORIES[name]
+            RecurringTransaction.objects.create(
+                user=user, account=account,
+                category=categories[names.index(name)],
+                transaction_type=types[is_expense], amount=typical,
+                description=merchants[0],
+                frequency=RecurringTransaction.Frequency.MONTHLY,
+                start_date=self.end + datetime.timedelta(days=1))
+            self.created['recurring transactions'] += 1
+
+    def create_budgets(self, user, categories):
+        names = list(CATEGORIES)
+        for name in BUDGETED:
+            Budget.objects.create(
+                user=user, category=categories[names.index(name)],
+                period=Budget.Period.MONTHLY, start=self.end,
+                amount=CATEGORIES[name][2] * 10)
+            self.created['budgets'] += 1
+
+    def write(self, batch):
+        Transaction.objects.bulk_create(batch)
+        post_transactions(
+            added=[transaction.tracked_values() for transaction in batch])
+        self.created['transactions'] += len(batch)
@@ -0,0 +1,157 @@
+"""
+Tests for the async read-only transaction and category views
+"""
+import datetime
+from decimal import Decimal
+
+from asgiref.sync import async_to_sync
+
+from django.contrib.auth import get_user_model
+from django.test import AsyncClient, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from transactions.models import (
+    Account,
+    Category,
+    RecurringTransaction,
+    Transaction,
+    TransactionType,
+)
+from users.authentication import user_cache
+
+CATEGORY_URL = reverse('async-category-list')
+TRANSACTION_URL = reverse('async-transaction-list')
+
+
+def detail_url(name, pk):
+    return reverse(f'async-{name}-detail', args=[pk])
+
+
+def create_user(**params):
+    return get_user_model().objects.create_user(**params)
+
+
+def auth_headers(user):
+    return {'Authorization': f'Bearer {AccessToken.for_user(user)}'}
+
+
+class AsyncViewTests(TestCase):
+    """Test the async views return what the sync API returns"""
+
+    def setUp(self):
+        user_cache.clear()
+        self.user = create_user(email='test@example.com', password='pass1234')
+        self.other = create_user(email='other@example.com', password='pass1234')
+        self.headers = auth_headers(self.user)
+        self.client = AsyncClient()
+        self.sync_client = APIClient()
+        self.sync_client.force_authenticate(self.user)
+
+        self.transaction_type = transaction_type = (
+            TransactionType.objects.create(name='Expense'))
+        self.category = Category.objects.create(
+            name='Food', user=self.user, transaction_type=transaction_type)
+        self.account = account = Account.objects.create(
+            name='Cash', account_type='CSH', balance=0, user=self.user)
+        self.transactions = [
+            Transaction.objects.create(
+                user=self.user, transaction_type=transaction_type,
+                category=self.category, account=account,
+                amount=Decimal('1.50'),
+                date=datetime.date(2024, 1, 1) + datetime.timedelta(days=i))
+            for i in range(5)
+        ]
+
+    async def test_auth_required(self):
+        """Test an unauthenticated request is rejected"""
+        res = await self.client.get(TRANSACTION_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertIn('detail', res.json())
+
+    async def test_invalid_token_rejected(self):
+        """Test a malformed token is rejected"""
+        res = await self.client.get(
+            TRANSACTION_URL, headers={'Authorization': 'Bearer not-a-token'})
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_only_get_allowed(self):
+        """Test the async views are read-only"""
+        res = await self.client.post(TRANSACTION_URL, {},
+                                     headers=self.headers)
+
+        self.assertEqual(res.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+    def test_transaction_pages_match_sync_list(self):
+        """Test walking the async list gives the sync pages"""
+        url = f'{TRANSACTION_URL}?page_size=2'
+        sync_url = f'{reverse("transaction-list")}?page_size=2'
+
+        while url:
+            res = self.async_get(url)
+            sync_res = self.sync_client.get(sync_url)
+
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertEqual(res.json()['results'],
+                             sync_res.json()['results'])
+            url, sync_url = res.json()['next'], sync_res.json()['next']
+
+        self.assertIsNone(sync_url)
+
+    def test_transaction_list_writes_due_occurrences(self):
+        """Test the async list writes due recurring transactions first"""
+        today = timezone.localdate()
+        RecurringTransaction.objects.create(
+            user=self.user, transaction_type=self.transaction_type,
+            category=self.category, account=self.account,
+            amount=Decimal('9.00'),
+            frequency=RecurringTransaction.Frequency.WEEKLY,
+            start_date=today - datetime.timedelta(days=7))
+
+        res = self.async_get(TRANSACTION_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([row['date'] for row in res.json()['results']][:2],
+                         [today.isoformat(),
+                          (today - datetime.timedelta(days=7)).isoformat()])
+        self.assertEqual(res.json()['results'],
+                         self.sync_client.get(
+                             reverse('transaction-list')).json()['results'])
+
+    async def test_transaction_detail(self):
+        """Test retrieving a single transaction"""
+        transaction = self.transactions[0]
+
+        res = await self.client.get(detail_url('transaction', transaction.pk),
+                                    headers=self.headers)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json()['id'], transaction.pk)
+        self.assertEqual(res.json()['amount'], '1.50')
+
+    async def test_other_users_transaction_not_found(self):
+        """Test another user's transaction returns 404"""
+        res = await self.client.get(
+            detail_url('transaction', self.transactions[0].pk),
+            headers=auth_headers(self.other))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_category_list_and_detail(self):
+        """Test listing and retrieving categories"""
+        res = await self.client.get(CATEGORY_URL, headers=self.headers)
+        detail = await self.client.get(
+            detail_url('category', self.category.pk), headers=self.headers)
+
+        self.assertEqual(res.json(), [{'id': self.category.pk,
+                                       'name': 'Food'}])
+        self.assertEqual(detail.json()['name'], 'Food')
+
+    def async_get(self, url):
+        return async_to_sync(self.client.get)(url, headers=self.headers)
@@ -0,0 +1,409 @@
+"""
+Tests for budgets, their spend counters and threshold alerts
+"""
+import datetime
+import threading
+import time
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import OperationalError, connection, transaction
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from transactions import budgets
+from transactions.models import (
+    Account,
+    Budget,
+    BudgetAlert,
+    Category,
+    Transaction,
+    TransactionType,
+)
+from transactions.signals import post_transactions
+
+BUDGETS_URL = reverse('budget-list')
+
+
+def detail_url(budget_id):
+    return reverse('budget-detail', args=[budget_id])
+
+
+def create_user(**params):
+    return get_user_model().objects.create_user(**params)
+
+
+class BudgetFixtureMixin:
+
+    def setUp(self):
+        self.user = create_user(email='test@example.com', password='pass1234')
+        self.expense = TransactionType.objects.create(
+            name='Expense', is_expense=True)
+        self.food = Category.objects.create(
+            name='Food', user=self.user, transaction_type=self.expense)
+        self.fuel = Category.objects.create(
+            name='Fuel', user=self.user, transaction_type=self.expense)
+        self.account = Account.objects.create(
+            name='Cash', account_type='CSH', balance=0, user=self.user)
+
+        self.crossings = []
+        budgets.budget_threshold_crossed.connect(self.record_crossing)
+        self.addCleanup(budgets.budget_threshold_crossed.disconnect,
+                        self.record_crossing)
+
+    def record_crossing(self, sender, budget, alert, **kwargs):
+        self.crossings.append((budget.pk, alert.percent))
+
+    def create_budget(self, **params):
+        defaults = {'user': self.user, 'category': self.food,
+                    'period': Budget.Period.MONTHLY,
+                    'start': datetime.date(2024, 5, 1),
+                    'amount': Decimal('100.00')}
+        defaults.update(params)
+        return Budget.objects.create(**defaults)
+
+    def create_transaction(self, amount, date=datetime.date(2024, 5, 10),
+                           category=None):
+        return Transaction.objects.create(
+            user=self.user, transaction_type=self.expense,
+            category=category or self.food, account=self.account,
+            amount=Decimal(amount), date=date)
+
+    def spent(self, budget):
+        return Budget.objects.get(pk=budget.pk).spent
+
+
+class BudgetSpendTests(BudgetFixtureMixin, TestCase):
+    """Test budgets' spent totals follow transaction writes"""
+
+    def test_period_is_normalized(self):
+        """Test a budget's start and end bound its whole period"""
+        weekly = self.create_budget(period=Budget.Period.WEEKLY,
+                                    start=datetime.date(2024, 5, 16))
+        yearly = self.create_budget(period=Budget.Period.YEARLY,
+                                    start=datetime.date(2024, 5, 16))
+
+        self.assertEqual((weekly.start, weekly.end),
+                         (datetime.date(2024, 5, 13),
+                          datetime.date(2024, 5, 19)))
+        self.assertEqual((yearly.start, yearly.end),
+                         (datetime.date(2024, 1, 1),
+                          datetime.date(2024, 12, 31)))
+
+    def test_new_budget_counts_existing_transactions(self):
+        """Test a budget starts from what the period has already spent"""
+        self.create_transaction('30.00')
+        self.create_transaction('5.00', datetime.date(2024, 6, 1))
+        self.create_transaction('7.00', category=self.fuel)
+
+        self.assertEqual(self.create_budget().spent, Decimal('30.00'))
+
+    def test_spent_follows_writes(self):
+        """Test creates, updates and deletes adjust only covering budgets"""
+        budget = self.create_budget()
+        weekly = self.create_budget(period=Budget.Period.WEEKLY,
+                                    start=datetime.date(2024, 5, 6))
+        transaction_ = self.create_transaction('40.00')
+        self.assertEqual(self.spent(budget), Decimal('40.00'))
+        self.assertEqual(self.spent(weekly), Decimal('40.00'))
+
+        transaction_.date = datetime.date(2024, 5, 20)
+        transaction_.amount = Decimal('25.00')
+        transaction_.save()
+        self.assertEqual(self.spent(budget), Decimal('25.00'))
+        self.assertEqual(self.spent(weekly), Decimal('0.00'))
+
+        transaction_.category = self.fuel
+        transaction_.save()
+        self.assertEqual(self.spent(budget), Decimal('0.00'))
+
+        transaction_.category = self.food
+        transaction_.save()
+        transaction_.delete()
+        self.assertEqual(self.spent(budget), Decimal('0.00'))
+        self.assertEqual(budgets.verify(), [])
+
+    def test_refunds_reduce_spent(self):
+        """Test income in a budgeted category takes from spending"""
+        income = TransactionType.objects.create(name='Income')
+        Transaction.objects.create(
+            user=self.user, transaction_type=income, category=self.food,
+            account=self.account, amount=Decimal('15.00'),
+            date=datetime.date(2024, 5, 2))
+        budget = self.create_budget()
+        self.assertEqual(budget.spent, Decimal('-15.00'))
+
+        self.create_transaction('40.00')
+        refund = Transaction.objects.create(
+            user=self.user, transaction_type=income, category=self.food,
+            account=self.account, amount=Decimal('10.00'),
+            date=datetime.date(2024, 5, 12))
+        self.assertEqual(self.spent(budget), Decimal('15.00'))
+
+        refund.delete()
+        self.assertEqual(self.spent(budget), Decimal('25.00'))
+        self.assertEqual(budgets.verify(self.user), [])
+
+    def test_spent_in_budget_currency(self):
+        """Test only accounts in the budget's currency count towards it"""
+        euros = Account.objects.create(name='Euros', account_type='CHK',
+                                       balance=0, user=self.user,
+                                       currency='EUR')
+        Transaction.objects.create(
+            user=self.user, transaction_type=self.expense, category=self.food,
+            account=euros, amount=Decimal('30.00'),
+            date=datetime.date(2024, 5, 3))
+        budget = self.create_budget()
+        euro_budget = self.create_budget(currency='EUR')
+        self.assertEqual(budget.spent, Decimal('0.00'))
+        self.assertEqual(euro_budget.spent, Decimal('30.00'))
+
+        self.create_transaction('12.00')
+        self.assertEqual(self.spent(budget), Decimal('12.00'))
+        self.assertEqual(self.spent(euro_budget), Decimal('30.00'))
+        self.assertEqual(budgets.verify(self.user), [])
+
+    def test_bulk_writes_update_spent(self):
+        """Test writes posted in bulk adjust spent in one update per budget"""
+        budget = self.create_budget()
+        batch = Transaction.objects.bulk_create(
+            Transaction(user=self.user, transaction_type=self.expense,
+                        category=self.food, account=self.account,
+                        amount=Decimal('1.50'),
+                        date=datetime.date(2024, 5, day))
+            for day in range(1, 31))
+
+        post_transactions(
+            added=[transaction_.tracked_values() for transaction_ in batch])
+
+        self.assertEqual(self.spent(budget), Decimal('45.00'))
+        self.assertEqual(budgets.verify(self.user), [])
+
+    def test_crossings_fire_once(self):
+        """Test each threshold fires once per upward crossing"""
+        budget = self.create_budget()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_transaction('50.00')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_transaction('35.00')  # 85%
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_transaction('5.00')
+        self.assertEqual(self.crossings, [(budget.pk, 80)])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            last = self.create_transaction('20.00')  # 110%
+        with self.captureOnCommitCallbacks(execute=True):
+            last.delete()  # 90%, under budget again
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_transaction('10.00')  # 100%
+        self.assertEqual(self.crossings, [(budget.pk, 80), (budget.pk, 100),
+                                          (budget.pk, 100)])
+        self.assertEqual(list(budget.alerts.values_list('percent', flat=True)
+                              .order_by('id')), [80, 100, 100])
+
+    def test_one_write_crosses_several_thresholds(self):
+        """Test a write jumping past both thresholds fires for each"""
+        budget = self.create_budget(alert_percent=50)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_transaction('150.00')
+
+        self.assertEqual(self.crossings, [(budget.pk, 50), (budget.pk, 100)])
+
+    def test_rolled_back_write_does_not_fire(self):
+        """Test no alert is sent or kept for a write that is rolled back"""
+        budget = self.create_budget()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    self.create_transaction('120.00')
+                    raise ValueError
+            except ValueError:
+                pass
+
+        self.assertEqual(self.crossings, [])
+        self.assertFalse(budget.alerts.exists())
+        self.assertEqual(self.spent(budget), Decimal('0.00'))
+
+
+class ConcurrentCrossingTests(BudgetFixtureMixin, TransactionTestCase):
+    """Test concurrent writers see a crossing exactly once"""
+
+    def run_concurrently(self, *writes):
+        """Run each write atomically in its own thread, all at once"""
+        start = threading.Barrier(len(writes))
+
+        def run(write):
+            start.wait()
+            try:
+                self.retry_locked(write)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=run, args=[write])
+                   for write in writes]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def retry_locked(self, write, timeout=30):
+        """Retry `write` while another writer holds the database lock"""
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                with transaction.atomic():
+                    return write()
+            except OperationalError:
+                if time.monotonic() > deadline:
+                    raise
+            time.sleep(0.001)
+
+    def test_concurrent_writes_cross_once(self):
+        """Test many writers pushing a budget over alert once between them"""
+        budget = self.create_budget()
+
+        self.run_concurrently(
+            *[lambda: self.create_transaction('11.00')] * 10)
+
+        self.assertEqual(self.spent(budget), Decimal('110.00'))
+        self.assertEqual(sorted(self.crossings),
+                         [(budget.pk, 80), (budget.pk, 100)])
+        self.assertEqual(budget.alerts.count(), 2)
+
+    def test_budget_created_among_writes(self):
+        """Test a new budget counts each concurrent write exactly once"""
+        self.run_concurrently(
+            self.create_budget,
+            *[lambda: self.create_transaction('3.00')] * 9)
+
+        budget = Budget.objects.get()
+        self.assertEqual(budget.spent, Decimal('27.00'))
+        self.assertEqual(budgets.verify(), [])
+
+
+class BudgetApiTests(BudgetFixtureMixin, TestCase):
+    """Test the budgets API"""
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_create_budget(self):
+        """Test creating a budget for any day of its period"""
+        self.create_transaction('120.00')
+
+        res = self.client.post(BUDGETS_URL, {
+            'category': self.food.pk, 'period': 'M', 'start': '2024-05-17',
+            'amount': '100.00'})
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data['start'], '2024-05-01')
+        self.assertEqual(res.data['end'], '2024-05-31')
+        self.assertEqual(res.data['spent'], '120.00')
+        self.assertEqual(res.data['currency'], 'USD')
+        self.assertTrue(res.data['is_over'])
+
+    def test_create_budget_in_base_currency(self):
+        """Test a budget's currency defaults to the user's base currency"""
+        self.user.base_currency = 'EUR'
+        self.user.save()
+
+        res = self.client.post(BUDGETS_URL, {
+            'category': self.food.pk, 'period': 'M', 'start': '2024-05-01',
+            'amount': '100.00'})
+        self.assertEqual(res.data['currency'], 'EUR')
+
+        res = self.client.post(BUDGETS_URL, {
+            'category': self.food.pk, 'period': 'M', 'start': '2024-05-01',
+            'amount': '100.00', 'currency': 'USD'})
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        res = self.client.patch(detail_url(res.data['id']),
+                                {'currency': 'EUR'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_create_budget_invalid(self):
+        """Test duplicates and other users' categories are rejected"""
+        self.create_budget()
+        other = create_user(email='other@example.com', password='pass1234')
+        other_category = Category.objects.create(
+            name='Other', user=other, transaction_type=self.expense)
+
+        for payload, field in (
+                ({'category': self.food.pk, 'start': '2024-05-30'}, 'start'),
+                ({'category': other_category.pk, 'start': '2024-05-01'},
+                 'category'),
+                ({'category': self.fuel.pk, 'start': '2024-05-01',
+                  'amount': '0'}, 'amount')):
+            res = self.client.post(BUDGETS_URL, {
+                'period': 'M', 'amount': '10.00', **payload})
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn(field, res.data)
+
+    def test_update_budget(self):
+        """Test the amount can change but the category and period cannot"""
+        budget = self.create_budget()
+
+        res = self.client.patch(detail_url(budget.pk), {'amount': '50.00'})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['amount'], '50.00')
+
+        res = self.client.patch(detail_url(budget.pk), {'start': '2024-05-20'})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        res = self.client.patch(detail_url(budget.pk), {'category': self.fuel.pk})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_over_budget_is_one_row_read(self):
+        """Test reading a budget's state runs one query whatever the spend"""
+        budget = self.create_budget()
+        for _ in range(20):
+            self.create_transaction('6.00')
+
+        with self.assertNumQueries(1):
+            res = self.client.get(detail_url(budget.pk))
+
+        self.assertEqual(res.data['spent'], '120.00')
+        self.assertTrue(res.data['is_over'])
+
+    def test_filter_budgets(self):
+        """Test filtering by category and by a covered date"""
+        may = self.create_budget()
+        self.create_budget(start=datetime.date(2024, 6, 1))
+        self.create_budget(category=self.fuel)
+
+        res = self.client.get(BUDGETS_URL, {'category': self.food.pk,
+                                            'date': '2024-05-31'})
+
+        self.assertEqual([row['id'] for row in res.data], [may.pk])
+        res = self.client.get(BUDGETS_URL, {'date': 'soon'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_alerts(self):
+        """Test listing the alerts a budget has raised"""
+        budget = self.create_budget()
+        self.create_transaction('90.00')
+
+        res = self.client.get(reverse('budget-alerts', args=[budget.pk]))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([(row['percent'], row['spent']) for row in res.data],
+                         [(80, '90.00')])
+        self.assertEqual(BudgetAlert.objects.count(), 1)
+
+    def test_budgets_private_to_user(self):
+        """Test another user's budgets are not listed or retrievable"""
+        other = create_user(email='other@example.com', password='pass1234')
+        category = Category.objects.create(
+            name='Other', user=other, transaction_type=self.expense)
+        budget = self.create_budget(user=other, category=category)
+
+        self.assertEqual(self.client.get(BUDGETS_URL).data, [])
+        res = self.client.get(detail_url(budget.pk))
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,145 @@
+"""
+Tests for the reference data cache
+"""
+import datetime
+from types import SimpleNamespace
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import versions
+from transactions import cache
+from transactions.models import Account, Category, TransactionType
+from transactions.serializers import TransactionCreateSerializer
+
+
+class ReferenceCacheTests(TestCase):
+    """Test caching transaction types and categories per process"""
+
+    def setUp(self):
+        cache.transaction_types.clear()
+        cache.categories.clear()
+        self.user = get_user_model().objects.create_user(
+            'test@example.com', 'testpass123')
+        self.expense = TransactionType.objects.create(
+            name='Expense', is_expense=True)
+
+    def test_hits_and_misses(self):
+        """Test the first read loads and later reads hit"""
+        with self.assertNumQueries(2):
+            types = cache.get_transaction_types()
+        with self.assertNumQueries(0):
+            cache.get_transaction_types()
+
+        self.assertEqual(types[self.expense.pk].name, 'Expense')
+        self.assertEqual(cache.stats()['transaction_types'],
+                         {'hits': 1, 'misses': 1, 'entries': 1})
+
+    def test_save_invalidates_locally(self):
+        """Test a save in this process is seen on the next read"""
+        cache.get_categories(self.user.id)
+
+        category = Category.objects.create(
+            name='Food', user=self.user, transaction_type=self.expense)
+
+        self.assertIn(category.pk, cache.get_categories(self.user.id))
+
+    def test_categories_cached_per_user(self):
+        """Test each user has their own category set"""
+        other = get_user_model().objects.create_user(
+            'other@example.com', 'testpass123')
+        Category.objects.create(
+            name='Food', user=other, transaction_type=self.expense)
+
+        self.assertEqual(cache.get_categories(self.user.id), {})
+        self.assertEqual(len(cache.get_categories(other.id)), 1)
+
+    @override_settings(REFERENCE_CACHE_CHECK_INTERVAL=0)
+    def test_version_bump_from_another_process(self):
+        """Test a version bumped elsewhere reloads this process's copy"""
+        cache.get_transaction_types()
+
+        # Another worker renames the type and bumps the shared version.
+        TransactionType.objects.filter(pk=self.expense.pk).update(name='Spend')
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                cache.get_transaction_types()[self.expense.pk].name, 'Expense')
+        versions.bump('transaction_types')
+
+        self.assertEqual(
+            cache.get_transaction_types()[self.expense.pk].name, 'Spend')
+
+    @override_settings(REFERENCE_CACHE_CHECK_INTERVAL=3600)
+    def test_interval_skips_version_checks(self):
+        """Test the version is not checked again within the interval"""
+        cache.get_transaction_types()
+        versions.bump('transaction_types')
+
+        with self.assertNumQueries(0):
+            cache.get_transaction_types()
+
+    def test_resolved_instances_are_copies(self):
+        """Test changing a resolved category leaves the cached one alone"""
+        food = Category.objects.create(name='Food', user=self.user,
+                                       transaction_type=self.expense)
+        serializer = TransactionCreateSerializer(
+            context={'request': SimpleNamespace(user=self.user)})
+
+        category = serializer.fields['category'].to_internal_value(food.pk)
+        category.name = 'Changed'
+
+        self.assertEqual(cache.get_categories(self.user.id)[food.pk].name,
+                         'Food')
+
+    @override_settings(REFERENCE_CACHE_CHECK_INTERVAL=3600)
+    def test_required_key_forces_reload(self):
+        """Test a row missing from our copy is loaded within the interval"""
+        cache.get_transaction_types()
+        income = TransactionType.objects.bulk_create(
+            [TransactionType(name='Income')])[0]
+        versions.bump('transaction_types')
+
+        types = cache.get_transaction_types(require=[income.pk])
+
+        self.assertIn(income.pk, types)
+
+
+@override_settings(REFERENCE_CACHE_CHECK_INTERVAL=3600)
+class CachedRelationTests(TransactionTestCase):
+    """Test writes that resolve related rows from the cache"""
+
+    def setUp(self):
+        cache.transaction_types.clear()
+        cache.categories.clear()
+        self.user = get_user_model().objects.create_user(
+            'test@example.com', 'testpass123')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.expense = TransactionType.objects.create(
+            name='Expense', is_expense=True)
+        self.food = Category.objects.create(
+            name='Food', user=self.user, transaction_type=self.expense)
+        self.account = Account.objects.create(
+            name='Cash', account_type='CSH', balance=0, user=self.user)
+        self.payload = {'transaction_type': self.expense.pk,
+                        'category': self.food.pk, 'account': self.account.pk,
+                        'amount': '5.00', 'date': datetime.date(2024, 5, 1)}
+
+    def test_category_deleted_elsewhere(self):
+        """Test a category deleted by another process is a field error"""
+        cache.get_categories(self.user.id)
+        with connection.cursor() as cursor:
+            # Another process's delete: no signals reach our cache.
+            cursor.execute('DELETE FROM transactions_category WHERE id = %s',
+                           [self.food.pk])
+
+        res = self.client.post(reverse('transaction-list'), self.payload)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data['category'], [
+            f'Invalid pk "{self.food.pk}" - object does not exist.'])
@@ -0,0 +1,192 @@
+"""
+Tests for the bulk category endpoint
+"""
+import datetime
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from transactions import budgets, cache, rollups
+from transactions.models import (
+    Account,
+    Budget,
+    Category,
+    MonthlySummary,
+    Transaction,
+    TransactionType,
+)
+from transactions.signals import post_transactions
+
+BULK_URL = reverse('category-bulk')
+
+
+def create_user(**params):
+    return get_user_model().objects.create_user(**params)
+
+
+class CategoryBulkTests(TestCase):
+    """Test creating, updating and deleting categories in bulk"""
+
+    def setUp(self):
+        cache.categories.clear()
+        self.user = create_user(email='test@example.com', password='pass1234')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.income = TransactionType.objects.create(name='Income')
+        self.expense = TransactionType.objects.create(name='Expense',
+                                                      is_expense=True)
+
+    def create_categories(self, *names):
+        return [Category.objects.create(name=name, user=self.user,
+                                        transaction_type=self.expense)
+                for name in names]
+
+    def test_bulk_create(self):
+        """Test creating many categories with one insert"""
+        payload = [{'name': f'Category {i}',
+                    'transaction_type': self.expense.id} for i in range(40)]
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(res.data), 40)
+        self.assertEqual(res.data[0]['name'], 'Category 0')
+        self.assertEqual(Category.objects.filter(user=self.user).count(), 40)
+        inserts = [query for query in queries.captured_queries
+                   if query['sql'].startswith('INSERT')
+                   and 'transactions_category' in query['sql']]
+        self.assertEqual(len(inserts), 1)
+
+    def test_bulk_create_reports_item_errors(self):
+        """Test one invalid item fails the batch with errors per item"""
+        payload = [
+            {'name': 'Food', 'transaction_type': self.expense.id},
+            {'name': '', 'transaction_type': self.expense.id},
+            {'name': 'Salary'},
+            {'name': 'Other', 'transaction_type': 999},
+        ]
+
+        res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(len(res.data), 4)
+        self.assertEqual(res.data[0], {})
+        self.assertIn('name', res.data[1])
+        self.assertIn('transaction_type', res.data[2])
+        self.assertIn('transaction_type', res.data[3])
+        self.assertFalse(Category.objects.filter(user=self.user).exists())
+
+    def test_bulk_update(self):
+        """Test renaming and retyping categories in one statement"""
+        food, rent = self.create_categories('Food', 'Rent')
+        payload = [{'id': food.id, 'name': 'Groceries'},
+                   {'id': rent.id, 'transaction_type': self.income.id}]
+
+        res = self.client.patch(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        food.refresh_from_db()
+        rent.refresh_from_db()
+        self.assertEqual(food.name, 'Groceries')
+        self.assertEqual(food.transaction_type, self.expense)
+        self.assertEqual(rent.name, 'Rent')
+        self.assertEqual(rent.transaction_type, self.income)
+
+    def test_bulk_update_rejects_unknown_ids(self):
+        """Test ids that are missing, repeated or not the user's fail"""
+        food, = self.create_categories('Food')
+        other = Category.objects.create(
+            name='Theirs', transaction_type=self.expense,
+            user=create_user(email='other@example.com', password='pass1234'))
+        payload = [{'id': food.id, 'name': 'Groceries'}, {'name': 'No id'},
+                   {'id': other.id, 'name': 'Mine'},
+                   {'id': food.id, 'name': 'Again'}]
+
+        res = self.client.patch(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data[0], {})
+        self.assertTrue(all('id' in errors for errors in res.data[1:]))
+        food.refresh_from_db()
+        self.assertEqual(food.name, 'Food')
+
+    def test_bulk_delete(self):
+        """Test deleting a list of categories"""
+        food, rent, kept = self.create_categories('Food', 'Rent', 'Kept')
+
+        res = self.client.delete(BULK_URL, [food.id, rent.id], format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(list(Category.objects.filter(user=self.user)),
+                         [kept])
+
+    def test_bulk_delete_with_transactions(self):
+        """Test a category's transactions are reversed in one batch"""
+        food, kept = self.create_categories('Food', 'Kept')
+        account = Account.objects.create(name='Cash', account_type='CSH',
+                                         balance=0, user=self.user)
+        Budget.objects.create(user=self.user, category=kept, period='M',
+                              start=datetime.date(2024, 5, 1),
+                              amount=Decimal('100.00'))
+        created = Transaction.objects.bulk_create(
+            Transaction(user=self.user, transaction_type=self.expense,
+                        category=category, account=account,
+                        amount=Decimal('1.50'),
+                        date=datetime.date(2024, 5, 1 + i % 28))
+            for category, count in ((food, 60), (kept, 2))
+            for i in range(count))
+        post_transactions(
+            added=[transaction.tracked_values() for transaction in created])
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.delete(BULK_URL, [food.id], format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertLess(len(queries.captured_queries), 40)
+        self.assertFalse(Transaction.objects.filter(category=food).exists())
+        account.refresh_from_db()
+        self.assertEqual(account.balance, Decimal('-3.00'))
+        self.assertEqual(rollups.verify(self.user), [])
+        self.assertEqual(budgets.verify(self.user), [])
+        self.assertFalse(MonthlySummary.objects.filter(category=food).exists())
+
+    def test_bulk_writes_refresh_list(self):
+        """Test bulk writes invalidate cached categories and list ETags"""
+        res = self.client.get(reverse('category-list'))
+        etag = res['ETag']
+        self.assertEqual(cache.get_categories(self.user.id), {})
+
+        self.client.post(BULK_URL, [{'name': 'Food',
+                                     'transaction_type': self.expense.id}],
+                         format='json')
+
+        res = self.client.get(reverse('category-list'),
+                              HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(cache.get_categories(self.user.id)), 1)
+
+    def test_payload_must_be_list(self):
+        """Test a payload that is not a list of items is rejected"""
+        for payload in ({'name': 'Food'}, []):
+            with self.subTest(payload=payload):
+                res = self.client.post(BULK_URL, payload, format='json')
+
+                self.assertEqual(res.status_code,
+                                 status.HTTP_400_BAD_REQUEST)
+
+    def test_single_create_sets_user(self):
+        """Test the regular create endpoint creates a category"""
+        res = self.client.post(reverse('category-list'), {
+            'name': 'Food', 'transaction_type': self.expense.id})
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(Category.objects.filter(
+            user=self.user, name='Food').exists())
@@ -0,0 +1,158 @@
+"""
+Tests for conditional GET on the per-user collections
+"""
+import datetime
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from transactions.models import Account, Category, Transaction, TransactionType
+
+ACCOUNTS_URL = reverse('account-list')
+CATEGORIES_URL = reverse('category-list')
+TRANSACTIONS_URL = reverse('transaction-list')
+
+
+def create_user(email='test@example.com', password='testpass123'):
+    return get_user_model().objects.create_user(email, password)
+
+
+class ConditionalListTests(TestCase):
+    """Test list endpoints answer If-None-Match from collection versions"""
+
+    def setUp(self):
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        self.transaction_type = TransactionType.objects.create(
+            name='Expense', is_expense=True)
+        self.category = Category.objects.create(
+            name='Food', user=self.user,
+            transaction_type=self.transaction_type)
+        self.account = Account.objects.create(
+            name='Cash', account_type='CSH', balance=0, user=self.user)
+
+    def create_transaction(self, user=None, account=None, category=None):
+        return Transaction.objects.create(
+            user=user or self.user, account=account or self.account,
+            category=category or self.category,
+            transaction_type=self.transaction_type, amount=5,
+            date=datetime.date(2024, 1, 1))
+
+    def etag(self, url):
+        res = self.client.get(url)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res['ETag']
+
+    def test_unchanged_collection_not_modified(self):
+        """Test a current ETag gets 304 with a single query"""
+        for url in (ACCOUNTS_URL, CATEGORIES_URL, TRANSACTIONS_URL):
+            etag = self.etag(url)
+
+            with self.assertNumQueries(1):
+                res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+            self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+            self.assertEqual(res['ETag'], etag)
+            self.assertEqual(res.content, b'')
+
+    def test_transaction_write_changes_etags(self):
+        """Test a new transaction changes transactions and accounts"""
+        etags = {url: self.etag(url)
+                 for url in (ACCOUNTS_URL, CATEGORIES_URL, TRANSACTIONS_URL)}
+
+        transaction = self.create_transaction()
+
+        self.assertNotEqual(self.etag(TRANSACTIONS_URL),
+                            etags[TRANSACTIONS_URL])
+        self.assertNotEqual(self.etag(ACCOUNTS_URL), etags[ACCOUNTS_URL])
+        self.assertEqual(self.etag(CATEGORIES_URL), etags[CATEGORIES_URL])
+
+        etag = self.etag(TRANSACTIONS_URL)
+        transaction.delete()
+        res = self.client.get(TRANSACTIONS_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['results'], [])
+
+    def test_category_rename_changes_transactions(self):
+        """Test renaming a category changes lists that embed its name"""
+        self.create_transaction()
+        etags = [self.etag(CATEGORIES_URL), self.etag(TRANSACTIONS_URL)]
+
+        self.category.name = 'Groceries'
+        self.category.save()
+
+        self.assertNotEqual(
+            [self.etag(CATEGORIES_URL), self.etag(TRANSACTIONS_URL)], etags)
+
+    def test_transaction_type_rename_changes_transactions(self):
+        """Test renaming a shared transaction type changes transactions"""
+        etag = self.etag(TRANSACTIONS_URL)
+
+        self.transaction_type.name = 'Spending'
+        self.transaction_type.save()
+
+        self.assertNotEqual(self.etag(TRANSACTIONS_URL), etag)
+
+    def test_other_users_writes_keep_etag(self):
+        """Test another user's writes do not change this user's ETags"""
+        etag = self.etag(TRANSACTIONS_URL)
+        other = create_user('other@example.com')
+        category = Category.objects.create(
+            name='Food', user=other, transaction_type=self.transaction_type)
+        account = Account.objects.create(
+            name='Cash', account_type='CSH', balance=0, user=other)
+
+        self.create_transaction(user=other, account=account,
+                                category=category)
+
+        self.assertEqual(self.etag(TRANSACTIONS_URL), etag)
+
+    def test_etag_varies_with_query(self):
+        """Test each page of a collection has its own ETag"""
+        self.assertNotEqual(self.etag(TRANSACTIONS_URL),
+                            self.etag(f'{TRANSACTIONS_URL}?page_size=1'))
+
+
+class AccountApiTests(TestCase):
+    """Test the account API"""
+
+    def setUp(self):
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_auth_required(self):
+        """Test that authentication is required"""
+        res = APIClient().get(ACCOUNTS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_list_limited_to_user(self):
+        """Test only the user's own accounts are listed"""
+        other = create_user('other@example.com')
+        Account.objects.create(
+            name='Other', account_type='CSH', balance=0, user=other)
+        account = Account.objects.create(
+            name='Cash', account_type='CSH', balance=10, user=self.user)
+
+        res = self.client.get(ACCOUNTS_URL)
+
+        self.assertEqual(res.data, [{
+            'id': account.id, 'name': 'Cash', 'account_type': 'CSH',
+            'balance': '10.00', 'currency': 'USD'}])
+
+    def test_create_account(self):
+        """Test creating an account assigns the user"""
+        payload = {'name': 'Bank', 'account_type': 'BNK', 'balance': '0.00'}
+
+        res = self.client.post(ACCOUNTS_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        account = Account.objects.get(id=res.data['id'])
+        self.assertEqual(account.user, self.user)
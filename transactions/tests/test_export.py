@@ -0,0 +1,113 @@
+"""
+Tests for streaming transaction exports
+"""
+import csv
+import datetime
+import io
+import json
+
+from django.contrib.auth import get_user_model
+from django.http import StreamingHttpResponse
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from transactions.importers import import_transactions
+from transactions.models import Account, Category, Transaction, TransactionType
+
+EXPORT_URL = reverse('transaction-export')
+
+
+def create_user(email='test@example.com', password='testpass123'):
+    """Create and return a user"""
+    return get_user_model().objects.create_user(email, password)
+
+
+class ExportTests(TestCase):
+    """Test exporting transactions"""
+
+    def setUp(self):
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.expense = TransactionType.objects.create(
+            name='Expense', is_expense=True)
+        self.category = Category.objects.create(
+            name='Food', user=self.user, transaction_type=self.expense)
+        self.account = Account.objects.create(
+            name='Wallet', account_type='CSH', balance=0, user=self.user)
+
+    def create_transaction(self, user=None, **params):
+        defaults = {
+            'user': user or self.user,
+            'transaction_type': self.expense,
+            'category': self.category,
+            'account': self.account,
+            'amount': '4.50',
+            'date': datetime.date(2024, 5, 1),
+        }
+        defaults.update(params)
+        return Transaction.objects.create(**defaults)
+
+    def read(self, response):
+        return b''.join(response.streaming_content).decode()
+
+    def test_export_csv(self):
+        """Test exporting the user's transactions as CSV"""
+        transaction = self.create_transaction(description='Lunch, "deli"')
+        self.create_transaction(user=create_user('other@example.com'))
+
+        res = self.client.get(EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIsInstance(res, StreamingHttpResponse)
+        self.assertEqual(res['Content-Type'], 'text/csv')
+        rows = list(csv.reader(io.StringIO(self.read(res))))
+        self.assertEqual(rows, [
+            ['id', 'date', 'amount', 'description', 'category',
+             'transaction_type', 'account'],
+            [str(transaction.id), '2024-05-01', '4.50', 'Lunch, "deli"',
+             'Food', 'Expense', 'Wallet'],
+        ])
+
+    def test_export_ndjson(self):
+        """Test exporting as newline-delimited JSON"""
+        for day in (2, 1):
+            self.create_transaction(date=datetime.date(2024, 5, day))
+
+        res = self.client.get(EXPORT_URL, {'export_format': 'ndjson'})
+
+        rows = [json.loads(line) for line in self.read(res).splitlines()]
+        self.assertEqual([row['date'] for row in rows],
+                         ['2024-05-01', '2024-05-02'])
+        self.assertIsNone(rows[0]['description'])
+        self.assertEqual(rows[0]['amount'], '4.50')
+
+    def test_export_runs_one_query(self):
+        """Test rows are streamed from a single query"""
+        for _ in range(5):
+            self.create_transaction()
+
+        res = self.client.get(EXPORT_URL)
+        with self.assertNumQueries(1):
+            self.read(res)
+
+    def test_export_round_trips_through_import(self):
+        """Test an exported CSV can be imported again"""
+        self.create_transaction(description='Lunch')
+        exported = self.read(self.client.get(EXPORT_URL)).encode()
+        Transaction.objects.all().delete()
+
+        importer = import_transactions(
+            self.user, io.BytesIO(exported), 'csv')
+
+        self.assertEqual(importer.created, 1)
+        self.assertEqual(Transaction.objects.get().description, 'Lunch')
+
+    def test_export_invalid_format(self):
+        """Test an unknown export format is rejected"""
+        res = self.client.get(EXPORT_URL, {'export_format': 'xml'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
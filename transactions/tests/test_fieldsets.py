@@ -0,0 +1,114 @@
+"""
+Tests for sparse fieldsets on the transaction and account APIs
+"""
+import datetime
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from transactions.models import Account, Category, Transaction, TransactionType
+
+ACCOUNTS_URL = reverse('account-list')
+TRANSACTIONS_URL = reverse('transaction-list')
+
+
+def detail_url(transaction_id):
+    """Return transaction detail URL"""
+    return reverse('transaction-detail', args=[transaction_id])
+
+
+class SparseFieldsTests(TestCase):
+    """Test `?fields=` narrows the payload and the SQL"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'test@example.com', 'testpass123')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        transaction_type = TransactionType.objects.create(name='Expense')
+        category = Category.objects.create(
+            name='Food', user=self.user, transaction_type=transaction_type)
+        self.account = Account.objects.create(
+            name='Cash', account_type='CSH', balance=0, user=self.user)
+        self.transactions = [
+            Transaction.objects.create(
+                user=self.user, transaction_type=transaction_type,
+                category=category, account=self.account, amount=i,
+                description='A long note', date=datetime.date(2024, 1, 1)
+                + datetime.timedelta(days=i))
+            for i in range(5)
+        ]
+
+    def get_with_sql(self, url):
+        with CaptureQueriesContext(connection) as context:
+            res = self.client.get(url)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        page_sql = [query['sql'] for query in context.captured_queries
+                    if 'transactions_transaction' in query['sql']]
+        return res, page_sql[0]
+
+    def test_list_selected_fields_only(self):
+        """Test only the named fields are serialized and selected"""
+        res, sql = self.get_with_sql(f'{TRANSACTIONS_URL}?fields=id,amount')
+
+        self.assertEqual(res.data['results'][0], {'id': self.transactions[-1].id,
+                                                  'amount': '4.00'})
+        self.assertNotIn('JOIN', sql)
+        self.assertNotIn('"description"', sql)
+
+    def test_related_field_joins_only_its_table(self):
+        """Test a related name joins just that relation"""
+        res, sql = self.get_with_sql(f'{TRANSACTIONS_URL}?fields=id,category')
+
+        self.assertEqual(res.data['results'][0]['category'], 'Food')
+        self.assertIn('"transactions_category"', sql)
+        self.assertNotIn('"transactions_account"', sql)
+        self.assertNotIn('"transactions_category"."transaction_type_id"', sql)
+
+    def test_default_list_skips_unserialized_columns(self):
+        """Test the full list does not load the description"""
+        res, sql = self.get_with_sql(TRANSACTIONS_URL)
+
+        self.assertIn('transaction_type', res.data['results'][0])
+        self.assertNotIn('"description"', sql)
+
+    def test_sparse_pages_link_up(self):
+        """Test cursor pagination works when date is not requested"""
+        url = f'{TRANSACTIONS_URL}?fields=id&page_size=2'
+        ids = []
+
+        while url:
+            with self.assertNumQueries(2):
+                res = self.client.get(url)
+            ids.extend(row['id'] for row in res.data['results'])
+            url = res.data['next']
+
+        self.assertEqual(ids, [t.id for t in reversed(self.transactions)])
+
+    def test_retrieve_selected_fields(self):
+        """Test retrieving a transaction with a fieldset"""
+        res = self.client.get(
+            f'{detail_url(self.transactions[0].id)}?fields=id,description')
+
+        self.assertEqual(res.data, {'id': self.transactions[0].id,
+                                    'description': 'A long note'})
+
+    def test_unknown_field_rejected(self):
+        """Test naming a field the serializer lacks returns 400"""
+        res = self.client.get(f'{TRANSACTIONS_URL}?fields=id,secret')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('secret', str(res.data['fields']))
+
+    def test_account_fields(self):
+        """Test accounts accept a fieldset"""
+        res = self.client.get(f'{ACCOUNTS_URL}?fields=id,name')
+
+        self.assertEqual(res.data, [{'id': self.account.id, 'name': 'Cash'}])
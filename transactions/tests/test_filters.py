@@ -0,0 +1,152 @@
+"""
+Tests for transaction list filters and the indexes behind them
+"""
+import datetime
+import unittest
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from transactions.models import Account, Category, Transaction, TransactionType
+
+TRANSACTIONS_URL = reverse('transaction-list')
+
+
+class TransactionFilterTests(TestCase):
+    """Test filtering the transaction list"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'test@example.com', 'testpass123')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        self.types = [TransactionType.objects.create(name=name)
+                      for name in ('Income', 'Expense')]
+        self.categories = [
+            Category.objects.create(name=f'Category {i}', user=self.user,
+                                    transaction_type=self.types[i])
+            for i in range(2)
+        ]
+        self.accounts = [
+            Account.objects.create(name=f'Account {i}', account_type='CSH',
+                                   balance=0, user=self.user)
+            for i in range(2)
+        ]
+        for i in range(8):
+            Transaction.objects.create(
+                user=self.user, transaction_type=self.types[i % 2],
+                category=self.categories[i % 2],
+                account=self.accounts[i // 4], amount=i * 10,
+                date=datetime.date(2024, 1, 1) + datetime.timedelta(days=i))
+
+    def list_amounts(self, params):
+        res = self.client.get(TRANSACTIONS_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return sorted(int(float(row['amount'])) for row in res.data['results'])
+
+    def test_date_range(self):
+        """Test filtering by an inclusive date range"""
+        amounts = self.list_amounts({'date_after': '2024-01-03',
+                                     'date_before': '2024-01-05'})
+
+        self.assertEqual(amounts, [20, 30, 40])
+
+    def test_amount_range(self):
+        """Test filtering by an inclusive amount range"""
+        self.assertEqual(self.list_amounts({'amount_min': 15,
+                                            'amount_max': 40}),
+                         [20, 30, 40])
+
+    def test_relations(self):
+        """Test filtering by category, account and transaction type"""
+        self.assertEqual(
+            self.list_amounts({'category': self.categories[1].id}),
+            [10, 30, 50, 70])
+        self.assertEqual(
+            self.list_amounts({'account': self.accounts[1].id}),
+            [40, 50, 60, 70])
+        self.assertEqual(
+            self.list_amounts({'transaction_type': self.types[0].id,
+                               'account': self.accounts[0].id}),
+            [0, 20])
+
+    def test_invalid_value_rejected(self):
+        """Test a malformed filter value returns 400"""
+        res = self.client.get(TRANSACTIONS_URL, {'date_after': 'soon'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+@unittest.skipUnless(connection.vendor == 'sqlite', 'Checks SQLite plans')
+class TransactionFilterPlanTests(TestCase):
+    """Test the common filters are answered from the intended index"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'test@example.com', 'testpass123')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def plan(self, params):
+        """Return the query plan of the page query for `params`"""
+        with CaptureQueriesContext(connection) as context:
+            res = self.client.get(TRANSACTIONS_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        sql = next(query['sql'] for query in context.captured_queries
+                   if query['sql'].startswith('SELECT')
+                   and 'FROM "transactions_transaction"' in query['sql'])
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return [row[-1] for row in cursor.fetchall()]
+
+    def assertUsesIndex(self, params, index, sorted_in_memory=False):
+        plan = self.plan(params)
+        steps = [step for step in plan
+                 if step.startswith(('SCAN', 'SEARCH'))
+                 and step.split()[1] == 'transactions_transaction']
+
+        self.assertEqual(len(steps), 1, plan)
+        self.assertTrue(steps[0].startswith(
+            f'SEARCH transactions_transaction USING INDEX {index} ('), plan)
+        self.assertFalse(any(step.startswith('SCAN') for step in plan), plan)
+        self.assertEqual(
+            any('TEMP B-TREE' in step for step in plan), sorted_in_memory,
+            plan)
+
+    def test_unfiltered_and_date_range(self):
+        """Test the plain list and date ranges use the date index"""
+        self.assertUsesIndex({}, 'transaction_user_date_id_idx')
+        self.assertUsesIndex({'date_after': '2024-01-01',
+                              'date_before': '2024-02-01'},
+                             'transaction_user_date_id_idx')
+
+    def test_relation_filters(self):
+        """Test each relation filter uses its composite index"""
+        for param, index in (('category', 'transaction_user_cat_date_idx'),
+                             ('account', 'transaction_user_acct_date_idx'),
+                             ('transaction_type',
+                              'transaction_user_type_date_idx')):
+            with self.subTest(param=param):
+                self.assertUsesIndex({param: 1}, index)
+                self.assertUsesIndex({param: 1, 'date_after': '2024-01-01'},
+                                     index)
+
+    def test_amount_range(self):
+        """Test an amount range scans the amount index"""
+        self.assertUsesIndex({'amount_min': 5, 'amount_max': 10},
+                             'transaction_user_amount_idx',
+                             sorted_in_memory=True)
+
+    def test_later_pages(self):
+        """Test a cursor page keeps the filter's index"""
+        cursor = 'ZD0yMDI0LTAxLTAxJmk9MTA='  # date 2024-01-01, id 10
+        self.assertUsesIndex({'category': 1, 'cursor': cursor},
+                             'transaction_user_cat_date_idx')
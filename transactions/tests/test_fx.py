@@ -0,0 +1,259 @@
+"""
+Tests for currency conversion in reports
+"""
+import datetime
+import random
+from decimal import ROUND_HALF_EVEN, Decimal
+
+import numpy as np
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from transactions import fx
+from transactions.models import (
+    Account,
+    Category,
+    ExchangeRate,
+    Transaction,
+    TransactionType,
+)
+
+TOTALS_URL = reverse('transaction-totals')
+
+
+def create_user(**params):
+    return get_user_model().objects.create_user(**params)
+
+
+def convert(amount, rate):
+    return (amount * rate).quantize(Decimal('0.01'), rounding=ROUND_HALF_EVEN)
+
+
+class MultiplyRatesTests(SimpleTestCase):
+    """Test integer conversion matches Decimal to the cent"""
+
+    def check(self, amounts, rates):
+        converted = fx.multiply_rates(
+            np.array([int(amount * 100) for amount in amounts],
+                     dtype=np.int64),
+            np.array([int(rate * fx.RATE_SCALE) for rate in rates],
+                     dtype=np.int64))
+        self.assertEqual(
+            [fx.cents_to_decimal(int(cents)) for cents in converted],
+            [convert(amount, rate) for amount, rate in zip(amounts, rates)])
+
+    def test_random_amounts_and_rates(self):
+        """Test random amounts, signs and rates round like Decimal"""
+        rng = random.Random(25)
+        amounts = [Decimal(rng.randrange(-10 ** 12, 10 ** 12)).scaleb(-2)
+                   for _ in range(2000)]
+        rates = [Decimal(rng.randrange(1, 10 ** 13)).scaleb(-8)
+                 for _ in range(2000)]
+
+        self.check(amounts, rates)
+
+    def test_ties_round_to_even(self):
+        """Test half cents round to the even cent either side of zero"""
+        amounts = [Decimal('0.01'), Decimal('0.03'), Decimal('-0.01'),
+                   Decimal('-0.03'), Decimal('1.05'), Decimal('99999999.99')]
+        rates = [Decimal('0.5'), Decimal('0.5'), Decimal('0.5'),
+                 Decimal('0.5'), Decimal('1.5'), Decimal('12345.6789')]
+
+        self.check(amounts, rates)
+
+
+class RateLookupTests(TestCase):
+    """Test each date converts at the rate in effect on it"""
+
+    def setUp(self):
+        for date, rate in (('2024-01-01', '1.10'), ('2024-02-01', '1.20'),
+                           ('2024-03-01', '1.30')):
+            ExchangeRate.objects.create(currency='EUR', quote='USD',
+                                        date=date, rate=Decimal(rate))
+
+    def units(self, *dates):
+        dates = np.array(dates, dtype='datetime64[D]')
+        rates = fx.load_rates(['EUR'], 'USD', dates.min().item(),
+                              dates.max().item())
+        return fx.rate_units(np.array(['EUR'] * len(dates)), dates, 'USD',
+                             rates).tolist()
+
+    def test_latest_rate_on_or_before(self):
+        """Test rates apply from their date until the next one"""
+        self.assertEqual(
+            self.units('2024-02-15', '2024-01-31', '2024-02-01', '2025-01-01'),
+            [120000000, 110000000, 120000000, 130000000])
+
+    def test_missing_rate(self):
+        """Test a date before the pair's first rate is an error"""
+        with self.assertRaises(fx.MissingRate) as cm:
+            self.units('2023-12-31', '2024-01-05')
+
+        self.assertEqual(cm.exception.date, datetime.date(2023, 12, 31))
+
+
+class TotalsApiTests(TestCase):
+    """Test the converted totals API"""
+
+    def setUp(self):
+        self.user = create_user(email='test@example.com', password='pass1234')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.expense = TransactionType.objects.create(
+            name='Expense', is_expense=True)
+        self.food = Category.objects.create(
+            name='Food', user=self.user, transaction_type=self.expense)
+        self.travel = Category.objects.create(
+            name='Travel', user=self.user, transaction_type=self.expense)
+        self.accounts = {
+            currency: Account.objects.create(
+                name=currency, account_type='CHK', balance=0, user=self.user,
+                currency=currency)
+            for currency in ('USD', 'EUR', 'JPY')}
+
+        self.rates = {}
+        for currency, quote, date, rate in (
+                ('EUR', 'USD', '2024-01-01', '1.08723456'),
+                ('EUR', 'USD', '2024-02-01', '1.07999999'),
+                ('JPY', 'USD', '2024-01-01', '0.00675432'),
+                ('USD', 'EUR', '2024-01-01', '0.91975000'),
+                ('JPY', 'EUR', '2024-01-01', '0.00621234')):
+            ExchangeRate.objects.create(currency=currency, quote=quote,
+                                        date=date, rate=Decimal(rate))
+            self.rates[currency, quote, date] = Decimal(rate)
+
+    def create_transactions(self, count=300):
+        rng = random.Random(7)
+        Transaction.objects.bulk_create(
+            Transaction(
+                user=self.user, transaction_type=self.expense,
+                category=rng.choice((self.food, self.travel)),
+                account=rng.choice(list(self.accounts.values())),
+                amount=Decimal(rng.randrange(1, 10 ** 7)).scaleb(-2),
+                date=datetime.date(2024, rng.randint(1, 3),
+                                   rng.randint(1, 28)))
+            for _ in range(count))
+
+    def expected(self, quote, key):
+        """Return {key: (total, count)} converted one row at a time"""
+        totals = {}
+        for transaction_ in Transaction.objects.select_related('account'):
+            currency = transaction_.account.currency
+            if currency == quote:
+                rate = Decimal(1)
+            else:
+                rate = max((date, rate) for (c, q, date), rate
+                           in self.rates.items()
+                           if c == currency and q == quote
+                           and date <= transaction_.date.isoformat())[1]
+            total, count = totals.get(key(transaction_), (Decimal(0), 0))
+            totals[key(transaction_)] = (
+                total + convert(transaction_.amount, rate), count + 1)
+        return {key: (f'{total}', count)
+                for key, (total, count) in totals.items()}
+
+    def test_totals_match_decimal(self):
+        """Test totals in each currency equal converting row by row"""
+        self.create_transactions()
+
+        res = self.client.get(TOTALS_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['currency'], 'USD')
+        self.assertEqual(
+            {row['name']: (row['total'], row['count'])
+             for row in res.data['results']},
+            self.expected('USD', lambda t: t.category.name))
+
+        res = self.client.get(TOTALS_URL, {'group': 'month',
+                                           'currency': 'EUR'})
+        self.assertEqual(
+            {row['month']: (row['total'], row['count'])
+             for row in res.data['results']},
+            self.expected('EUR', lambda t: t.date.strftime('%Y-%m')))
+
+    def test_totals_follow_filters(self):
+        """Test only the filtered transactions are totalled"""
+        self.create_transactions(50)
+
+        res = self.client.get(TOTALS_URL, {'group': 'account',
+                                           'date_after': '2024-02-01'})
+
+        self.assertEqual(
+            {row['account']: row['count'] for row in res.data['results']},
+            {account.pk: account.transactions.filter(
+                date__gte='2024-02-01').count()
+             for account in self.accounts.values()
+             if account.transactions.filter(date__gte='2024-02-01').exists()})
+
+    def test_totals_split_by_type(self):
+        """Test income and expenses in one group are totalled apart"""
+        income = TransactionType.objects.create(name='Income')
+        account = self.accounts['USD']
+        for transaction_type, amount in ((self.expense, '30.00'),
+                                         (income, '100.00'),
+                                         (self.expense, '12.50')):
+            Transaction.objects.create(
+                user=self.user, transaction_type=transaction_type,
+                category=self.food, account=account, amount=Decimal(amount),
+                date=datetime.date(2024, 1, 5))
+
+        res = self.client.get(TOTALS_URL, {'group': 'account'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            sorted((row['account'], row['transaction_type'], row['total'],
+                    row['count']) for row in res.data['results']),
+            [(account.pk, self.expense.pk, '42.50', 2),
+             (account.pk, income.pk, '100.00', 1)])
+
+    def test_totals_invalid(self):
+        """Test an unknown group or a missing rate is rejected"""
+        Transaction.objects.create(
+            user=self.user, transaction_type=self.expense, category=self.food,
+            account=self.accounts['JPY'], amount=Decimal('100.00'),
+            date=datetime.date(2024, 1, 5))
+
+        res = self.client.get(TOTALS_URL, {'group': 'payee'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('group', res.data)
+
+        res = self.client.get(TOTALS_URL, {'currency': 'GBP'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('currency', res.data)
+
+        res = self.client.get(TOTALS_URL, {'currency': 'US$'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data['currency'], [
+            'Expected an ISO 4217 currency code such as USD.'])
+
+    def test_totals_currency_case_insensitive(self):
+        """Test a lowercase currency code is read as uppercase"""
+        self.create_transactions(20)
+
+        res = self.client.get(TOTALS_URL, {'currency': 'eur'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['currency'], 'EUR')
+
+    def test_account_currency_fixed_once_used(self):
+        """Test an account's currency cannot change once it has activity"""
+        account = self.accounts['EUR']
+        url = reverse('account-detail', args=[account.pk])
+
+        res = self.client.patch(url, {'currency': 'GBP'})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['currency'], 'GBP')
+
+        Transaction.objects.create(
+            user=self.user, transaction_type=self.expense, category=self.food,
+            account=account, amount=Decimal('1.00'),
+            date=datetime.date(2024, 1, 5))
+        res = self.client.patch(url, {'currency': 'EUR'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        res = self.client.patch(url, {'currency': 'eur'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
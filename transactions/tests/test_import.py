@@ -0,0 +1,158 @@
+"""
+Tests for streaming transaction imports
+"""
+import datetime
+import tempfile
+from decimal import Decimal
+from io import BytesIO, StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from transactions import cache, rollups
+from transactions.importers import import_transactions, iter_ofx_rows
+from transactions.models import Account, Category, Transaction, TransactionType
+
+IMPORT_URL = reverse('transaction-import-file')
+
+CSV_EXPORT = b"""date,amount,description,category,transaction_type,account
+2024-05-01,12.50,Corner shop,Groceries,Expense,Wallet
+2024-05-02,1000,May salary,Salary,Income,Wallet
+2024-05-03,not-a-number,Broken row,Groceries,Expense,Wallet
+2024-05-04,-3.20,Coffee,groceries,,wallet
+"""
+
+OFX_EXPORT = b"""OFXHEADER:100
+DATA:OFXSGML
+<OFX>
+<BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>
+<STMTTRN>
+<TRNTYPE>DEBIT
+<DTPOSTED>20240510120000
+<TRNAMT>-45.10
+<FITID>1
+<NAME>Supermarket
+<MEMO>Card 1234
+</STMTTRN>
+<STMTTRN>
+<TRNTYPE>CREDIT
+<DTPOSTED>20240511
+<TRNAMT>20.00
+<FITID>2
+<NAME>Refund
+</STMTTRN>
+</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1>
+</OFX>
+"""
+
+
+class ImportTests(TestCase):
+    """Test importing bank exports"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'test@example.com', 'testpass123')
+        cache.transaction_types.clear()
+        # Created by migration.
+        self.income = TransactionType.objects.get(name='Income')
+        self.expense = TransactionType.objects.get(name='Expense')
+        Category.objects.create(name='Groceries', user=self.user,
+                                transaction_type=self.expense)
+        Category.objects.create(name='Salary', user=self.user,
+                                transaction_type=self.income)
+        self.account = Account.objects.create(
+            name='Wallet', account_type='CSH', balance=0, user=self.user)
+
+    def test_csv_import(self):
+        """Test valid rows are imported and invalid ones reported"""
+        importer = import_transactions(
+            self.user, BytesIO(CSV_EXPORT), 'csv', batch_size=2)
+
+        self.assertEqual(importer.created, 3)
+        self.assertEqual(importer.error_count, 1)
+        self.assertEqual(importer.errors[0]['line'], 4)
+        self.assertIn('amount', importer.errors[0]['errors'])
+
+        coffee = Transaction.objects.get(description='Coffee')
+        self.assertEqual(coffee.amount, Decimal('3.20'))
+        self.assertEqual(coffee.transaction_type, self.expense)
+
+    def test_import_updates_derived_data(self):
+        """Test bulk inserts still post to balances and rollups"""
+        import_transactions(self.user, BytesIO(CSV_EXPORT), 'csv')
+
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.balance, Decimal('984.30'))
+        self.assertEqual(rollups.verify(self.user), [])
+
+    def test_lookups_built_once(self):
+        """Test query count depends on batches, not rows"""
+        rows = b''.join(
+            b'2024-05-%02d,1,Row,Groceries,Expense,Wallet\n' % (i % 28 + 1)
+            for i in range(300))
+        export = CSV_EXPORT.splitlines(keepends=True)[0] + rows
+
+        with CaptureQueriesContext(connection) as context:
+            import_transactions(self.user, BytesIO(export), 'csv',
+                                batch_size=100)
+
+        inserts = [query for query in context.captured_queries if query[
+            'sql'].startswith('INSERT INTO "transactions_transaction"')]
+        self.assertEqual(len(inserts), 3)
+        self.assertLess(len(context.captured_queries), 30)
+        self.assertEqual(Transaction.objects.count(), 300)
+
+    def test_ofx_rows(self):
+        """Test OFX statements are parsed into rows"""
+        rows = [row for _, row in iter_ofx_rows(BytesIO(OFX_EXPORT))]
+
+        self.assertEqual(rows, [
+            {'date': '2024-05-10', 'amount': '-45.10',
+             'description': 'Supermarket Card 1234'},
+            {'date': '2024-05-11', 'amount': '20.00',
+             'description': 'Refund'},
+        ])
+
+    def test_import_endpoint(self):
+        """Test uploading an OFX export with defaults"""
+        client = APIClient()
+        client.force_authenticate(self.user)
+        upload = SimpleUploadedFile('statement.ofx', OFX_EXPORT)
+
+        res = client.post(IMPORT_URL, {
+            'file': upload, 'category': 'Groceries', 'account': 'Wallet'})
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data['created'], 2)
+        supermarket = Transaction.objects.get(date=datetime.date(2024, 5, 10))
+        self.assertEqual(supermarket.transaction_type, self.expense)
+
+    def test_import_endpoint_rejects_unknown_format(self):
+        """Test an unsupported file type is rejected"""
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        res = client.post(IMPORT_URL, {
+            'file': SimpleUploadedFile('statement.xls', b'')})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_import_command(self):
+        """Test the management command imports a file"""
+        with tempfile.NamedTemporaryFile(suffix='.csv') as export:
+            export.write(CSV_EXPORT)
+            export.flush()
+            out = StringIO()
+
+            call_command('import_transactions', export.name,
+                         user=self.user.email, stdout=out, stderr=StringIO())
+
+        self.assertIn('Imported 3 transactions', out.getvalue())
@@ -0,0 +1,200 @@
+"""
+Tests for the account balance ledger
+"""
+import datetime
+import threading
+import time
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import OperationalError, close_old_connections, connection
+from django.db import transaction as db_transaction
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from transactions.models import Account, Category, Transaction, TransactionType
+
+
+def create_books(email='test@example.com'):
+    """Create and return a user with an account, category and two types"""
+    user = get_user_model().objects.create_user(email, 'testpass123')
+    income = TransactionType.objects.create(name='Income')
+    expense = TransactionType.objects.create(name='Expense', is_expense=True)
+    category = Category.objects.create(
+        name='General', user=user, transaction_type=expense)
+    account = Account.objects.create(
+        name='Wallet', account_type='CSH', balance=100, user=user)
+    return user, account, category, income, expense
+
+
+def create_transaction(user, account, category, transaction_type, amount):
+    return Transaction.objects.create(
+        user=user, account=account, category=category,
+        transaction_type=transaction_type, amount=amount,
+        date=datetime.date(2024, 5, 1))
+
+
+class LedgerTests(TestCase):
+    """Test that writes keep Account.balance in step"""
+
+    def setUp(self):
+        (self.user, self.account, self.category,
+         self.income, self.expense) = create_books()
+
+    def assertBalance(self, account, expected):
+        account.refresh_from_db()
+        self.assertEqual(account.balance, Decimal(expected))
+
+    def test_create_income_and_expense(self):
+        """Test income adds to and expenses subtract from the balance"""
+        create_transaction(self.user, self.account, self.category,
+                           self.income, Decimal('50.25'))
+        create_transaction(self.user, self.account, self.category,
+                           self.expense, Decimal('20.10'))
+
+        self.assertBalance(self.account, '130.15')
+
+    def test_update_amount_and_type(self):
+        """Test updating a transaction reverses its previous effect"""
+        transaction = create_transaction(self.user, self.account,
+                                         self.category, self.income, 30)
+
+        transaction.amount = 40
+        transaction.save()
+        self.assertBalance(self.account, '140.00')
+
+        transaction.transaction_type = self.expense
+        transaction.save()
+        self.assertBalance(self.account, '60.00')
+
+    def test_move_between_accounts(self):
+        """Test moving a loaded transaction to another account"""
+        other = Account.objects.create(
+            name='Bank', account_type='BNK', balance=0, user=self.user)
+        create_transaction(self.user, self.account, self.category,
+                           self.income, 25)
+
+        transaction = Transaction.objects.get()
+        transaction.account = other
+        transaction.save()
+
+        self.assertBalance(self.account, '100.00')
+        self.assertBalance(other, '25.00')
+
+    def test_delete_reverts_balance(self):
+        """Test deleting transactions one by one and in bulk"""
+        first = create_transaction(self.user, self.account, self.category,
+                                   self.expense, 10)
+        create_transaction(self.user, self.account, self.category,
+                           self.expense, 15)
+
+        first.delete()
+        self.assertBalance(self.account, '85.00')
+
+        Transaction.objects.all().delete()
+        self.assertBalance(self.account, '100.00')
+
+    def test_stale_account_instance_is_not_used(self):
+        """Test the balance is adjusted in the database, not in Python"""
+        stale = Account.objects.get(pk=self.account.pk)
+
+        create_transaction(self.user, stale, self.category, self.income, 5)
+        create_transaction(self.user, stale, self.category, self.income, 7)
+
+        self.assertEqual(stale.balance, Decimal('100.00'))
+        self.assertBalance(self.account, '112.00')
+
+
+class AccountBalanceApiTests(TestCase):
+    """Test the API accepts a balance only as the opening balance"""
+
+    def setUp(self):
+        (self.user, self.account, self.category,
+         self.income, self.expense) = create_books()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_opening_balance_on_create(self):
+        """Test a new account starts from the balance given"""
+        res = self.client.post(reverse('account-list'), {
+            'name': 'Bank', 'account_type': 'BNK', 'balance': '250.00'})
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data['balance'], '250.00')
+
+    def test_balance_not_updatable(self):
+        """Test updates leave the ledger's balance alone"""
+        create_transaction(self.user, self.account, self.category,
+                           self.income, 5)
+        url = reverse('account-detail', args=[self.account.pk])
+
+        res = self.client.patch(url, {'name': 'Purse', 'balance': '0.00'})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        res = self.client.put(url, {'name': 'Purse', 'account_type': 'CSH',
+                                    'balance': '0.00'})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.name, 'Purse')
+        self.assertEqual(self.account.balance, Decimal('105.00'))
+
+
+class LedgerConcurrencyTests(TransactionTestCase):
+    """Test many writers posting to the same account at once"""
+
+    writers = 8
+    writes_per_writer = 10
+
+    def test_concurrent_writers(self):
+        """Test no update is lost when writers race on one account"""
+        user, account, category, income, _ = create_books()
+        start = threading.Barrier(self.writers)
+        errors = []
+
+        def write():
+            try:
+                start.wait()
+                for _ in range(self.writes_per_writer):
+                    self.retry_locked(lambda: create_transaction(
+                        user, account, category, income, Decimal('1.01')))
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=write)
+                   for _ in range(self.writers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        close_old_connections()
+
+        self.assertEqual(errors, [])
+        writes = self.writers * self.writes_per_writer
+        self.assertEqual(Transaction.objects.count(), writes)
+        account.refresh_from_db()
+        self.assertEqual(account.balance,
+                         Decimal('100') + writes * Decimal('1.01'))
+
+    def retry_locked(self, write, timeout=30):
+        """
+        Run `write` atomically, retrying for up to `timeout` seconds while
+        the shared-cache SQLite test database reports the table as locked
+        by another writer. A locked FTS5 index surfaces as its constructor
+        failing.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                with db_transaction.atomic():
+                    return write()
+            except OperationalError as exc:
+                if time.monotonic() > deadline or not any(
+                        message in str(exc) for message in
+                        ('locked', 'vtable constructor failed')):
+                    raise
+            time.sleep(0.001)
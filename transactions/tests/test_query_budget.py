@@ -0,0 +1,107 @@
+"""
+Tests that transaction reads run in a fixed number of SQL queries
+"""
+import datetime
+from contextlib import contextmanager
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from transactions.models import Account, Category, Transaction, TransactionType
+from transactions.serializers import (
+    TransactionDetailSerializer,
+    TransactionListSerializer,
+)
+
+TRANSACTIONS_URL = reverse('transaction-list')
+
+
+def detail_url(transaction_id):
+    """Return transaction detail URL"""
+    return reverse('transaction-detail', args=[transaction_id])
+
+
+def create_transactions(user, count):
+    """Create `count` transactions spread over distinct types and categories"""
+    account = Account.objects.create(
+        name='Wallet', account_type='CSH', balance=0, user=user)
+    types = [TransactionType.objects.create(name=name)
+             for name in ('Income', 'Expense')]
+    categories = [
+        Category.objects.create(name=f'Category {i}', user=user,
+                                transaction_type=types[i % 2])
+        for i in range(10)
+    ]
+
+    return Transaction.objects.bulk_create(
+        Transaction(user=user, transaction_type=types[i % 2],
+                    category=categories[i % 10], account=account,
+                    amount=i, date=datetime.date(2024, 1, 1)
+                    + datetime.timedelta(days=i % 365))
+        for i in range(count)
+    )
+
+
+class QueryBudgetTests(TestCase):
+    """Test the query budget of transaction reads"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'test@example.com', 'testpass123')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    @contextmanager
+    def assertMaxQueries(self, budget):
+        """Fail if the block runs more than `budget` SQL queries"""
+        with CaptureQueriesContext(connection) as context:
+            yield context
+
+        executed = [query['sql'] for query in context.captured_queries]
+        self.assertLessEqual(
+            len(executed), budget,
+            f'{len(executed)} queries exceed the budget of {budget}:\n'
+            + '\n'.join(executed))
+
+    def test_list_serializer_budget_is_independent_of_row_count(self):
+        """Test serializing 1 or 1,000 rows costs the same single query"""
+        for count in (1, 1000):
+            Transaction.objects.all().delete()
+            TransactionType.objects.all().delete()
+            create_transactions(self.user, count)
+
+            with self.assertMaxQueries(1):
+                queryset = Transaction.objects.for_user(
+                    self.user).with_related()
+                data = TransactionListSerializer(queryset, many=True).data
+
+            self.assertEqual(len(data), count)
+
+    def test_list_page_budget(self):
+        """Test a 100 row page is served in a constant number of queries"""
+        create_transactions(self.user, 250)
+
+        # One version lookup for the ETag and one query for the page.
+        with self.assertMaxQueries(2):
+            res = self.client.get(f'{TRANSACTIONS_URL}?page_size=100')
+
+        self.assertEqual(len(res.data['results']), 100)
+
+        with self.assertMaxQueries(2):
+            self.client.get(res.data['next'])
+
+    def test_detail_budget(self):
+        """Test retrieving a transaction runs a single query"""
+        transaction = create_transactions(self.user, 1)[0]
+
+        with self.assertMaxQueries(1):
+            res = self.client.get(detail_url(transaction.id))
+
+        expected = TransactionDetailSerializer(
+            Transaction.objects.with_related().get(id=transaction.id)).data
+        self.assertEqual(res.data, expected)
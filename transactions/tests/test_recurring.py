@@ -0,0 +1,307 @@
+"""
+Tests for recurring transactions and their lazy materialization
+"""
+import datetime
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from transactions import schedules
+from transactions.models import (
+    Account,
+    Budget,
+    Category,
+    MonthlySummary,
+    RecurringTransaction,
+    Transaction,
+    TransactionType,
+)
+from transactions.recurring import materialize_due
+
+RECURRING_URL = reverse('recurringtransaction-list')
+OCCURRENCES_URL = reverse('recurringtransaction-occurrences')
+TRANSACTIONS_URL = reverse('transaction-list')
+SUMMARIES_URL = reverse('monthlysummary-list')
+
+
+def create_user(**params):
+    return get_user_model().objects.create_user(**params)
+
+
+def day(offset):
+    return timezone.localdate() + datetime.timedelta(days=offset)
+
+
+class ScheduleTests(SimpleTestCase):
+    """Test the recurrence date arithmetic"""
+
+    def dates(self, start, frequency, interval, window_start, window_end,
+              end=None):
+        return list(schedules.occurrences(start, frequency, interval,
+                                          window_start, window_end, end))
+
+    def test_daily_and_weekly(self):
+        """Test day based rules step from their start date"""
+        start = datetime.date(2024, 1, 1)
+        self.assertEqual(
+            self.dates(start, schedules.WEEKLY, 2, datetime.date(2024, 1, 2),
+                       datetime.date(2024, 2, 12)),
+            [datetime.date(2024, 1, 15), datetime.date(2024, 1, 29),
+             datetime.date(2024, 2, 12)])
+        self.assertEqual(
+            self.dates(start, schedules.DAILY, 3, datetime.date(2023, 1, 1),
+                       datetime.date(2024, 1, 7)),
+            [start, datetime.date(2024, 1, 4), datetime.date(2024, 1, 7)])
+
+    def test_month_end_is_clamped(self):
+        """Test a rule on the 31st falls on each month's last day"""
+        self.assertEqual(
+            self.dates(datetime.date(2024, 1, 31), schedules.MONTHLY, 1,
+                       datetime.date(2024, 1, 1), datetime.date(2024, 4, 30)),
+            [datetime.date(2024, 1, 31), datetime.date(2024, 2, 29),
+             datetime.date(2024, 3, 31), datetime.date(2024, 4, 30)])
+        self.assertEqual(
+            self.dates(datetime.date(2024, 2, 29), schedules.YEARLY, 1,
+                       datetime.date(2025, 1, 1), datetime.date(2028, 12, 31)),
+            [datetime.date(2025, 2, 28), datetime.date(2026, 2, 28),
+             datetime.date(2027, 2, 28), datetime.date(2028, 2, 29)])
+
+    def test_end_date_and_limits(self):
+        """Test no date past the rule's end or datetime.date.max is made"""
+        self.assertEqual(
+            self.dates(datetime.date(2024, 1, 1), schedules.MONTHLY, 1,
+                       datetime.date(2024, 1, 1), datetime.date(2024, 12, 31),
+                       end=datetime.date(2024, 2, 15)),
+            [datetime.date(2024, 1, 1), datetime.date(2024, 2, 1)])
+        self.assertEqual(
+            self.dates(datetime.date(9999, 11, 30), schedules.MONTHLY, 1,
+                       datetime.date(9999, 12, 1), datetime.date.max),
+            [datetime.date(9999, 12, 30)])
+
+    def test_window_is_reached_directly(self):
+        """Test the first occurrence in a window takes no walk from start"""
+        start = datetime.date(1900, 1, 31)
+        window = datetime.date(2024, 3, 1)
+        for frequency, interval in ((schedules.DAILY, 1),
+                                    (schedules.WEEKLY, 3),
+                                    (schedules.MONTHLY, 5),
+                                    (schedules.YEARLY, 2)):
+            n = schedules.first_index(start, frequency, interval, window)
+            self.assertGreaterEqual(
+                schedules.nth_occurrence(start, frequency, interval, n),
+                window)
+            self.assertLess(
+                schedules.nth_occurrence(start, frequency, interval, n - 1),
+                window)
+
+
+class RecurringTransactionTests(TestCase):
+    """Test recurring transactions through the API"""
+
+    def setUp(self):
+        self.user = create_user(email='test@example.com', password='pass1234')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.transaction_type = TransactionType.objects.create(
+            name='Expense', is_expense=True)
+        self.category = Category.objects.create(
+            name='Rent', user=self.user,
+            transaction_type=self.transaction_type)
+        self.account = Account.objects.create(
+            name='Checking', account_type='CHK', balance=0, user=self.user)
+
+    def create_rule(self, **params):
+        defaults = {
+            'user': self.user, 'transaction_type': self.transaction_type,
+            'category': self.category, 'account': self.account,
+            'amount': Decimal('100.00'), 'description': 'Rent',
+            'frequency': RecurringTransaction.Frequency.WEEKLY,
+            'start_date': day(-14),
+        }
+        defaults.update(params)
+        rule = RecurringTransaction.objects.create(**defaults)
+        self.user.refresh_from_db()
+        return rule
+
+    def dates(self):
+        return list(Transaction.objects.filter(user=self.user).order_by(
+            'date').values_list('date', flat=True))
+
+    def test_create_rule(self):
+        """Test creating a rule writes no transactions"""
+        payload = {
+            'transaction_type': self.transaction_type.pk,
+            'category': self.category.pk, 'account': self.account.pk,
+            'amount': '1200.00', 'frequency': 'M', 'start_date': '2024-01-31',
+        }
+        res = self.client.post(RECURRING_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data['next_occurrence'], '2024-01-31')
+        self.assertEqual(self.dates(), [])
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.next_recurring_date,
+                         datetime.date(2024, 1, 31))
+
+    def test_create_rule_invalid(self):
+        """Test another user's account and a reversed range are rejected"""
+        other = create_user(email='other@example.com', password='pass1234')
+        account = Account.objects.create(
+            name='Other', account_type='CHK', balance=0, user=other)
+        payload = {
+            'transaction_type': self.transaction_type.pk,
+            'category': self.category.pk, 'account': account.pk,
+            'amount': '1.00', 'frequency': 'D', 'start_date': '2024-01-02',
+        }
+
+        res = self.client.post(RECURRING_URL, payload)
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('account', res.data)
+
+        res = self.client.post(RECURRING_URL, {
+            **payload, 'account': self.account.pk, 'end_date': '2024-01-01'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('end_date', res.data)
+
+        res = self.client.post(RECURRING_URL, {**payload, 'interval': 0})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_list_writes_due_occurrences_once(self):
+        """Test listing writes the due occurrences and no future ones"""
+        self.create_rule()
+
+        res = self.client.get(TRANSACTIONS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 3)
+        self.assertEqual(self.dates(), [day(-14), day(-7), day(0)])
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.balance, Decimal('-300.00'))
+
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.next_recurring_date, day(7))
+        self.client.get(TRANSACTIONS_URL)
+        self.assertEqual(len(self.dates()), 3)
+
+    def test_list_window_bounds_materialization(self):
+        """Test a list ending in the past writes only up to its end"""
+        self.create_rule()
+
+        self.client.get(TRANSACTIONS_URL, {'date_before': day(-10)})
+
+        self.assertEqual(self.dates(), [day(-14)])
+
+    def test_nothing_due_runs_no_rule_query(self):
+        """Test a list with no due occurrences skips the rule lookup"""
+        self.create_rule(start_date=day(30))
+
+        with self.assertNumQueries(2):
+            self.client.get(TRANSACTIONS_URL)
+
+    def test_totals_write_due_occurrences(self):
+        """Test totals count due occurrences without a list first"""
+        self.create_rule()
+
+        res = self.client.get(reverse('transaction-totals'))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([(row['name'], row['count'])
+                          for row in res.data['results']], [('Rent', 3)])
+
+    def test_budget_reads_write_due_occurrences(self):
+        """Test a budget read includes occurrences due since the last read"""
+        budget = Budget.objects.create(
+            user=self.user, category=self.category,
+            period=Budget.Period.MONTHLY, start=day(0),
+            amount=Decimal('1000.00'))
+        self.create_rule()
+        due = [date for date in (day(-14), day(-7), day(0))
+               if budget.start <= date <= budget.end]
+
+        res = self.client.get(
+            reverse('budget-detail', args=[budget.pk]))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(Decimal(res.data['spent']), 100 * len(due))
+        self.assertEqual(len(self.dates()), 3)
+
+    def test_summaries_write_due_occurrences(self):
+        """Test listing summaries writes what is due in their window"""
+        rule = self.create_rule(
+            frequency=RecurringTransaction.Frequency.MONTHLY,
+            start_date=datetime.date(2024, 1, 15))
+
+        res = self.client.get(SUMMARIES_URL, {'end': '2024-02'})
+
+        self.assertEqual([row['total'] for row in res.data],
+                         ['100.00', '100.00'])
+        rule.refresh_from_db()
+        self.assertEqual(rule.materialized_through,
+                         datetime.date(2024, 2, 29))
+        self.assertEqual(rule.next_occurrence, datetime.date(2024, 3, 15))
+        self.assertEqual(MonthlySummary.objects.count(), 2)
+
+    def test_materialize_claims_each_occurrence_once(self):
+        """Test a second materialization from a stale copy writes nothing"""
+        self.create_rule()
+        stale = get_user_model().objects.get(pk=self.user.pk)
+
+        self.assertEqual(len(materialize_due(self.user)), 3)
+        self.assertEqual(materialize_due(stale), [])
+        self.assertEqual(len(self.dates()), 3)
+        self.assertEqual(stale.next_recurring_date, day(7))
+
+    def test_edited_schedule_continues_after_written(self):
+        """Test changing a rule does not rewrite occurrences already made"""
+        rule = self.create_rule()
+        materialize_due(self.user)
+
+        res = self.client.patch(
+            reverse('recurringtransaction-detail', args=[rule.pk]),
+            {'frequency': 'D', 'end_date': day(2).isoformat()})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['next_occurrence'], day(1).isoformat())
+
+    def test_occurrences(self):
+        """Test occurrences lists written and future dates in a window"""
+        rule = self.create_rule()
+        materialize_due(self.user)
+
+        res = self.client.get(OCCURRENCES_URL, {
+            'start': day(-7).isoformat(), 'end': day(14).isoformat()})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(row['date'], row['materialized']) for row in res.data],
+            [(day(-7).isoformat(), True), (day(0).isoformat(), True),
+             (day(7).isoformat(), False), (day(14).isoformat(), False)])
+        self.assertEqual(res.data[0]['recurring'], rule.pk)
+        self.assertEqual(res.data[0]['amount'], '100.00')
+        self.assertEqual(res.data[0]['category'], 'Rent')
+        self.assertEqual(len(self.dates()), 3)
+
+    def test_occurrences_window_validated(self):
+        """Test a missing, reversed or too long window is rejected"""
+        for params in ({'start': '2024-01-01'},
+                       {'start': '2024-02-01', 'end': '2024-01-01'},
+                       {'start': '2000-01-01', 'end': '2024-01-01'}):
+            res = self.client.get(OCCURRENCES_URL, params)
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_rules_private_to_user(self):
+        """Test users neither see nor materialize other users' rules"""
+        other = create_user(email='other@example.com', password='pass1234')
+        self.create_rule(user=other)
+
+        res = self.client.get(RECURRING_URL)
+
+        self.assertEqual(res.data, [])
+        self.client.get(TRANSACTIONS_URL)
+        self.assertFalse(Transaction.objects.exists())
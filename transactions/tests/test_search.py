@@ -0,0 +1,184 @@
+"""
+Tests for transaction description search
+"""
+import datetime
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from transactions import search
+from transactions.models import Account, Category, Transaction, TransactionType
+
+SEARCH_URL = reverse('transaction-search')
+
+
+def create_user(email='test@example.com', password='testpass123'):
+    return get_user_model().objects.create_user(email, password)
+
+
+class SearchTests(TestCase):
+    """Test searching a user's transactions by description"""
+
+    def setUp(self):
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        self.transaction_type = TransactionType.objects.create(name='Expense')
+        self.category = Category.objects.create(
+            name='Food', user=self.user,
+            transaction_type=self.transaction_type)
+        self.account = Account.objects.create(
+            name='Cash', account_type='CSH', balance=0, user=self.user)
+
+    def create_transaction(self, description, user=None, day=1):
+        user = user or self.user
+        category, account = self.category, self.account
+        if user != self.user:
+            category = Category.objects.create(
+                name='Food', user=user, transaction_type=self.transaction_type)
+            account = Account.objects.create(
+                name='Cash', account_type='CSH', balance=0, user=user)
+
+        return Transaction.objects.create(
+            user=user, transaction_type=self.transaction_type,
+            category=category, account=account, amount=1,
+            description=description, date=datetime.date(2024, 1, day))
+
+    def search(self, query):
+        return [t.description
+                for t in search.search_transactions(self.user, query)]
+
+    def test_index_available(self):
+        """Test the FTS5 index exists on the test database"""
+        self.assertTrue(search.has_index())
+
+    def test_prefix_and_all_terms(self):
+        """Test every word must match, each as a prefix"""
+        self.create_transaction('Corner Coffee Shop')
+        self.create_transaction('Coffee beans online')
+        self.create_transaction('Shoe shop')
+
+        self.assertCountEqual(self.search('coff'),
+                              ['Corner Coffee Shop', 'Coffee beans online'])
+        self.assertEqual(self.search('coffee sho'), ['Corner Coffee Shop'])
+        self.assertEqual(self.search('tea'), [])
+
+    def test_ranked_by_relevance_then_date(self):
+        """Test closer matches come first, ties most recent first"""
+        self.create_transaction('Groceries and a coffee from the market', day=3)
+        self.create_transaction('Coffee', day=1)
+        self.create_transaction('Coffee', day=2)
+
+        results = search.search_transactions(self.user, 'coffee')
+
+        self.assertEqual([t.date.day for t in results], [2, 1, 3])
+
+    def test_accents_and_case_folded(self):
+        """Test matching ignores case and diacritics"""
+        self.create_transaction('CAFÉ Crème')
+
+        self.assertEqual(self.search('cafe creme'), ['CAFÉ Crème'])
+
+    def test_other_users_excluded(self):
+        """Test another user's matches are not returned"""
+        self.create_transaction('Coffee', user=create_user('other@example.com'))
+
+        self.assertEqual(self.search('coffee'), [])
+
+    def test_index_follows_writes(self):
+        """Test saves, queryset updates, bulk inserts and deletes"""
+        transaction = self.create_transaction('Coffee')
+        transaction.description = 'Tea house'
+        transaction.save()
+        self.assertEqual(self.search('coffee'), [])
+        self.assertEqual(self.search('tea'), ['Tea house'])
+
+        Transaction.objects.filter(pk=transaction.pk).update(
+            description='Bakery')
+        self.assertEqual(self.search('bake'), ['Bakery'])
+
+        Transaction.objects.bulk_create([Transaction(
+            user=self.user, transaction_type=self.transaction_type,
+            category=self.category, account=self.account, amount=1,
+            description='Bakery two', date=datetime.date(2024, 1, 1))])
+        self.assertEqual(len(self.search('bakery')), 2)
+
+        transaction.delete()
+        self.assertEqual(self.search('bakery'), ['Bakery two'])
+
+    def test_like_fallback(self):
+        """Test LIKE finds and ranks what the index does"""
+        for description in ('Corner Coffee Shop', 'Coffee beans', 'Toffee',
+                            'Coffeehouse coffee', 'Decaf coffee'):
+            self.create_transaction(description)
+        indexed = self.search('coffee')
+
+        with mock.patch.object(search, 'has_index', return_value=False):
+            self.assertEqual(self.search('coffee'), indexed)
+        self.assertNotIn('Toffee', indexed)
+
+    def test_like_fallback_filters_in_sql(self):
+        """Test LIKE reads only bounded, word-prefix candidates"""
+        for _ in range(30):
+            self.create_transaction('Coffee')
+        self.create_transaction('Toffee')
+
+        with mock.patch.object(search, 'has_index', return_value=False), \
+                mock.patch.object(search, 'matches', return_value=True), \
+                mock.patch.object(search, 'rank',
+                                  side_effect=search.rank) as rank:
+            results = search.search_transactions(self.user, 'coffee', limit=2)
+
+        self.assertEqual(len(results), 2)
+        candidates = rank.call_args.args[0]
+        self.assertEqual(len(candidates), 2 * search.LIKE_CANDIDATES)
+        self.assertNotIn('Toffee', [row[1] for row in candidates])
+
+    def test_older_best_match_found(self):
+        """Test the best match is returned however many newer ones follow"""
+        self.create_transaction('Coffee')
+        for _ in range(5):
+            self.create_transaction('Coffee and a long list of other things')
+
+        results = search.search_transactions(self.user, 'coffee', limit=2)
+
+        self.assertEqual([t.description for t in results], [
+            'Coffee', 'Coffee and a long list of other things'])
+
+    def test_index_looked_up_once(self):
+        """Test searches after the first run only the ranked query"""
+        self.create_transaction('Coffee')
+        search.has_index()
+
+        with self.assertNumQueries(2):
+            search.search_transactions(self.user, 'coffee')
+
+    def test_search_endpoint(self):
+        """Test the endpoint returns matching transactions with details"""
+        transaction = self.create_transaction('Corner Coffee Shop')
+
+        res = self.client.get(SEARCH_URL, {'q': 'coffee'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([row['id'] for row in res.data], [transaction.id])
+        self.assertEqual(res.data[0]['description'], 'Corner Coffee Shop')
+
+    def test_search_endpoint_validates_params(self):
+        """Test a missing query or bad limit returns 400"""
+        for params in ({}, {'q': ' '}, {'q': 'a', 'limit': 0},
+                       {'q': 'a', 'limit': 'x'}):
+            res = self.client.get(SEARCH_URL, params)
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_punctuation_only_query(self):
+        """Test a query with no words matches nothing"""
+        self.create_transaction('Coffee')
+
+        self.assertEqual(self.search('"*()'), [])
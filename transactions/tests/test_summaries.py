@@ -0,0 +1,188 @@
+"""
+Tests for monthly summary rollups and the summaries API
+"""
+import datetime
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from transactions import rollups
+from transactions.models import (
+    Account, Category, MonthlySummary, Transaction, TransactionType)
+
+SUMMARIES_URL = reverse('monthlysummary-list')
+
+
+def create_user(email='test@example.com', password='testpass123'):
+    """Create and return a user"""
+    return get_user_model().objects.create_user(email, password)
+
+
+class SummaryTestsMixin:
+
+    def setUp(self):
+        self.user = create_user()
+        self.expense = TransactionType.objects.create(
+            name='Expense', is_expense=True)
+        self.food = Category.objects.create(
+            name='Food', user=self.user, transaction_type=self.expense)
+        self.rent = Category.objects.create(
+            name='Rent', user=self.user, transaction_type=self.expense)
+        self.account = Account.objects.create(
+            name='Wallet', account_type='CSH', balance=0, user=self.user)
+
+    def create_transaction(self, amount, date, category=None):
+        return Transaction.objects.create(
+            user=self.user, account=self.account,
+            category=category or self.food, transaction_type=self.expense,
+            amount=amount, date=date)
+
+    def summary(self, month, category=None):
+        return MonthlySummary.objects.get(
+            user=self.user, month=month, category=category or self.food,
+            transaction_type=self.expense)
+
+
+class RollupTests(SummaryTestsMixin, TestCase):
+    """Test that transaction writes maintain the rollups"""
+
+    def test_create_accumulates_per_month(self):
+        """Test transactions are added to their month's row"""
+        self.create_transaction(10, datetime.date(2024, 5, 3))
+        self.create_transaction('2.50', datetime.date(2024, 5, 28))
+        self.create_transaction(7, datetime.date(2024, 6, 1))
+
+        may = self.summary(datetime.date(2024, 5, 1))
+        self.assertEqual((may.total, may.count), (Decimal('12.50'), 2))
+        june = self.summary(datetime.date(2024, 6, 1))
+        self.assertEqual((june.total, june.count), (Decimal('7.00'), 1))
+
+    def test_update_moves_between_rows(self):
+        """Test changing date and category moves the amount"""
+        transaction = self.create_transaction(10, datetime.date(2024, 5, 3))
+        self.create_transaction(5, datetime.date(2024, 5, 4))
+
+        transaction.date = datetime.date(2024, 6, 3)
+        transaction.category = self.rent
+        transaction.amount = 12
+        transaction.save()
+
+        may = self.summary(datetime.date(2024, 5, 1))
+        self.assertEqual((may.total, may.count), (Decimal('5.00'), 1))
+        june = self.summary(datetime.date(2024, 6, 1), self.rent)
+        self.assertEqual((june.total, june.count), (Decimal('12.00'), 1))
+
+    def test_currencies_kept_apart(self):
+        """Test each account currency has its own row"""
+        euros = Account.objects.create(name='Euros', account_type='CHK',
+                                       balance=0, user=self.user,
+                                       currency='EUR')
+        self.create_transaction(10, datetime.date(2024, 5, 3))
+        transaction = Transaction.objects.create(
+            user=self.user, account=euros, category=self.food,
+            transaction_type=self.expense, amount=4,
+            date=datetime.date(2024, 5, 9))
+
+        self.assertEqual(
+            sorted(MonthlySummary.objects.values_list(
+                'currency', 'total', 'count')),
+            [('EUR', Decimal('4.00'), 1), ('USD', Decimal('10.00'), 1)])
+
+        transaction.delete()
+        self.assertEqual(
+            list(MonthlySummary.objects.values_list('currency', 'total')),
+            [('USD', Decimal('10.00'))])
+        self.assertEqual(rollups.verify(self.user), [])
+
+    def test_delete_removes_empty_rows(self):
+        """Test a row is removed once its last transaction is deleted"""
+        transaction = self.create_transaction(10, datetime.date(2024, 5, 3))
+
+        transaction.delete()
+
+        self.assertFalse(MonthlySummary.objects.exists())
+
+    def test_category_delete_cascades(self):
+        """Test deleting a category with transactions leaves no rollups"""
+        self.create_transaction(10, datetime.date(2024, 5, 3))
+
+        self.food.delete()
+
+        self.assertFalse(MonthlySummary.objects.exists())
+
+    def test_rebuild_and_verify(self):
+        """Test rebuild restores rollups that drifted from the raw data"""
+        self.create_transaction(10, datetime.date(2024, 5, 3))
+        self.create_transaction(4, datetime.date(2024, 7, 3), self.rent)
+        MonthlySummary.objects.filter(month=datetime.date(2024, 5, 1)).update(
+            total=99)
+
+        self.assertEqual(len(rollups.verify()), 1)
+
+        rollups.rebuild()
+
+        self.assertEqual(rollups.verify(), [])
+        self.assertEqual(self.summary(datetime.date(2024, 5, 1)).total,
+                         Decimal('10.00'))
+
+    def test_rebuild_command(self):
+        """Test the management command rebuilds and verifies"""
+        self.create_transaction(10, datetime.date(2024, 5, 3))
+        MonthlySummary.objects.all().delete()
+
+        with self.assertRaises(CommandError):
+            call_command('rebuild_summaries', '--verify-only',
+                         stdout=StringIO(), stderr=StringIO())
+
+        out = StringIO()
+        call_command('rebuild_summaries', stdout=out)
+
+        self.assertIn('Summaries match', out.getvalue())
+
+
+class SummaryApiTests(SummaryTestsMixin, TestCase):
+    """Test the summaries API"""
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_list_summaries_for_month(self):
+        """Test listing one month reads only the rollup rows"""
+        self.create_transaction(10, datetime.date(2024, 5, 3))
+        self.create_transaction(20, datetime.date(2024, 5, 9), self.rent)
+        self.create_transaction(30, datetime.date(2024, 6, 9))
+
+        with self.assertNumQueries(1):
+            res = self.client.get(SUMMARIES_URL, {'month': '2024-05'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(row['category'], row['total'], row['count']) for row in res.data],
+            [('Food', '10.00', 1), ('Rent', '20.00', 1)])
+
+    def test_list_limited_to_user(self):
+        """Test other users' rollups are not listed"""
+        other = create_user(email='other@example.com')
+        MonthlySummary.objects.create(
+            user=other, month=datetime.date(2024, 5, 1), category=self.food,
+            transaction_type=self.expense, total=1, count=1)
+
+        res = self.client.get(SUMMARIES_URL)
+
+        self.assertEqual(res.data, [])
+
+    def test_invalid_month(self):
+        """Test a malformed month is rejected"""
+        res = self.client.get(SUMMARIES_URL, {'start': 'May'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,121 @@
+"""
+Tests for the synthetic data generator and the route benchmark
+"""
+import datetime
+import json
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db.models import Sum
+from django.test import TestCase, override_settings
+
+from transactions.models import (
+    Account,
+    MonthlySummary,
+    Transaction,
+    TransactionType,
+)
+from transactions.synthetic import DEFAULT_END, Generator, user_volumes
+
+
+def generate(**params):
+    defaults = {'users': 3, 'transactions': 20, 'seed': 7,
+                'end': datetime.date(2024, 6, 30), 'days': 90}
+    defaults.update(params)
+    return Generator(**defaults).run()
+
+
+def snapshot():
+    return list(Transaction.objects.order_by('id').values_list(
+        'user__email', 'category__name', 'account__name', 'amount', 'date',
+        'description'))
+
+
+class SyntheticDataTests(TestCase):
+    """Test generating synthetic users and transactions"""
+
+    def test_volumes_follow_skew(self):
+        """Test transactions are split by Zipf weight"""
+        self.assertEqual(user_volumes(4, 10, 0), [10, 10, 10, 10])
+        volumes = user_volumes(4, 100, 1)
+        self.assertEqual(volumes, sorted(volumes, reverse=True))
+        self.assertAlmostEqual(sum(volumes), 400, delta=2)
+
+    def test_generates_requested_volume(self):
+        """Test users, accounts and transactions are created with derived data"""
+        created = generate()
+
+        self.assertEqual(created['users'], 3)
+        self.assertEqual(get_user_model().objects.filter(
+            email__startswith='synthetic-').count(), 3)
+        self.assertEqual(Transaction.objects.count(), created['transactions'])
+        self.assertAlmostEqual(created['transactions'], 60, delta=2)
+        self.assertFalse(Transaction.objects.filter(
+            date__gt=datetime.date(2024, 6, 30)).exists())
+        self.assertEqual(
+            MonthlySummary.objects.aggregate(count=Sum('count'))['count'],
+            created['transactions'])
+        user = get_user_model().objects.get(email='synthetic-0@example.com')
+        self.assertTrue(user.check_password('synthetic-pass'))
+        self.assertTrue(Account.objects.filter(user=user).exists())
+
+    def test_seed_is_reproducible(self):
+        """Test the same seed generates the same transactions"""
+        generate(prefix='first')
+        first = [row[1:] for row in snapshot()]
+        Transaction.objects.all().delete()
+
+        generate(prefix='second')
+
+        self.assertEqual([row[1:] for row in snapshot()], first)
+
+    def test_default_end_is_fixed(self):
+        """Test histories end on the same day whenever they are generated"""
+        Generator(users=1, transactions=50, days=30).run()
+
+        self.assertLessEqual(
+            Transaction.objects.latest('date').date, DEFAULT_END)
+        self.assertGreater(Transaction.objects.earliest('date').date,
+                           DEFAULT_END - datetime.timedelta(days=31))
+
+    def test_types_match_expense_flag(self):
+        """Test a same-named type with the wrong flag is not reused"""
+        TransactionType.objects.create(name='Expense', is_expense=False)
+
+        generate(users=1)
+
+        self.assertFalse(Transaction.objects.filter(
+            category__name='Rent', transaction_type__is_expense=False,
+        ).exists())
+
+    def test_command_rejects_existing_prefix(self):
+        """Test the command refuses to add users under a used prefix"""
+        generate(users=1)
+
+        with self.assertRaises(CommandError):
+            call_command('generate_data', '--users', '1',
+                         stdout=StringIO())
+
+
+@override_settings(ALLOWED_HOSTS=['localhost'])
+class BenchRoutesTests(TestCase):
+    """Test the route benchmark report"""
+
+    def test_report_covers_every_route(self):
+        """Test every route is measured and reported as JSON"""
+        generate(users=1, transactions=30)
+        out = StringIO()
+
+        call_command('bench_routes', '--repeat', '1', '--warmup', '0',
+                     stdout=out, stderr=StringIO())
+
+        report = json.loads(out.getvalue())
+        self.assertEqual(report['meta']['uncovered_routes'], [])
+        for result in report['results']:
+            with self.subTest(label=result['label']):
+                self.assertTrue(all(200 <= status < 300
+                                    for status in result['status']), result)
+                self.assertGreaterEqual(result['p95_ms'], result['p50_ms'])
+                self.assertIsInstance(result['queries'], int)
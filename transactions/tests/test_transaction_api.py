@@ -0,0 +1,179 @@
+"""
+Tests for transactions API
+"""
+import datetime
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from transactions.models import Account, Category, Transaction, TransactionType
+
+TRANSACTIONS_URL = reverse('transaction-list')
+
+
+def create_user(email='test@example.com', password='testpass123'):
+    """Create and return a user"""
+    return get_user_model().objects.create_user(email, password)
+
+
+def create_transaction(user, **params):
+    """Create and return a transaction"""
+    transaction_type, _ = TransactionType.objects.get_or_create(name='Expense')
+    category, _ = Category.objects.get_or_create(
+        name='Groceries', user=user, transaction_type=transaction_type)
+    account, _ = Account.objects.get_or_create(
+        name='Wallet', user=user, defaults={'account_type': 'CSH', 'balance': 0})
+    defaults = {
+        'transaction_type': transaction_type,
+        'category': category,
+        'account': account,
+        'amount': 10,
+        'date': datetime.date(2024, 5, 1),
+    }
+    defaults.update(params)
+
+    return Transaction.objects.create(user=user, **defaults)
+
+
+class PublicTransactionApiTests(TestCase):
+    """Test the transactions API (public)"""
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_auth_required(self):
+        """Test that authentication is required"""
+        res = self.client.get(TRANSACTIONS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class PrivateTransactionApiTests(TestCase):
+    """Test the transactions API (private)"""
+
+    def setUp(self):
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def collect_pages(self, url):
+        """Follow next links and return the ids of every listed row"""
+        ids = []
+        while url:
+            res = self.client.get(url)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            ids.extend(row['id'] for row in res.data['results'])
+            url = res.data['next']
+        return ids
+
+    def test_list_limited_to_user(self):
+        """Test that only the authenticated user's transactions are listed"""
+        other_user = create_user(email='other@example.com')
+        create_transaction(other_user)
+        transaction = create_transaction(self.user)
+
+        res = self.client.get(TRANSACTIONS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([row['id'] for row in res.data['results']],
+                         [transaction.id])
+
+    def test_cursor_pagination_orders_by_date_then_id(self):
+        """Test that pages walk every row once by date and id descending"""
+        for day in (1, 3, 3, 3, 2, 5, 5, 4):
+            create_transaction(self.user, date=datetime.date(2024, 5, day))
+
+        ids = self.collect_pages(f'{TRANSACTIONS_URL}?page_size=3')
+
+        expected = list(
+            Transaction.objects.order_by('-date', '-id')
+            .values_list('id', flat=True)
+        )
+        self.assertEqual(ids, expected)
+
+    def test_cursor_pagination_previous_link(self):
+        """Test that the previous link returns the preceding page"""
+        for day in range(1, 8):
+            create_transaction(self.user, date=datetime.date(2024, 5, day))
+
+        first = self.client.get(f'{TRANSACTIONS_URL}?page_size=3')
+        second = self.client.get(first.data['next'])
+        back = self.client.get(second.data['previous'])
+
+        self.assertIsNone(first.data['previous'])
+        self.assertEqual(back.data['results'], first.data['results'])
+        self.assertIsNotNone(back.data['next'])
+
+    def test_invalid_cursor(self):
+        """Test that a malformed cursor is rejected"""
+        res = self.client.get(f'{TRANSACTIONS_URL}?cursor=bogus')
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_list_shows_account_name(self):
+        """Test that the listed account is the concrete account's name"""
+        transaction = create_transaction(self.user)
+
+        res = self.client.get(TRANSACTIONS_URL)
+
+        self.assertEqual(res.data['results'][0]['account'],
+                         transaction.account.name)
+
+    def test_create_transaction(self):
+        """Test creating a transaction for the authenticated user"""
+        existing = create_transaction(self.user)
+        payload = {
+            'transaction_type': existing.transaction_type.id,
+            'category': existing.category.id,
+            'account': existing.account.id,
+            'amount': '12.50',
+            'date': '2024-05-02',
+        }
+
+        res = self.client.post(TRANSACTIONS_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        transaction = Transaction.objects.get(id=res.data['id'])
+        self.assertEqual(transaction.user, self.user)
+        self.assertEqual(transaction.account, existing.account)
+
+    def test_create_transaction_with_other_users_account(self):
+        """Test that another user's account cannot be used"""
+        existing = create_transaction(self.user)
+        other_account = Account.objects.create(
+            name='Other', account_type='CSH', balance=0,
+            user=create_user(email='other@example.com'))
+        payload = {
+            'transaction_type': existing.transaction_type.id,
+            'category': existing.category.id,
+            'account': other_account.id,
+            'amount': '12.50',
+            'date': '2024-05-02',
+        }
+
+        res = self.client.post(TRANSACTIONS_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('account', res.data)
+
+    def test_create_transaction_with_other_users_category(self):
+        """Test that another user's category cannot be used"""
+        existing = create_transaction(self.user)
+        other_category = create_transaction(
+            create_user(email='other@example.com')).category
+        payload = {
+            'transaction_type': existing.transaction_type.id,
+            'category': other_category.id,
+            'account': existing.account.id,
+            'amount': '12.50',
+            'date': '2024-05-02',
+        }
+
+        res = self.client.post(TRANSACTIONS_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('category', res.data)
@@ -0,0 +1,102 @@
+"""
+Tests for the values_list() fast serialization path
+"""
+import datetime
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from transactions.models import Account, Category, Transaction, TransactionType
+from transactions.serializers import (
+    AccountDetailSerializer,
+    AccountSerializer,
+    TransactionDetailSerializer,
+    TransactionListSerializer,
+)
+from transactions.values_serializers import ValuesSerializer
+from transactions.views import TransactionViewSet
+
+TRANSACTIONS_URL = reverse('transaction-list')
+
+
+class ValuesSerializerTests(TestCase):
+    """Test the fast path renders what the model serializers render"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'test@example.com', 'testpass123')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        types = [TransactionType.objects.create(name='Income'),
+                 TransactionType.objects.create(name='Expense',
+                                                is_expense=True)]
+        categories = [
+            Category.objects.create(name=f'Category {i}', user=self.user,
+                                    transaction_type=types[i % 2])
+            for i in range(3)
+        ]
+        accounts = [
+            Account.objects.create(name=name, account_type='CSH',
+                                   balance=Decimal('10.5'), user=self.user,
+                                   description=description)
+            for name, description in (('Cash', None), ('Bank', 'Main'))
+        ]
+        for i in range(12):
+            Transaction.objects.create(
+                user=self.user, transaction_type=types[i % 2],
+                category=categories[i % 3], account=accounts[i % 2],
+                amount=Decimal(i) / 3 if i % 4 else Decimal('1E+2'),
+                description='' if i % 5 else None,
+                date=datetime.date(2024, 1, 1) + datetime.timedelta(days=i))
+
+    def assertParity(self, serializer_class, queryset, fields=None):
+        queryset = queryset.order_by('id')
+        expected = serializer_class(queryset, many=True, fields=fields).data
+
+        values = ValuesSerializer(serializer_class(fields=fields))
+        actual = values.serialize(values.rows(queryset))
+
+        self.assertEqual(actual, expected)
+
+    def test_transaction_serializers_parity(self):
+        """Test list and detail output match the model serializers"""
+        queryset = Transaction.objects.with_related()
+
+        self.assertParity(TransactionListSerializer, queryset)
+        self.assertParity(TransactionDetailSerializer, queryset)
+
+    def test_sparse_fields_parity(self):
+        """Test a narrowed serializer renders the same subset"""
+        self.assertParity(TransactionListSerializer, Transaction.objects,
+                          fields=['id', 'amount', 'transaction_type'])
+
+    def test_account_serializers_parity(self):
+        """Test account output matches the model serializers"""
+        self.assertParity(AccountSerializer, Account.objects.all())
+        self.assertParity(AccountDetailSerializer, Account.objects.all())
+
+    def test_list_endpoint_parity(self):
+        """Test every page of the list matches the model serializer path"""
+        url = f'{TRANSACTIONS_URL}?page_size=5'
+        with mock.patch.object(TransactionViewSet, 'values_list', False):
+            slow_url = url
+            slow_pages = []
+            while slow_url:
+                res = self.client.get(slow_url)
+                slow_pages.append(res.json())
+                slow_url = res.json()['next']
+
+        fast_pages = []
+        while url:
+            res = self.client.get(url)
+            fast_pages.append(res.json())
+            url = res.json()['next']
+
+        self.assertEqual(len(fast_pages), 3)
+        self.assertEqual(fast_pages, slow_pages)
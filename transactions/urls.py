@@ -1,17 +1,38 @@
 """
-URL mapping for categories app.
+URL mapping for transactions app.
 """
 from django.urls import path, include
 
 from rest_framework.routers import DefaultRouter
 
-from transactions.views import CategoryViewSet
+from transactions import async_views
+from transactions.views import (
+    AccountViewSet,
+    BudgetViewSet,
+    CategoryViewSet,
+    MonthlySummaryViewSet,
+    RecurringTransactionViewSet,
+    TransactionViewSet,
+)
 
 
 router = DefaultRouter()
+router.register('accounts', AccountViewSet)
 router.register('categories', CategoryViewSet)
+router.register('transactions', TransactionViewSet)
+router.register('summaries', MonthlySummaryViewSet)
+router.register('recurring', RecurringTransactionViewSet)
+router.register('budgets', BudgetViewSet)
 
 
 urlpatterns = [
-    path('', include(router.urls))
+    path('', include(router.urls)),
+    path('async/categories/', async_views.category_list,
+         name='async-category-list'),
+    path('async/categories/<int:pk>/', async_views.category_detail,
+         name='async-category-detail'),
+    path('async/transactions/', async_views.transaction_list,
+         name='async-transaction-list'),
+    path('async/transactions/<int:pk>/', async_views.transaction_detail,
+         name='async-transaction-detail'),
 ]
@@ -0,0 +1,118 @@
+"""
+Read-only fast path that renders a ModelSerializer's output straight from
+values_list() rows.
+
+The serializer's fields are inspected once per request and compiled into
+per-field accessors over row positions, so a large page is rendered
+without building model instances or walking field sources row by row.
+"""
+from operator import itemgetter
+
+from rest_framework import serializers
+from rest_framework.response import Response
+
+from dimewise import timing
+
+# Fields whose to_representation() leaves database values unchanged.
+PASSTHROUGH_FIELDS = (
+    serializers.BooleanField,
+    serializers.CharField,
+    serializers.IntegerField,
+    serializers.PrimaryKeyRelatedField,
+    serializers.ReadOnlyField,
+)
+
+
+class ValuesSerializer:
+    """
+    Render the fields of the ModelSerializer instance `serializer`, which
+    may be narrowed by a sparse fieldset, from values_list() rows.
+    """
+
+    def __init__(self, serializer):
+        self.paths = []
+        self.builders = self._compile(serializer.fields, prefix='')
+
+    def rows(self, queryset, extra=()):
+        """
+        Return `queryset` as named values_list() rows holding the columns
+        the fields read, plus the `extra` lookups.
+        """
+        for path in extra:
+            self._index(path)
+        return queryset.values_list(*self.paths, named=True)
+
+    def to_representation(self, row):
+        return {name: render(row) for name, render in self.builders}
+
+    def serialize(self, rows):
+        builders = self.builders
+        with timing.span('serializer'):
+            return [{name: render(row) for name, render in builders}
+                    for row in rows]
+
+    def _index(self, path):
+        if path not in self.paths:
+            self.paths.append(path)
+        return self.paths.index(path)
+
+    def _compile(self, fields, prefix):
+        builders = []
+        for name, field in fields.items():
+            if field.source == '*':
+                raise TypeError(
+                    f'{name} is computed from the whole instance and cannot '
+                    f'be rendered from values.')
+
+            path = prefix + '__'.join(field.source_attrs)
+            if isinstance(field, serializers.BaseSerializer):
+                builders.append((name, self._nested_builder(field, path)))
+            else:
+                builders.append((name, self._field_builder(field, path)))
+        return builders
+
+    def _nested_builder(self, serializer, path):
+        pk = itemgetter(self._index(f'{path}__pk'))
+        builders = self._compile(serializer.fields, prefix=f'{path}__')
+
+        def build(row):
+            if pk(row) is None:
+                return None
+            return {name: render(row) for name, render in builders}
+        return build
+
+    def _field_builder(self, field, path):
+        get = itemgetter(self._index(path))
+        if isinstance(field, PASSTHROUGH_FIELDS):
+            return get
+
+        convert = field.to_representation
+
+        def build(row):
+            value = get(row)
+            return None if value is None else convert(value)
+        return build
+
+
+class ValuesListMixin:
+    """
+    Render the list action with a ValuesSerializer when `values_list` is
+    set. `values_list_columns` are loaded in addition to the serialized
+    ones, e.g. those pagination reads.
+    """
+    values_list = False
+    values_list_columns = ()
+
+    def list(self, request, *args, **kwargs):
+        if not self.values_list:
+            return super().list(request, *args, **kwargs)
+
+        serializer = ValuesSerializer(self.get_serializer())
+        queryset = serializer.rows(
+            self.filter_queryset(self.get_queryset()),
+            extra=self.values_list_columns)
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(serializer.serialize(page))
+        return Response(serializer.serialize(queryset))
@@ -1,17 +1,454 @@
 """
-Views for the categories app.
+Views for the transactions app.
 """
-from rest_framework import viewsets
+import calendar
+import datetime
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction as db_transaction
+from django.http import StreamingHttpResponse
+from django.utils.dateparse import parse_date
+
+from django_filters.rest_framework import DjangoFilterBackend
+
+from rest_framework import mixins, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import MultiPartParser
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
 
-from .models import Category
-from .serializers import CategorySerializer
+from dimewise.replicas import ReplicaReadMixin
+from users.models import validate_currency_code
 
+from . import cache, fx
+from .conditional import ConditionalListMixin
+from .exporters import FORMATS as EXPORT_FORMATS, stream_export
+from .fieldsets import SparseFieldsViewMixin
+from .filters import TransactionFilter
+from .importers import ImportFormatError, detect_format, import_transactions
+from .models import (
+    Account,
+    Budget,
+    Category,
+    MonthlySummary,
+    RecurringTransaction,
+    Transaction,
+    TransactionType,
+)
+from .pagination import TransactionCursorPagination
+from .recurring import MaterializeDueMixin, occurrences
+from .search import search_transactions
+from .serializers import (
+    AccountDetailSerializer,
+    AccountSerializer,
+    BudgetAlertSerializer,
+    BudgetSerializer,
+    CategorySerializer,
+    MonthlySummarySerializer,
+    OccurrenceSerializer,
+    RecurringTransactionSerializer,
+    TransactionCreateSerializer,
+    TransactionDetailSerializer,
+    TransactionListSerializer,
+)
+from .signals import delete_transactions
+from .values_serializers import ValuesListMixin
 
-class CategoryViewSet(viewsets.ModelViewSet):
+
+class CategoryViewSet(ReplicaReadMixin, ConditionalListMixin,
+                      viewsets.ModelViewSet):
     """
-    Manage categories in the database
+    Manage the authenticated user's categories
     """
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     permission_classes = [IsAuthenticated]
+    version_collections = ('categories',)
+    bulk_limit = 500
+
+    def get_queryset(self):
+        return self.queryset.filter(user=self.request.user).order_by('id')
+
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+
+    @action(detail=False, methods=['post', 'patch', 'delete'])
+    def bulk(self, request):
+        """
+        Create (POST), update (PATCH, items carrying their `id`) or delete
+        (DELETE, a list of ids) up to `bulk_limit` categories in one
+        transaction. Nothing is written unless every item is valid; the
+        errors are returned as a list with one entry per item.
+        """
+        items = request.data
+        if (not isinstance(items, list)
+                or not 1 <= len(items) <= self.bulk_limit):
+            raise ValidationError({'non_field_errors': [
+                f'Expected a list of 1 to {self.bulk_limit} items.']})
+
+        handler = {'POST': self.bulk_create, 'PATCH': self.bulk_update,
+                   'DELETE': self.bulk_destroy}[request.method]
+        with db_transaction.atomic():
+            return handler(items)
+
+    def bulk_create(self, items):
+        serializer = self.get_serializer(data=items, many=True)
+        if not serializer.is_valid():
+            return Response(serializer.errors,
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        serializer.save(user=self.request.user)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    def bulk_update(self, items):
+        ids = [item.get('id') if isinstance(item, dict) else None
+               for item in items]
+        categories, errors = self.get_bulk_categories(ids)
+        if any(errors):
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+
+        serializer = self.get_serializer(
+            [categories[pk] for pk in ids], data=items, many=True,
+            partial=True)
+        if not serializer.is_valid():
+            return Response(serializer.errors,
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        serializer.save()
+        return Response(serializer.data)
+
+    def bulk_destroy(self, items):
+        categories, errors = self.get_bulk_categories(items)
+        if any(errors):
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+
+        # Their transactions go first, in one batch, so the cascade below
+        # has none left to reverse row by row.
+        delete_transactions(Transaction.objects.filter(
+            user=self.request.user, category_id__in=categories))
+        self.get_queryset().filter(pk__in=categories).delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    def get_bulk_categories(self, ids):
+        """
+        Return the user's categories with the given ids as {id: category},
+        and a list of errors for each id, empty for valid ones.
+        """
+        valid = [pk for pk in ids
+                 if isinstance(pk, int) and not isinstance(pk, bool)]
+        categories = self.get_queryset().in_bulk(valid)
+        errors, seen = [], set()
+
+        for pk in ids:
+            if not isinstance(pk, int) or isinstance(pk, bool):
+                errors.append({'id': ['A category id is required.']})
+            elif pk not in categories:
+                errors.append({'id': [
+                    f'Invalid pk "{pk}" - object does not exist.']})
+            elif pk in seen:
+                errors.append({'id': [f'Category {pk} is listed twice.']})
+            else:
+                errors.append({})
+                seen.add(pk)
+        return categories, errors
+
+
+class AccountViewSet(ReplicaReadMixin, ConditionalListMixin,
+                     SparseFieldsViewMixin, viewsets.ModelViewSet):
+    """
+    Manage the authenticated user's accounts
+    """
+    queryset = Account.objects.all()
+    serializer_class = AccountDetailSerializer
+    permission_classes = [IsAuthenticated]
+    version_collections = ('accounts',)
+
+    def get_queryset(self):
+        return self.queryset.filter(user=self.request.user).order_by('id')
+
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return AccountSerializer
+        return self.serializer_class
+
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+
+
+class TransactionViewSet(ReplicaReadMixin, MaterializeDueMixin,
+                         ConditionalListMixin, SparseFieldsViewMixin,
+                         ValuesListMixin, viewsets.ModelViewSet):
+    """
+    Manage the authenticated user's transactions
+    """
+    queryset = Transaction.objects.all()
+    serializer_class = TransactionDetailSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = TransactionCursorPagination
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = TransactionFilter
+    version_collections = ('transactions',)
+    shared_version_keys = (cache.transaction_types.version_key(),)
+    # Cursor pagination reads the date of the rows on each page boundary.
+    sparse_columns = ('date',)
+    values_list = True
+    values_list_columns = ('id', 'date')
+    materialize_actions = ('list', 'search', 'totals', 'export')
+    # Groups of the totals action: the model naming each group, if any.
+    totals_groups = {'category': Category, 'account': Account,
+                     'transaction_type': TransactionType, 'month': None}
+
+    def get_queryset(self):
+        return self.queryset.for_user(self.request.user).with_related()
+
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return TransactionListSerializer
+        if self.action in ('create', 'update', 'partial_update'):
+            return TransactionCreateSerializer
+        return self.serializer_class
+
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+
+    def get_materialize_through(self):
+        try:
+            return parse_date(self.request.query_params.get('date_before', ''))
+        except ValueError:
+            return None
+
+    @action(detail=False, methods=['post'], url_path='import',
+            parser_classes=[MultiPartParser])
+    def import_file(self, request):
+        """
+        Import a CSV or OFX bank export uploaded as `file`. `category`,
+        `transaction_type` and `account` name defaults for rows that omit
+        them, and `file_format` overrides the format implied by the name.
+        """
+        upload = request.FILES.get('file')
+        if upload is None:
+            raise ValidationError({'file': ['No file was submitted.']})
+
+        defaults = {key: request.data.get(key) for key in
+                    ('category', 'transaction_type', 'account')}
+        try:
+            file_format = (request.data.get('file_format')
+                           or detect_format(upload.name))
+            importer = import_transactions(
+                request.user, upload, file_format, defaults=defaults)
+        except ImportFormatError as exc:
+            raise ValidationError({'file_format': [str(exc)]})
+
+        return Response(importer.summary(), status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """
+        Search descriptions for every word of `q` as a prefix, best match
+        first. `limit` caps the results, 50 by default and 200 at most.
+        """
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            raise ValidationError({'q': ['This parameter is required.']})
+
+        try:
+            limit = int(request.query_params.get('limit', 50))
+        except ValueError:
+            raise ValidationError({'limit': ['Expected an integer.']})
+        if not 1 <= limit <= 200:
+            raise ValidationError({'limit': ['Expected 1 to 200.']})
+
+        results = search_transactions(
+            request.user, query, limit, queryset=self.get_queryset())
+        return Response(self.get_serializer(results, many=True).data)
+
+    @action(detail=False, methods=['get'])
+    def totals(self, request):
+        """
+        Total the filtered transactions by `group` (category, account,
+        transaction_type or month) and transaction type, converted into
+        `currency`, the user's base currency by default, at each
+        transaction date's exchange rate.
+        """
+        group = request.query_params.get('group', 'category')
+        if group not in self.totals_groups:
+            raise ValidationError({'group': [
+                f'Expected one of {", ".join(self.totals_groups)}.']})
+        currency = request.query_params.get(
+            'currency', request.user.base_currency).upper()
+        try:
+            validate_currency_code(currency)
+        except DjangoValidationError as exc:
+            raise ValidationError({'currency': exc.messages})
+
+        queryset = self.filter_queryset(
+            Transaction.objects.for_user(request.user))
+        try:
+            totals = fx.converted_totals(
+                queryset, currency,
+                'month' if group == 'month' else f'{group}_id')
+        except fx.MissingRate as exc:
+            raise ValidationError({'currency': [str(exc)]})
+
+        results = [{group: key, 'transaction_type': type_id,
+                    'total': f'{fx.cents_to_decimal(total)}', 'count': count}
+                   for key, type_id, total, count in totals]
+        model = self.totals_groups[group]
+        if model is None:
+            for row in results:
+                row['month'] = row['month'].strftime('%Y-%m')
+        else:
+            names = dict(model.objects.filter(
+                pk__in=[row[group] for row in results]).values_list(
+                    'id', 'name'))
+            for row in results:
+                row['name'] = names.get(row[group])
+        return Response({'currency': currency, 'results': results})
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        Stream every transaction as CSV, or as NDJSON with
+        `?export_format=ndjson`.
+        """
+        export_format = request.query_params.get('export_format', 'csv')
+        if export_format not in EXPORT_FORMATS:
+            raise ValidationError({'export_format': [
+                f'Expected one of {", ".join(EXPORT_FORMATS)}.']})
+
+        queryset = Transaction.objects.for_user(request.user)
+        response = StreamingHttpResponse(
+            stream_export(queryset, export_format),
+            content_type=EXPORT_FORMATS[export_format])
+        response['Content-Disposition'] = (
+            f'attachment; filename="transactions.{export_format}"')
+        return response
+
+
+class RecurringTransactionViewSet(viewsets.ModelViewSet):
+    """
+    Manage the authenticated user's recurring transactions. Occurrences
+    become transactions once they are due, when transactions or summaries
+    covering their date are listed.
+    """
+    queryset = RecurringTransaction.objects.all()
+    serializer_class = RecurringTransactionSerializer
+    permission_classes = [IsAuthenticated]
+    occurrence_window_days = 3660
+
+    def get_queryset(self):
+        return self.queryset.filter(user=self.request.user).order_by('id')
+
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+
+    @action(detail=False, methods=['get'])
+    def occurrences(self, request):
+        """
+        List every occurrence from `start` to `end` (YYYY-MM-DD), at most
+        `occurrence_window_days` apart, including those not yet due.
+        """
+        start, end = (self._parse_date(param) for param in ('start', 'end'))
+        if not 0 <= (end - start).days <= self.occurrence_window_days:
+            raise ValidationError({'end': [
+                f'Expected a date 0 to {self.occurrence_window_days} days '
+                f'after start.']})
+
+        return Response(OccurrenceSerializer(
+            occurrences(request.user, start, end), many=True).data)
+
+    def _parse_date(self, param):
+        try:
+            date = parse_date(self.request.query_params.get(param, ''))
+        except ValueError:
+            date = None
+        if date is None:
+            raise ValidationError({param: ['Expected a date as YYYY-MM-DD.']})
+        return date
+
+
+class MonthlySummaryViewSet(ReplicaReadMixin, MaterializeDueMixin,
+                            mixins.ListModelMixin,
+                            viewsets.GenericViewSet):
+    """
+    List the authenticated user's monthly spending rollups. Filter with
+    `month`, or with `start` and `end`, all given as YYYY-MM.
+    """
+    queryset = MonthlySummary.objects.select_related(
+        'category', 'transaction_type')
+    serializer_class = MonthlySummarySerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        queryset = self.queryset.filter(user=self.request.user)
+        params = self.request.query_params
+
+        if 'month' in params:
+            queryset = queryset.filter(month=self._parse_month('month'))
+        if 'start' in params:
+            queryset = queryset.filter(month__gte=self._parse_month('start'))
+        if 'end' in params:
+            queryset = queryset.filter(month__lte=self._parse_month('end'))
+
+        return queryset.order_by('month', 'category__name', 'id')
+
+    def get_materialize_through(self):
+        params = self.request.query_params
+        param = 'month' if 'month' in params else 'end'
+        try:
+            month = datetime.datetime.strptime(params[param], '%Y-%m').date()
+        except (KeyError, ValueError):
+            return None
+        return month.replace(
+            day=calendar.monthrange(month.year, month.month)[1])
+
+    def _parse_month(self, param):
+        try:
+            return datetime.datetime.strptime(
+                self.request.query_params[param], '%Y-%m').date()
+        except ValueError:
+            raise ValidationError({param: 'Expected a month as YYYY-MM.'})
+
+
+class BudgetViewSet(ReplicaReadMixin, MaterializeDueMixin,
+                    viewsets.ModelViewSet):
+    """
+    Manage the authenticated user's budgets. Filter with `category`, or
+    with `date` (YYYY-MM-DD) for the budgets whose period covers it.
+    """
+    queryset = Budget.objects.select_related('category')
+    serializer_class = BudgetSerializer
+    permission_classes = [IsAuthenticated]
+    # Spending read from budgets includes every occurrence due so far.
+    materialize_actions = ('list', 'retrieve', 'alerts')
+
+    def get_queryset(self):
+        queryset = self.queryset.filter(user=self.request.user)
+        params = self.request.query_params
+
+        if 'category' in params:
+            try:
+                queryset = queryset.filter(category=int(params['category']))
+            except ValueError:
+                raise ValidationError({'category': ['Expected an integer.']})
+        if 'date' in params:
+            try:
+                date = parse_date(params['date'])
+            except ValueError:
+                date = None
+            if date is None:
+                raise ValidationError({'date': ['Expected a date as '
+                                                'YYYY-MM-DD.']})
+            queryset = queryset.filter(start__lte=date, end__gte=date)
+
+        return queryset.order_by('start', 'category__name', 'id')
+
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+
+    @action(detail=True, methods=['get'])
+    def alerts(self, request, pk=None):
+        """List the thresholds the budget's spending has crossed"""
+        alerts = self.get_object().alerts.order_by('created_at', 'id')
+        return Response(BudgetAlertSerializer(alerts, many=True).data)
@@ -0,0 +1,121 @@
+"""
+Async create and token views for the users app.
+
+They do what CreateUserView and TokenObtainPairView do, but hash and
+check passwords on the bounded pool in users.hashing. Under the ASGI
+application a login waits for a hashing thread instead of holding a
+worker for the whole hash, and a storm beyond the pool's queue is turned
+away with 503 rather than piling up.
+"""
+import functools
+import json
+
+from asgiref.sync import sync_to_async
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import update_last_login
+from django.views.decorators.csrf import csrf_exempt
+
+from rest_framework import exceptions
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.settings import api_settings
+
+from dimewise.responses import json_response
+
+from . import hashing
+from .serializers import UserSerializer
+
+
+class HashingBusy(exceptions.APIException):
+    status_code = 503
+    default_detail = 'Too many password checks in progress, try again.'
+    default_code = 'hashing_busy'
+
+
+def parse_body(request):
+    if request.content_type == 'application/json':
+        try:
+            data = json.loads(request.body or b'{}')
+        except ValueError as exc:
+            raise exceptions.ParseError(f'JSON parse error - {exc}')
+        if not isinstance(data, dict):
+            raise exceptions.ParseError('Expected a JSON object.')
+        return data
+    return request.POST.dict()
+
+
+def async_post_view(view):
+    """
+    Allow only POST, parse the body and render API errors the way DRF
+    does.
+    """
+    @csrf_exempt
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        try:
+            if request.method != 'POST':
+                raise exceptions.MethodNotAllowed(request.method)
+            try:
+                return await view(request, parse_body(request),
+                                  *args, **kwargs)
+            except hashing.HashingPoolFull:
+                raise HashingBusy()
+        except exceptions.APIException as exc:
+            if isinstance(exc, exceptions.ValidationError):
+                data = exc.detail
+            else:
+                data = {'detail': exc.detail}
+            response = json_response(data, status=exc.status_code)
+            if isinstance(exc, HashingBusy):
+                response['Retry-After'] = '1'
+            return response
+
+    return wrapper
+
+
+@async_post_view
+async def create_user(request, data):
+    serializer = UserSerializer(data=data)
+    if not await sync_to_async(serializer.is_valid)():
+        raise exceptions.ValidationError(serializer.errors)
+
+    password_hash = await hashing.amake_password(
+        serializer.validated_data['password'])
+    await sync_to_async(serializer.save)(password_hash=password_hash)
+    return json_response(serializer.data, status=201)
+
+
+@async_post_view
+async def token_obtain_pair(request, data):
+    username_field = get_user_model().USERNAME_FIELD
+    errors = {field: ['This field is required.']
+              for field in (username_field, 'password')
+              if not data.get(field)}
+    if errors:
+        raise exceptions.ValidationError(errors)
+
+    user = await get_user(data[username_field])
+    if user is None or not user.is_active:
+        # Hash anyway, so a missing or inactive account takes as long as
+        # a wrong password, as ModelBackend does. An inactive account's
+        # password is never checked, so its hash is never upgraded.
+        await hashing.amake_password(data['password'])
+    elif await hashing.acheck_password(user, data['password']):
+        refresh = TokenObtainPairSerializer.get_token(user)
+        if api_settings.UPDATE_LAST_LOGIN:
+            await sync_to_async(update_last_login)(None, user)
+        return json_response({'refresh': str(refresh),
+                              'access': str(refresh.access_token)})
+
+    raise exceptions.AuthenticationFailed(
+        TokenObtainPairSerializer.default_error_messages['no_active_account'],
+        'no_active_account')
+
+
+async def get_user(username):
+    User = get_user_model()
+    try:
+        return await User._default_manager.aget(
+            **{User.USERNAME_FIELD: username})
+    except User.DoesNotExist:
+        return None
@@ -0,0 +1,211 @@
+"""
+Authentication classes for the users app.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction as db_transaction
+from django.db.models import Subquery
+from django.db.models.functions import Coalesce
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import (
+    AuthenticationFailed,
+    InvalidToken,
+)
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from core import versions
+from core.models import DataVersion
+from dimewise import timing
+
+
+def user_version_key(user_id):
+    return f'user:{user_id}'
+
+
+def user_version(user_id):
+    """Return an expression for the DataVersion counter of the user"""
+    return Coalesce(Subquery(DataVersion.objects.filter(
+        key=user_version_key(user_id)).values('version')[:1]), 0)
+
+
+def user_stamp(user):
+    return user.cache_version, user.password, user.is_active
+
+
+def load_stamp(user_id):
+    """Return the stored stamp of the user, or None if they are gone"""
+    return get_user_model().objects.filter(pk=user_id).values_list(
+        user_version(user_id), 'password', 'is_active').first()
+
+
+class UserCache:
+    """
+    Thread-safe per-process LRU cache of users keyed by id, with entries
+    expiring after USER_CACHE_TTL seconds.
+
+    Each entry is checked against the database at most once per
+    USER_CACHE_CHECK_INTERVAL seconds with a single-row read of the user's
+    DataVersion counter, password and is_active. Saves and deletes bump the
+    counter, so every process drops its copy within the interval, and a
+    queryset update() of the password or is_active is caught even though it
+    sends no signal.
+    """
+
+    def __init__(self):
+        self._users = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is None or entry[0] < now:
+                self._users.pop(user_id, None)
+                self.misses += 1
+                return None
+
+        expires, checked, user = entry
+        interval = getattr(settings, 'USER_CACHE_CHECK_INTERVAL', 1.0)
+        if now - checked >= interval:
+            if load_stamp(user_id) != user_stamp(user):
+                with self._lock:
+                    if self._users.get(user_id) is entry:
+                        del self._users[user_id]
+                    self.misses += 1
+                return None
+            entry = (expires, now, user)
+
+        with self._lock:
+            if user_id in self._users:
+                self._users[user_id] = entry
+                self._users.move_to_end(user_id)
+            self.hits += 1
+        return user
+
+    def set(self, user_id, user):
+        """Cache `user`, loaded with its `cache_version` annotation"""
+        now = time.monotonic()
+        expires = now + getattr(settings, 'USER_CACHE_TTL', 60)
+        with self._lock:
+            self._users[user_id] = (expires, now, user)
+            self._users.move_to_end(user_id)
+            while len(self._users) > getattr(settings, 'USER_CACHE_SIZE',
+                                             10000):
+                self._users.popitem(last=False)
+
+    def invalidate(self, user_id):
+        """Record a change to the user for every process, drop our copy"""
+        versions.bump(user_version_key(user_id))
+        self._users.pop(user_id, None)
+        # A reload before commit would pick up the uncommitted version.
+        db_transaction.on_commit(lambda: self._users.pop(user_id, None))
+
+    def clear(self):
+        with self._lock:
+            self._users.clear()
+            self.hits = self.misses = 0
+
+
+user_cache = UserCache()
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that serves users from `user_cache` so that most
+    authenticated requests run no user query. Saving or deleting a user
+    bumps their version, which every process notices within
+    USER_CACHE_CHECK_INTERVAL.
+    """
+
+    def authenticate(self, request):
+        with timing.span('auth'):
+            return super().authenticate(request)
+
+    def get_user(self, validated_token):
+        user = self.get_cached_user(validated_token)
+        if user is None:
+            user = self.cache_user(
+                validated_token, self.load_user(validated_token))
+
+        # Views may modify request.user, so never hand out the cached one.
+        return copy.copy(user)
+
+    async def aauthenticate(self, request):
+        """Async variant of authenticate for Django async views"""
+        with timing.span('auth'):
+            header = self.get_header(request)
+            if header is None:
+                return None
+
+            raw_token = self.get_raw_token(header)
+            if raw_token is None:
+                return None
+
+            validated_token = self.get_validated_token(raw_token)
+            return await self.aget_user(validated_token), validated_token
+
+    async def aget_user(self, validated_token):
+        user = self.get_cached_user(validated_token)
+        if user is None:
+            user = self.cache_user(validated_token, await sync_to_async(
+                self.load_user)(validated_token))
+
+        return copy.copy(user)
+
+    def load_user(self, validated_token):
+        """
+        Load the user as JWTAuthentication.get_user does, annotated with
+        their version in the same query.
+        """
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(
+                _('Token contained no recognizable user identification'))
+
+        try:
+            user = self.user_model.objects.annotate(
+                cache_version=user_version(user_id),
+            ).get(**{api_settings.USER_ID_FIELD: user_id})
+        except self.user_model.DoesNotExist:
+            raise AuthenticationFailed(_('User not found'),
+                                       code='user_not_found')
+
+        self.check_user(user, validated_token)
+        return user
+
+    def get_cached_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        user = user_cache.get(user_id) if user_id is not None else None
+        if user is not None:
+            self.check_user(user, validated_token)
+        return user
+
+    def cache_user(self, validated_token, user):
+        user_cache.set(validated_token[api_settings.USER_ID_CLAIM], user)
+        return user
+
+    def check_user(self, user, validated_token):
+        """Apply the checks JWTAuthentication makes after loading a user"""
+        if not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'),
+                                       code='user_inactive')
+
+        if api_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+                api_settings.REVOKE_TOKEN_CLAIM
+        ) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed(
+                _("The user's password has been changed."),
+                code='password_changed')
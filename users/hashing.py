@@ -0,0 +1,88 @@
+"""
+Password hashing off the event loop.
+
+Hashing is deliberately slow, around 400 ms for PBKDF2 at Django's
+default work factor. The async user views run it on a bounded pool of
+PASSWORD_HASHING_WORKERS threads. The PBKDF2, scrypt and argon2
+implementations release the GIL while they hash, so threads use every
+core without the pickling and start-up cost of a process pool. At most
+PASSWORD_HASHING_QUEUE hashes wait for a thread. Past that, callers get
+HashingPoolFull, so a login storm is shed instead of queueing without
+bound.
+"""
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+
+
+class HashingPoolFull(Exception):
+    pass
+
+
+class HashingPool:
+
+    def __init__(self, workers, queue):
+        self.workers = workers
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix='password-hashing')
+        self._slots = threading.BoundedSemaphore(workers + queue)
+
+    async def run(self, func, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HashingPoolFull()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                self._executor, functools.partial(func, *args))
+        finally:
+            self._slots.release()
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = HashingPool(settings.PASSWORD_HASHING_WORKERS,
+                                settings.PASSWORD_HASHING_QUEUE)
+        return _pool
+
+
+def reset_pool():
+    """Drop the pool so the next hash starts one from current settings"""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown()
+
+
+async def amake_password(password):
+    return await get_pool().run(make_password, password)
+
+
+async def acheck_password(user, password):
+    """
+    Check `password` against `user` on the pool, and store it rehashed
+    with the preferred hasher when the stored hash is outdated, as
+    User.check_password() does.
+    """
+    # check_password() calls the setter, here on the pool's thread, only
+    # for a correct password in an outdated hash. The new hash is made
+    # and saved back here, on the event loop's side.
+    outdated = []
+    is_correct = await get_pool().run(
+        check_password, password, user.password, outdated.append)
+    if outdated:
+        user.password = await amake_password(password)
+        await user.asave(update_fields=['password'])
+    return is_correct
@@ -0,0 +1,56 @@
+"""
+Benchmark JWT authentication with and without the user cache.
+"""
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.tokens import AccessToken
+
+from users.authentication import CachedJWTAuthentication, user_cache
+from users.views import RetrieveUpdateUserView
+
+
+class Command(BaseCommand):
+    help = ('Compare requests/sec of the me endpoint authenticated with '
+            'JWTAuthentication and CachedJWTAuthentication.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            user = get_user_model().objects.create_user(
+                'bench-auth@example.com', 'benchpass123')
+            token = str(AccessToken.for_user(user))
+
+            for authentication in (JWTAuthentication,
+                                   CachedJWTAuthentication):
+                user_cache.clear()
+                rate, queries = self.run(
+                    authentication, token, options['requests'])
+                self.stdout.write(
+                    f'{authentication.__name__:<26} {rate:>9.0f} req/s '
+                    f'{queries:>6.2f} queries/request')
+
+            transaction.set_rollback(True)
+
+    def run(self, authentication, token, requests):
+        view = RetrieveUpdateUserView.as_view(
+            authentication_classes=[authentication])
+        factory = APIRequestFactory()
+        request = factory.get('/api/users/me/',
+                              HTTP_AUTHORIZATION=f'Bearer {token}')
+
+        with CaptureQueriesContext(connection) as context:
+            start = time.perf_counter()
+            for _ in range(requests):
+                view(request).render()
+            elapsed = time.perf_counter() - start
+
+        return requests / elapsed, len(context) / requests
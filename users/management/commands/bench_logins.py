@@ -0,0 +1,187 @@
+"""
+Benchmark logins under a storm of concurrent clients.
+"""
+import asyncio
+import io
+import json
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from django.urls import reverse
+
+from users import hashing
+
+PREFIX = 'bench-logins-'
+PASSWORD = 'benchpass123'
+
+
+class Command(BaseCommand):
+    help = ('Log --users users in --requests times from --clients concurrent '
+            'clients, through the sync token view on a WSGI handler with N '
+            'threads and through the async token view on an ASGI handler '
+            'with a hashing pool of N threads, for each N in --workers. '
+            'Throughput grows with N up to the number of cores, since '
+            'hashing releases the GIL. The users are committed and deleted '
+            'afterwards.')
+
+    def add_arguments(self, parser):
+        cores = os.cpu_count() or 1
+        parser.add_argument('--users', type=int, default=16)
+        parser.add_argument('--requests', type=int, default=64)
+        parser.add_argument('--clients', type=int, default=32)
+        parser.add_argument(
+            '--workers', default=','.join(str(n) for n in sorted(
+                {1, 2, 4, cores, cores * 2})),
+            help='Comma separated thread counts to run with.')
+
+    def handle(self, *args, **options):
+        emails = self.populate(options['users'])
+        try:
+            bodies = [json.dumps({'email': email, 'password': PASSWORD})
+                      .encode() for email in emails]
+            runs = (
+                ('WSGI', reverse('users:token_obtain_pair'), self.run_wsgi),
+                ('ASGI', reverse('users:async-token'), self.run_asgi),
+            )
+
+            self.stdout.write(f'{os.cpu_count()} cores, hasher '
+                              f'{settings.PASSWORD_HASHERS[0].split(".")[-1]}')
+            self.stdout.write(f'{"server":<6} {"workers":>7} {"logins/s":>9} '
+                              f'{"p50 ms":>8} {"p95 ms":>8} {"503s":>5}')
+            for workers in map(int, options['workers'].split(',')):
+                for name, path, run in runs:
+                    start = time.perf_counter()
+                    results = run(path, bodies, workers, options)
+                    elapsed = time.perf_counter() - start
+
+                    latencies = [latency for status, latency in results
+                                 if status == 200]
+                    p50, p95 = (statistics.quantiles(
+                        latencies, n=20, method='inclusive')[i] * 1000
+                        for i in (9, 18))
+                    self.stdout.write(
+                        f'{name:<6} {workers:>7} '
+                        f'{len(latencies) / elapsed:>9.1f} {p50:>8.1f} '
+                        f'{p95:>8.1f} {len(results) - len(latencies):>5}')
+        finally:
+            self.cleanup()
+
+    def populate(self, users):
+        self.cleanup()
+        password_hash = make_password(PASSWORD)
+        emails = [f'{PREFIX}{n}@example.com' for n in range(users)]
+        for email in emails:
+            get_user_model().objects.create_user(
+                email, PASSWORD, password_hash=password_hash)
+        return emails
+
+    def cleanup(self):
+        get_user_model().objects.filter(email__startswith=PREFIX).delete()
+
+    def run_wsgi(self, path, bodies, workers, options):
+        handler = WSGIHandler()
+        environ = {
+            'REQUEST_METHOD': 'POST',
+            'SCRIPT_NAME': '',
+            'PATH_INFO': path,
+            'QUERY_STRING': '',
+            'CONTENT_TYPE': 'application/json',
+            'SERVER_NAME': 'localhost',
+            'SERVER_PORT': '80',
+            'SERVER_PROTOCOL': 'HTTP/1.1',
+            'HTTP_HOST': 'localhost',
+            'wsgi.url_scheme': 'http',
+            'wsgi.errors': sys.stderr,
+        }
+
+        def request(body):
+            issued = time.perf_counter()
+            statuses = []
+            response = handler(
+                {**environ, 'CONTENT_LENGTH': str(len(body)),
+                 'wsgi.input': io.BytesIO(body)},
+                lambda status, headers: statuses.append(status))
+            b''.join(response)
+            response.close()
+            status = int(statuses[0].split()[0])
+            self.check_status(status)
+            return status, time.perf_counter() - issued
+
+        # Each sync worker thread hashes the password it checks.
+        with ThreadPoolExecutor(workers) as threads:
+            futures = [threads.submit(request, bodies[n % len(bodies)])
+                       for n in range(options['requests'])]
+            return [future.result() for future in futures]
+
+    def run_asgi(self, path, bodies, workers, options):
+        handler = ASGIHandler()
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'POST',
+            'scheme': 'http',
+            'path': path,
+            'query_string': b'',
+            'server': ('localhost', 80),
+            'headers': [(b'host', b'localhost'),
+                        (b'content-type', b'application/json')],
+        }
+
+        async def request(body):
+            issued = time.perf_counter()
+            done = asyncio.Event()
+            messages = []
+            statuses = []
+
+            async def receive():
+                if messages:
+                    await done.wait()
+                    return {'type': 'http.disconnect'}
+                messages.append('request')
+                return {'type': 'http.request', 'body': body}
+
+            async def send(message):
+                if message['type'] == 'http.response.start':
+                    statuses.append(message['status'])
+                elif not message.get('more_body'):
+                    done.set()
+
+            await handler(dict(scope), receive, send)
+            self.check_status(statuses[0])
+            return statuses[0], time.perf_counter() - issued
+
+        async def run():
+            clients = asyncio.Semaphore(options['clients'])
+
+            async def client(body):
+                async with clients:
+                    return await request(body)
+
+            return await asyncio.gather(
+                *(client(bodies[n % len(bodies)])
+                  for n in range(options['requests'])))
+
+        # The event loop takes every client at once; the pool hashes on
+        # `workers` threads.
+        with override_settings(PASSWORD_HASHING_WORKERS=workers):
+            hashing.reset_pool()
+            try:
+                return asyncio.run(run())
+            finally:
+                hashing.reset_pool()
+
+    def check_status(self, status):
+        # 503 is the pool shedding load, which the report counts.
+        if status not in (200, 503):
+            raise RuntimeError(f'Benchmark request returned {status}')
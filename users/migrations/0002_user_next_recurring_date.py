@@ -0,0 +1,18 @@
+# Generated by Django 5.0.14 on 2026-10-18 12:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_add_user_model'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='next_recurring_date',
+            field=models.DateField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.14 on 2026-10-18 13:00
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_user_next_recurring_date'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='base_currency',
+            field=models.CharField(default='USD', max_length=3, validators=[django.core.validators.RegexValidator('^[A-Z]{3}\\Z', 'Expected an ISO 4217 currency code such as USD.')]),
+        ),
+    ]
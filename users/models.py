@@ -1,3 +1,5 @@
+from django.conf import settings
+from django.core.validators import RegexValidator
 from django.db import models
 from django.contrib.auth.models import (
     BaseUserManager,
@@ -5,14 +7,22 @@ from django.contrib.auth.models import (
     PermissionsMixin
 )
 
+validate_currency_code = RegexValidator(
+    r'^[A-Z]{3}\Z', 'Expected an ISO 4217 currency code such as USD.')
+
 
 class UserManager(BaseUserManager):
-    def create_user(self, email, password, **extra_fields):
+    def create_user(self, email, password, password_hash=None,
+                    **extra_fields):
         if not email:
             raise ValueError('Email is required')
 
         user = self.model(email=self.normalize_email(email), **extra_fields)
-        user.set_password(password)
+        if password_hash is None:
+            user.set_password(password)
+        else:
+            # Hashed by the caller, e.g. off the event loop.
+            user.password = password_hash
         user.save(using=self._db)
         return user
 
@@ -30,6 +40,13 @@ class User(AbstractBaseUser, PermissionsMixin):
     last_name = models.CharField(max_length=255)
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
+    # Earliest date on which one of the user's recurring transactions has
+    # an occurrence left to write; see transactions.recurring.
+    next_recurring_date = models.DateField(blank=True, null=True)
+    # Currency reports convert the user's transactions into.
+    base_currency = models.CharField(
+        max_length=3, default=settings.DEFAULT_CURRENCY,
+        validators=[validate_currency_code])
 
     objects = UserManager()
 
@@ -0,0 +1,8 @@
+"""
+OpenAPI extensions for the users app.
+"""
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+
+
+class CachedJWTScheme(SimpleJWTScheme):
+    target_class = 'users.authentication.CachedJWTAuthentication'
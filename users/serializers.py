@@ -2,20 +2,28 @@
 Serializers for the user model
 """
 from django.contrib.auth import get_user_model
+from django.db import transaction
 
 from rest_framework import serializers
 
+from dimewise.timing import TimedSerializerMixin
+from transactions.defaults import seed_default_categories
 
-class UserSerializer(serializers.ModelSerializer):
+
+class UserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Serializer for the user object"""
 
     class Meta:
         model = get_user_model()
-        fields = ['email', 'first_name', 'last_name', 'password']
+        fields = ['email', 'first_name', 'last_name', 'password',
+                  'base_currency']
         extra_kwargs = {'password': {'write_only': True, 'min_length': 5}}
 
     def create(self, validated_data):
-        return get_user_model().objects.create_user(**validated_data)
+        with transaction.atomic():
+            user = get_user_model().objects.create_user(**validated_data)
+            seed_default_categories(user)
+        return user
 
     def update(self, instance, validated_data):
         password = validated_data.pop('password', None)
@@ -0,0 +1,163 @@
+"""
+Tests for the async user create and token views
+"""
+from asgiref.sync import async_to_sync
+
+from django.contrib.auth import get_user_model
+from django.test import AsyncClient, TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework_simplejwt.tokens import AccessToken
+
+from transactions.defaults import DEFAULT_CATEGORIES
+from users import hashing
+
+CREATE_USER_URL = reverse('users:async-create')
+TOKEN_URL = reverse('users:async-token')
+
+PBKDF2 = 'django.contrib.auth.hashers.PBKDF2PasswordHasher'
+SCRYPT = 'django.contrib.auth.hashers.ScryptPasswordHasher'
+
+
+def create_user(**params):
+    return get_user_model().objects.create_user(**params)
+
+
+class AsyncUserViewTests(TestCase):
+    """Test the async views behave like the sync create and token views"""
+
+    def setUp(self):
+        self.client = AsyncClient()
+        hashing.reset_pool()
+        self.addCleanup(hashing.reset_pool)
+
+    def post(self, url, payload, **kwargs):
+        return async_to_sync(self.client.post)(
+            url, payload, content_type='application/json', **kwargs)
+
+    def test_create_user(self):
+        """Test creating a user hashes the password and seeds categories"""
+        payload = {'email': 'user@example.com', 'password': 'testpass123',
+                   'first_name': 'Test', 'last_name': 'User'}
+        res = self.post(CREATE_USER_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertNotIn('password', res.json())
+        user = get_user_model().objects.get(email=payload['email'])
+        self.assertTrue(user.check_password(payload['password']))
+        self.assertEqual(user.categories.count(), sum(
+            len(names) for names in DEFAULT_CATEGORIES.values()))
+
+    def test_create_user_invalid(self):
+        """Test validation errors are returned as the sync view does"""
+        create_user(email='user@example.com', password='testpass123')
+
+        res = self.post(CREATE_USER_URL, {'email': 'user@example.com',
+                                          'password': 'pw'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('email', res.json())
+        self.assertIn('password', res.json())
+
+    def test_create_token(self):
+        """Test valid credentials return a token pair for the user"""
+        user = create_user(email='user@example.com', password='testpass123')
+
+        res = self.post(TOKEN_URL, {'email': 'user@example.com',
+                                    'password': 'testpass123'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(AccessToken(res.json()['access'])['user_id'],
+                         user.pk)
+        self.assertIn('refresh', res.json())
+
+    def test_create_token_invalid_credentials(self):
+        """Test a wrong password, unknown or inactive user is rejected"""
+        create_user(email='user@example.com', password='testpass123')
+        create_user(email='inactive@example.com', password='testpass123',
+                    is_active=False)
+
+        for email, password in (('user@example.com', 'wrongpass'),
+                                ('nobody@example.com', 'testpass123'),
+                                ('inactive@example.com', 'testpass123')):
+            res = self.post(TOKEN_URL, {'email': email, 'password': password})
+
+            self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+            self.assertEqual(res.json()['detail'], 'No active account found '
+                             'with the given credentials')
+
+    def test_create_token_blank_fields(self):
+        """Test missing credentials are a validation error"""
+        res = self.post(TOKEN_URL, {'email': 'user@example.com'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(list(res.json()), ['password'])
+
+    def test_get_not_allowed(self):
+        """Test the views only accept POST"""
+        res = async_to_sync(self.client.get)(TOKEN_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+    def test_login_rehashes_outdated_password(self):
+        """Test a login upgrades a hash from a no longer preferred hasher"""
+        with override_settings(PASSWORD_HASHERS=[PBKDF2, SCRYPT]):
+            user = create_user(email='user@example.com',
+                               password='testpass123')
+        self.assertTrue(user.password.startswith('pbkdf2_sha256$'))
+
+        with override_settings(PASSWORD_HASHERS=[SCRYPT, PBKDF2]):
+            res = self.post(TOKEN_URL, {'email': 'user@example.com',
+                                        'password': 'testpass123'})
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+            user.refresh_from_db()
+            self.assertTrue(user.password.startswith('scrypt$'))
+            self.assertTrue(user.check_password('testpass123'))
+
+    def test_wrong_password_not_rehashed(self):
+        """Test a failed login leaves an outdated hash alone"""
+        with override_settings(PASSWORD_HASHERS=[PBKDF2, SCRYPT]):
+            user = create_user(email='user@example.com',
+                               password='testpass123')
+        encoded = user.password
+
+        with override_settings(PASSWORD_HASHERS=[SCRYPT, PBKDF2]):
+            self.post(TOKEN_URL, {'email': 'user@example.com',
+                                  'password': 'wrongpass'})
+
+        user.refresh_from_db()
+        self.assertEqual(user.password, encoded)
+
+    def test_inactive_user_not_rehashed(self):
+        """Test an inactive account's outdated hash is not written back"""
+        with override_settings(PASSWORD_HASHERS=[PBKDF2, SCRYPT]):
+            user = create_user(email='user@example.com',
+                               password='testpass123', is_active=False)
+        encoded = user.password
+
+        with override_settings(PASSWORD_HASHERS=[SCRYPT, PBKDF2]):
+            res = self.post(TOKEN_URL, {'email': 'user@example.com',
+                                        'password': 'testpass123'})
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        user.refresh_from_db()
+        self.assertEqual(user.password, encoded)
+
+    @override_settings(PASSWORD_HASHING_WORKERS=1, PASSWORD_HASHING_QUEUE=0)
+    def test_full_pool_sheds_load(self):
+        """Test logins are refused with 503 while the pool is full"""
+        create_user(email='user@example.com', password='testpass123')
+        slots = hashing.get_pool()._slots
+        slots.acquire()  # A hash in progress.
+
+        res = self.post(TOKEN_URL, {'email': 'user@example.com',
+                                    'password': 'testpass123'})
+        slots.release()
+
+        self.assertEqual(res.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(res['Retry-After'], '1')
+        res = self.post(TOKEN_URL, {'email': 'user@example.com',
+                                    'password': 'testpass123'})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
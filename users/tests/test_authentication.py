@@ -0,0 +1,120 @@
+"""
+Tests for cached JWT authentication
+"""
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core import versions
+from users.authentication import user_cache, user_version_key
+
+ME_URL = reverse('users:me')
+
+
+def create_user(**params):
+    return get_user_model().objects.create_user(**params)
+
+
+@override_settings(USER_CACHE_CHECK_INTERVAL=3600)
+class CachedJWTAuthenticationTests(TestCase):
+    """Test authenticating with the per-process user cache"""
+
+    def setUp(self):
+        user_cache.clear()
+        self.user = create_user(
+            email='test@example.com',
+            password='password123',
+            first_name='Test',
+        )
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+
+    def test_user_query_only_on_first_request(self):
+        """Test repeat requests authenticate without a user query"""
+        with self.assertNumQueries(1):
+            self.client.get(ME_URL)
+        with self.assertNumQueries(0):
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['email'], self.user.email)
+
+    def test_profile_update_invalidates_cache(self):
+        """Test changes made through the me view are seen next request"""
+        self.client.get(ME_URL)
+
+        self.client.patch(ME_URL, {'first_name': 'New'})
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.data['first_name'], 'New')
+
+    def test_deactivated_user_rejected(self):
+        """Test flipping is_active rejects a cached user"""
+        self.client.get(ME_URL)
+
+        self.user.is_active = False
+        self.user.save()
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(USER_CACHE_CHECK_INTERVAL=0)
+    def test_update_without_signal_rejected(self):
+        """Test a queryset update of is_active is caught on the next check"""
+        self.client.get(ME_URL)
+
+        get_user_model().objects.filter(pk=self.user.pk).update(
+            is_active=False)
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(USER_CACHE_CHECK_INTERVAL=0)
+    def test_change_in_other_process_reloads(self):
+        """Test a version bumped elsewhere reloads the user"""
+        self.client.get(ME_URL)
+        get_user_model().objects.filter(pk=self.user.pk).update(
+            first_name='Elsewhere')
+        versions.bump(user_version_key(self.user.pk))
+
+        with self.assertNumQueries(2):
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.data['first_name'], 'Elsewhere')
+        with self.assertNumQueries(1):
+            self.client.get(ME_URL)
+
+    def test_checks_wait_for_interval(self):
+        """Test entries are trusted without a query within the interval"""
+        self.client.get(ME_URL)
+        versions.bump(user_version_key(self.user.pk))
+
+        with self.assertNumQueries(0):
+            self.client.get(ME_URL)
+
+    @override_settings(USER_CACHE_TTL=0)
+    def test_expired_entries_reload(self):
+        """Test an expired entry is loaded from the database again"""
+        self.client.get(ME_URL)
+
+        with self.assertNumQueries(1):
+            self.client.get(ME_URL)
+
+    @override_settings(USER_CACHE_SIZE=1)
+    def test_least_recently_used_evicted(self):
+        """Test the cache keeps at most USER_CACHE_SIZE users"""
+        other = create_user(email='other@example.com', password='password123')
+        other_client = APIClient()
+        other_client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(other)}')
+
+        self.client.get(ME_URL)
+        other_client.get(ME_URL)
+
+        self.assertIsNone(user_cache.get(self.user.id))
+        self.assertIsNotNone(user_cache.get(other.id))
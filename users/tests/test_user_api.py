@@ -3,12 +3,17 @@ Tests for user API
 """
 
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
+from django.db import connection
 from django.urls import reverse
 
 from rest_framework.test import APIClient
 from rest_framework import status
 
+from transactions import cache
+from transactions.defaults import DEFAULT_CATEGORIES
+
 
 CREATE_USER_URL = reverse('users:create')
 ME_URL = reverse('users:me')
@@ -24,6 +29,7 @@ class PublicUserApiTests(TestCase):
     """Test the users API (public)"""
 
     def setUp(self):
+        cache.transaction_types.clear()
         self.client = APIClient()
 
     def test_create_valid_user_success(self):
@@ -41,6 +47,34 @@ class PublicUserApiTests(TestCase):
         self.assertTrue(user.check_password(payload['password']))
         self.assertNotIn('password', res.data)
 
+    def test_create_user_seeds_default_categories(self):
+        """Test a new user gets the default categories in bulk"""
+        payload = {
+            'first_name': 'Test',
+            'last_name': 'User',
+            'email': 'user1@example.com',
+            'password': 'testpass123',
+        }
+        expected = sum(len(names) for names in DEFAULT_CATEGORIES.values())
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.post(CREATE_USER_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        user = get_user_model().objects.get(email=payload['email'])
+        self.assertEqual(user.categories.count(), expected)
+        self.assertTrue(user.categories.filter(
+            name='Salary', transaction_type__name='Income').exists())
+        inserts = [
+            query for query in queries.captured_queries
+            if query['sql'].startswith('INSERT INTO "transactions_category"')
+        ]
+        self.assertEqual(len(inserts), 1)
+        self.assertFalse([
+            query for query in queries.captured_queries
+            if query['sql'].startswith(
+                'INSERT INTO "transactions_transactiontype"')])
+
     def test_user_with_email_exists_error(self):
         """Test creating user that already exists fails"""
         payload = {
@@ -186,7 +220,8 @@ class PrivateUserApiTests(TestCase):
         self.assertEqual(res.data, {
             'first_name': self.user.first_name,
             'last_name': self.user.last_name,
-            'email': self.user.email
+            'email': self.user.email,
+            'base_currency': 'USD'
         })
 
     def test_post_me_not_allowed(self):
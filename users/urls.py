@@ -3,7 +3,7 @@ URLs for users
 """
 from django.urls import path
 
-from users import views
+from users import async_views, views
 
 from rest_framework_simplejwt.views import (
     TokenObtainPairView,
@@ -17,4 +17,6 @@ urlpatterns = [
     path('me/', views.RetrieveUpdateUserView.as_view(), name='me'),
     path('token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('async/create/', async_views.create_user, name='async-create'),
+    path('async/token/', async_views.token_obtain_pair, name='async-token'),
 ]